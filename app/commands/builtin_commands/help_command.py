@@ -194,14 +194,42 @@ class StatusCommand(BaseCommand):
 
             status_info += f"  • CPU: {app_cpu:.1f}% / {total_cpu:.1f}%\n"
             status_info += f"  • 内存: {app_mem:.1f}MB / {total_mem:.1f}MB ({total_mem_percent:.1f}%)\n"
-            
+
+            # 本连接的 API 延迟
+            api_metrics = context.get("api_metrics")
+            if api_metrics is not None and api_metrics.enabled:
+                status_info += self._format_api_metrics(api_metrics.get_stats())
+
             status_info += "\n🕐 当前UTC时间: {}".format(context.get('timestamp', '未知'))
             
             return self.format_response(status_info, use_forward=True)
             
         except Exception as e:
             return self.format_error(f"获取状态信息失败: {e}")
-        
+
+    @staticmethod
+    def _format_api_metrics(stats: Dict[str, Any], limit: int = 10) -> str:
+        """按请求数列出最常用的 action 的延迟分位数和失败数"""
+        rows = [
+            (target_index, action, item)
+            for target_index, actions in stats["targets"].items()
+            for action, item in actions.items()
+        ]
+        text = f"📈 API 延迟 (最近 {stats['window']:.0f} 秒):\n"
+        if not rows:
+            return text + "  • 暂无请求\n"
+        rows.sort(key=lambda row: row[2]["count"], reverse=True)
+        for target_index, action, item in rows[:limit]:
+            source = f"目标{target_index}" if target_index else "自身"
+            latency = "无响应" if item["p50_ms"] is None else f"p50 {item['p50_ms']:.0f}ms / p99 {item['p99_ms']:.0f}ms"
+            text += f"  • {source} {action}: {item['count']} 次, {latency}"
+            errors = sum(item["errors"].values())
+            if errors:
+                codes = ", ".join(f"{code}×{count}" for code, count in item["errors"].items())
+                text += f", 失败 {errors} ({codes})"
+            text += "\n"
+        return text
+
 class PINGCommand(BaseCommand):
     """PING指令"""
     
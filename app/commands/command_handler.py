@@ -16,12 +16,13 @@ from .base_command import BaseCommand, CommandResponse, CommandResult, command_r
 class CommandHandler:
     """指令处理器"""
 
-    def __init__(self, config_manager, database_manager, logger, backup_manager=None):
+    def __init__(self, config_manager, database_manager, logger, backup_manager=None, api_metrics=None):
         self.config_manager = config_manager
         self.database_manager = database_manager
         self.permission_manager = PermissionManager(config_manager, logger)
         self.logger = logger
         self.backup_manager = backup_manager
+        self.api_metrics = api_metrics  # 所在连接的 API 延迟统计，供状态指令显示
         
         
     async def preprocesser(self, message_data: dict) -> dict:
@@ -181,6 +182,7 @@ class CommandHandler:
                 "permission_manager": self.permission_manager,
                 "logger": self.logger,
                 "backup_manager": self.backup_manager,
+                "api_metrics": self.api_metrics,
                 "command_info": command_info,
                 "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
             }
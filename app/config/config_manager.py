@@ -10,7 +10,7 @@ import asyncio
 import signal
 import threading
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
+from typing import Callable, Dict, List, Any, Optional, Set
 from datetime import datetime, timedelta, timezone
 
 from .config_validator import ConfigValidator, ConfigTemplate
@@ -45,6 +45,9 @@ class ConfigManager:
 
         # 配置验证器
         self._validator = ConfigValidator()
+
+        # 配置变更监听（多进程模式下用于同步到其它进程）
+        self._change_listeners: List[Callable[[str, Optional[str], Optional[Dict[str, Any]]], None]] = []
         
     def set_logger(self, logger):
         self.logger = logger
@@ -65,6 +68,64 @@ class ConfigManager:
             elif level == "error":
                 print(f"ERROR: {message}")
 
+    def add_change_listener(self, listener: Callable[[str, Optional[str], Optional[Dict[str, Any]]], None]):
+        """注册配置变更监听，参数为 (类型, 键, 新配置)，删除时新配置为 None"""
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, kind: str, key: Optional[str], config: Optional[Dict[str, Any]]):
+        for listener in self._change_listeners:
+            try:
+                listener(kind, key, config)
+            except Exception as e:
+                self.log(f"配置变更通知失败: {e}", "error")
+
+    async def apply_change(self, kind: str, key: Optional[str], config: Optional[Dict[str, Any]], persist: bool = True):
+        """应用其它进程发来的配置变更，不再通知监听者
+
+        Args:
+            kind: global / connection / account / group
+            key: 连接、账号或群号，全局配置为 None
+            config: 新配置，None 表示删除
+            persist: 是否写盘（账号和群组仍按脏数据延迟写入）
+        """
+        if kind == "global":
+            with self._global_config_lock:
+                self._global_config = config
+                if persist:
+                    self._save_global_config_sync(notify=False)
+        elif kind == "connection":
+            if config is None:
+                if persist:
+                    await self.delete_connection_config(key, notify=False)
+                else:
+                    self._connections_config.pop(key, None)
+            elif persist:
+                await self.save_connection_config(key, config, notify=False)
+            else:
+                self._connections_config[key] = config
+        elif kind == "account":
+            if config is None:
+                self._dirty_accounts.discard(key)
+                if persist:
+                    await self.delete_account_config(key, notify=False)
+                else:
+                    self._account_configs.pop(key, None)
+            else:
+                self._account_configs[key] = config
+                if persist:
+                    self._dirty_accounts.add(key)
+        elif kind == "group":
+            if config is None:
+                self._dirty_groups.discard(key)
+                if persist:
+                    await self.delete_group_config(key, notify=False)
+                else:
+                    self._group_configs.pop(key, None)
+            else:
+                self._group_configs[key] = config
+                if persist:
+                    self._dirty_groups.add(key)
+
     def _backup_corrupted_config(self, config_file: Path) -> bool:
         try:
             backup_file = config_file.with_suffix('.json.old')
@@ -292,8 +353,8 @@ class ConfigManager:
         """异步更新全局配置"""
         self.update_global_config_sync(updates)
 
-    def _save_global_config_sync(self):
-        """同步保存全局配置"""
+    def _save_global_config_sync(self, notify: bool = True):
+        """同步保存全局配置，notify 为 False 时不通知监听者"""
         global_config_file = self.config_dir / "global_config.json"
         try:
             with open(str(global_config_file).replace(".json", "_tmp.json"), 'w', encoding='utf-8') as f:
@@ -302,6 +363,8 @@ class ConfigManager:
         except Exception as e:
             self.log(f"保存全局配置失败: {e}", "error")
             raise
+        if notify:
+            self._notify_change("global", None, self._global_config)
 
     async def _save_global_config(self):
         """保存全局配置"""
@@ -316,8 +379,8 @@ class ConfigManager:
         """获取指定连接配置"""
         return self._connections_config.get(connection_id)
     
-    async def save_connection_config(self, connection_id: str, config: Dict[str, Any]):
-        """保存连接配置"""
+    async def save_connection_config(self, connection_id: str, config: Dict[str, Any], notify: bool = True):
+        """保存连接配置，notify 为 False 时不通知监听者"""
         # 验证配置
         is_valid, errors = self._validator.validate_connection_config(config)
         if not is_valid:
@@ -333,15 +396,19 @@ class ConfigManager:
         except Exception as e:
             self.log(f"保存连接配置失败 {connection_id}: {e}", "error")
             raise
+        if notify:
+            self._notify_change("connection", connection_id, config)
     
-    async def delete_connection_config(self, connection_id: str):
-        """删除连接配置"""
+    async def delete_connection_config(self, connection_id: str, notify: bool = True):
+        """删除连接配置，notify 为 False 时不通知监听者"""
         if connection_id in self._connections_config:
             del self._connections_config[connection_id]
         
         config_file = self.connections_dir / f"{connection_id}.json"
         if config_file.exists():
             config_file.unlink()
+        if notify:
+            self._notify_change("connection", connection_id, None)
     
     # 账号配置相关方法
     def get_all_account_configs(self) -> Dict[str, Dict[str, Any]]:
@@ -370,6 +437,7 @@ class ConfigManager:
         """保存账号配置（标记为脏数据，延迟写入）"""
         self._account_configs[account_id] = config
         self._dirty_accounts.add(account_id)
+        self._notify_change("account", account_id, config)
 
     async def _save_account_config_immediate(self, account_id: str, config: Dict[str, Any]):
         """立即保存账号配置到磁盘"""
@@ -445,14 +513,16 @@ class ConfigManager:
         config["enabled"] = enabled
         await self.save_account_config(account_id, config)
         
-    async def delete_account_config(self, account_id: str):
-        """删除账号配置"""
+    async def delete_account_config(self, account_id: str, notify: bool = True):
+        """删除账号配置，notify 为 False 时不通知监听者"""
         if account_id in self._account_configs:
             del self._account_configs[account_id]
         
         config_file = self.account_dir / f"{account_id}.json"
         if config_file.exists():
             config_file.unlink()
+        if notify:
+            self._notify_change("account", account_id, None)
     
     # 群组配置相关方法
     def get_all_group_configs(self) -> Dict[str, Dict[str, Any]]:
@@ -485,6 +555,7 @@ class ConfigManager:
 
         self._group_configs[group_id] = config
         self._dirty_groups.add(group_id)
+        self._notify_change("group", group_id, config)
 
     async def _save_group_config_immediate(self, group_id: str, config: Dict[str, Any]):
         """立即保存群组配置到磁盘"""
@@ -497,14 +568,16 @@ class ConfigManager:
             self.log(f"保存群组配置失败 {group_id}: {e}", "error")
             raise
 
-    async def delete_group_config(self, group_id: str):
-        """删除群组配置"""
+    async def delete_group_config(self, group_id: str, notify: bool = True):
+        """删除群组配置，notify 为 False 时不通知监听者"""
         if group_id in self._group_configs:
             del self._group_configs[group_id]
 
         config_file = self.group_dir / f"{group_id}.json"
         if config_file.exists():
             config_file.unlink()
+        if notify:
+            self._notify_change("group", group_id, None)
 
     # 群组配置相关方法
     def get_all_group_configs(self) -> Dict[str, Dict[str, Any]]:
@@ -833,14 +906,14 @@ class ConfigManager:
                 return False
 
         # 验证端点格式
-        if not config["client_endpoint"].startswith("ws://"):
+        if not config["client_endpoint"].startswith(("ws://", "ws+unix://")):
             return False
 
         if not isinstance(config["target_endpoints"], list) or len(config["target_endpoints"]) == 0:
             return False
 
         for endpoint in config["target_endpoints"]:
-            if not endpoint.startswith("ws://"):
+            if not endpoint.startswith(("ws://", "ws+unix://")):
                 return False
 
         return True
@@ -130,6 +130,85 @@ class ConfigValidator:
             if not isinstance(config["web_host"], str) or len(config["web_host"]) == 0:
                 errors.append("web_host 不能为空")
 
+        if "json_codec" in config and config["json_codec"] not in ("auto", "orjson", "msgspec", "json"):
+            errors.append("json_codec 必须是 auto、orjson、msgspec 或 json")
+
+        if "event_loop" in config and config["event_loop"] not in ("asyncio", "uvloop"):
+            errors.append("event_loop 必须是 asyncio 或 uvloop")
+
+        if "restart_mode" in config and config["restart_mode"] not in ("exec", "handover"):
+            errors.append("restart_mode 必须是 exec 或 handover")
+
+        # 重连调度配置（可选字段）
+        if "reconnect" in config:
+            reconnect = config["reconnect"]
+            if not isinstance(reconnect, dict):
+                errors.append("reconnect 必须是字典")
+            else:
+                for field in ["base_delay", "max_delay", "release_interval"]:
+                    if field in reconnect:
+                        value = reconnect[field]
+                        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                            errors.append(f"reconnect.{field} 必须是正数")
+                if "failure_threshold" in reconnect:
+                    value = reconnect["failure_threshold"]
+                    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                        errors.append("reconnect.failure_threshold 必须是正整数")
+
+        # 消息去重窗口（可选字段）
+        if "message_dedup" in config:
+            dedup = config["message_dedup"]
+            if not isinstance(dedup, dict):
+                errors.append("message_dedup 必须是字典")
+            else:
+                if "enabled" in dedup and not isinstance(dedup["enabled"], bool):
+                    errors.append("message_dedup.enabled 必须是布尔值")
+                if "window" in dedup:
+                    value = dedup["window"]
+                    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                        errors.append("message_dedup.window 必须是正整数")
+
+        # 大帧编解码卸载（可选字段）
+        if "codec_offload" in config:
+            offload = config["codec_offload"]
+            if not isinstance(offload, dict):
+                errors.append("codec_offload 必须是字典")
+            else:
+                if "enabled" in offload and not isinstance(offload["enabled"], bool):
+                    errors.append("codec_offload.enabled 必须是布尔值")
+                for field in ["threshold", "workers"]:
+                    if field in offload:
+                        value = offload[field]
+                        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                            errors.append(f"codec_offload.{field} 必须是正整数")
+
+        # API 延迟统计（可选字段）
+        if "api_metrics" in config:
+            metrics = config["api_metrics"]
+            if not isinstance(metrics, dict):
+                errors.append("api_metrics 必须是字典")
+            else:
+                if "enabled" in metrics and not isinstance(metrics["enabled"], bool):
+                    errors.append("api_metrics.enabled 必须是布尔值")
+                if "window" in metrics:
+                    value = metrics["window"]
+                    if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                        errors.append("api_metrics.window 必须是正数")
+                if "slots" in metrics:
+                    value = metrics["slots"]
+                    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                        errors.append("api_metrics.slots 必须是正整数")
+
+        # 多进程模式的 worker 进程数（可选字段），0 为单进程
+        if "workers" in config:
+            value = config["workers"]
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                errors.append("workers 必须是非负整数")
+
+        # 出站发送限速（可选字段），账号配置中的同名字段可覆盖
+        if "send_rate" in config:
+            errors.extend(ConfigValidator._validate_send_rate(config["send_rate"]))
+
         # 独立备份密码允许初始为空，启动时会自动生成并持久化。
         if "backup_password" in config and not isinstance(config["backup_password"], str):
             errors.append("backup_password 必须是字符串")
@@ -193,7 +272,105 @@ class ConfigValidator:
                             errors.append(f"target_endpoints[{i}] 必须是字符串")
                         elif not ConfigValidator._validate_websocket_url(endpoint):
                             errors.append(f"target_endpoints[{i}] 格式无效: {endpoint}")
-        
+
+        # 共享端口时用于分发客户端连接的账号（可选字段）
+        if "self_id" in config:
+            self_id = config["self_id"]
+            if isinstance(self_id, bool) or not (isinstance(self_id, int) or (isinstance(self_id, str) and self_id.isdigit())):
+                errors.append("self_id 必须是账号数字")
+
+        # 验证目标发送队列（可选字段，向后兼容）
+        if "send_queue" in config:
+            send_queue = config["send_queue"]
+            if not isinstance(send_queue, dict):
+                errors.append("send_queue 必须是字典")
+            else:
+                if "max_size" in send_queue:
+                    max_size = send_queue["max_size"]
+                    if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+                        errors.append("send_queue.max_size 必须是正整数")
+                if "overflow" in send_queue and send_queue["overflow"] not in ["drop_oldest", "drop_newest", "disconnect"]:
+                    errors.append("send_queue.overflow 必须是 drop_oldest、drop_newest 或 disconnect")
+
+        # 验证快速通道开关（可选字段）
+        if "passthrough" in config and not isinstance(config["passthrough"], bool):
+            errors.append("passthrough 必须是布尔值")
+
+        if "single_flight" in config and not isinstance(config["single_flight"], bool):
+            errors.append("single_flight 必须是布尔值")
+
+        # 验证客户端入站队列（可选字段）
+        if "ingress_queue" in config:
+            ingress_queue = config["ingress_queue"]
+            if not isinstance(ingress_queue, dict):
+                errors.append("ingress_queue 必须是字典")
+            elif "max_size" in ingress_queue:
+                max_size = ingress_queue["max_size"]
+                if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+                    errors.append("ingress_queue.max_size 必须是正整数")
+
+        if "echo_table" in config:
+            echo_table = config["echo_table"]
+            if not isinstance(echo_table, dict):
+                errors.append("echo_table 必须是字典")
+            else:
+                if "ttl" in echo_table:
+                    ttl = echo_table["ttl"]
+                    if not isinstance(ttl, (int, float)) or isinstance(ttl, bool) or ttl <= 0:
+                        errors.append("echo_table.ttl 必须是正数")
+                if "max_size" in echo_table:
+                    max_size = echo_table["max_size"]
+                    if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+                        errors.append("echo_table.max_size 必须是正整数")
+
+        if "media_store" in config:
+            media_store = config["media_store"]
+            if not isinstance(media_store, dict):
+                errors.append("media_store 必须是字典")
+            else:
+                if "min_size" in media_store:
+                    value = media_store["min_size"]
+                    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                        errors.append("media_store.min_size 必须是非负整数")
+
+        if "api_cache" in config:
+            api_cache = config["api_cache"]
+            if not isinstance(api_cache, dict):
+                errors.append("api_cache 必须是字典")
+            else:
+                if "enabled" in api_cache and not isinstance(api_cache["enabled"], bool):
+                    errors.append("api_cache.enabled 必须是布尔值")
+                if "ttl" in api_cache:
+                    ttl = api_cache["ttl"]
+                    if not isinstance(ttl, dict):
+                        errors.append("api_cache.ttl 必须是字典")
+                    else:
+                        for action, seconds in ttl.items():
+                            if not isinstance(seconds, (int, float)) or isinstance(seconds, bool) or seconds < 0:
+                                errors.append(f"api_cache.ttl[{action}] 必须是非负数")
+                if "max_size" in api_cache:
+                    max_size = api_cache["max_size"]
+                    if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+                        errors.append("api_cache.max_size 必须是正整数")
+
+        # 验证端点选项（可选字段）：client_options 作用于客户端端点，target_options 按目标地址配置，"*" 为默认
+        if "client_options" in config:
+            if not isinstance(config["client_options"], dict):
+                errors.append("client_options 必须是字典")
+            else:
+                errors.extend(ConfigValidator._validate_endpoint_options(config["client_options"], "client_options"))
+
+        if "target_options" in config:
+            target_options = config["target_options"]
+            if not isinstance(target_options, dict):
+                errors.append("target_options 必须是字典")
+            else:
+                for endpoint, options in target_options.items():
+                    if not isinstance(options, dict):
+                        errors.append(f"target_options[{endpoint}] 必须是字典")
+                    else:
+                        errors.extend(ConfigValidator._validate_endpoint_options(options, f"target_options[{endpoint}]"))
+
         return len(errors) == 0, errors
     
     @staticmethod
@@ -236,6 +413,9 @@ class ConfigValidator:
                         for alias in value:
                             if not isinstance(alias, str):
                                 errors.append(f"aliases[{key}] 中的别名必须是字符串: {alias}")
+
+        if "send_rate" in config:
+            errors.extend(ConfigValidator._validate_send_rate(config["send_rate"]))
         
         # 验证时间字段
         time_fields = ["last_receive_time", "last_send_time"]
@@ -324,13 +504,116 @@ class ConfigValidator:
     
     @staticmethod
     def _validate_websocket_url(url: str) -> bool:
-        """验证WebSocket URL格式"""
+        """验证WebSocket URL格式，支持 ws+unix:// 本机套接字端点"""
+        if isinstance(url, str) and url.startswith("ws+unix://"):
+            socket_path = url[len("ws+unix://"):]
+            return socket_path.startswith("/") or socket_path.startswith("./")
         try:
             parsed = urlparse(url)
             return parsed.scheme in ["ws", "wss"] and parsed.netloc
         except Exception:
             return False
     
+    @staticmethod
+    def _validate_endpoint_options(options: Dict[str, Any], prefix: str) -> List[str]:
+        """验证单个端点的选项"""
+        errors = []
+
+        if "compression" in options:
+            compression = options["compression"]
+            if not isinstance(compression, dict):
+                errors.append(f"{prefix}.compression 必须是字典")
+            else:
+                if "mode" in compression and compression["mode"] not in ["off", "always", "threshold"]:
+                    errors.append(f"{prefix}.compression.mode 必须是 off、always 或 threshold")
+                if "min_size" in compression:
+                    min_size = compression["min_size"]
+                    if not isinstance(min_size, int) or isinstance(min_size, bool) or min_size < 0:
+                        errors.append(f"{prefix}.compression.min_size 必须是非负整数")
+
+        if "connect_timeout" in options:
+            timeout = options["connect_timeout"]
+            if not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0:
+                errors.append(f"{prefix}.connect_timeout 必须是正数")
+
+        if "subscribe" in options:
+            subscribe = options["subscribe"]
+            if not isinstance(subscribe, dict):
+                errors.append(f"{prefix}.subscribe 必须是字典")
+            else:
+                for key in ["post_types", "message_types", "notice_types", "command_prefixes"]:
+                    if key in subscribe:
+                        values = subscribe[key]
+                        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                            errors.append(f"{prefix}.subscribe.{key} 必须是字符串列表")
+                for key in ["groups_allow", "groups_deny"]:
+                    if key in subscribe:
+                        values = subscribe[key]
+                        if not isinstance(values, list) or not all(
+                            (isinstance(v, str) and v.isdigit()) or (isinstance(v, int) and not isinstance(v, bool))
+                            for v in values
+                        ):
+                            errors.append(f"{prefix}.subscribe.{key} 必须是群号列表")
+                if "commands_only" in subscribe:
+                    if not isinstance(subscribe["commands_only"], bool):
+                        errors.append(f"{prefix}.subscribe.commands_only 必须是布尔值")
+                    elif subscribe["commands_only"] and not subscribe.get("command_prefixes"):
+                        errors.append(f"{prefix}.subscribe.commands_only 需要同时设置 command_prefixes")
+
+        if "heartbeat" in options:
+            heartbeat = options["heartbeat"]
+            if not isinstance(heartbeat, dict):
+                errors.append(f"{prefix}.heartbeat 必须是字典")
+            else:
+                if "mode" in heartbeat and heartbeat["mode"] not in ["forward", "synthesize"]:
+                    errors.append(f"{prefix}.heartbeat.mode 必须是 forward 或 synthesize")
+                if "interval" in heartbeat:
+                    interval = heartbeat["interval"]
+                    if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+                        errors.append(f"{prefix}.heartbeat.interval 必须是正数")
+
+        if "catchup" in options:
+            catchup = options["catchup"]
+            if not isinstance(catchup, dict):
+                errors.append(f"{prefix}.catchup 必须是字典")
+            else:
+                if "enabled" in catchup and not isinstance(catchup["enabled"], bool):
+                    errors.append(f"{prefix}.catchup.enabled 必须是布尔值")
+                for field in ["max_events", "max_bytes"]:
+                    if field in catchup:
+                        value = catchup[field]
+                        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                            errors.append(f"{prefix}.catchup.{field} 必须是正整数")
+                for field in ["max_age", "replay_rate"]:
+                    if field in catchup:
+                        value = catchup[field]
+                        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                            errors.append(f"{prefix}.catchup.{field} 必须是正数")
+
+        return errors
+
+    @staticmethod
+    def _validate_send_rate(send_rate: Any) -> List[str]:
+        """验证出站发送限速配置"""
+        errors = []
+        if not isinstance(send_rate, dict):
+            return ["send_rate 必须是字典"]
+        if "enabled" in send_rate and not isinstance(send_rate["enabled"], bool):
+            errors.append("send_rate.enabled 必须是布尔值")
+        for field in ["account_rate", "account_burst", "group_rate", "group_burst"]:
+            if field in send_rate:
+                value = send_rate[field]
+                if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                    errors.append(f"send_rate.{field} 必须是正数")
+        for field in ["account_burst", "group_burst"]:
+            if isinstance(send_rate.get(field), (int, float)) and 0 < send_rate[field] < 1:
+                errors.append(f"send_rate.{field} 不能小于 1")
+        if "max_queue" in send_rate:
+            value = send_rate["max_queue"]
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                errors.append("send_rate.max_queue 必须是正整数")
+        return errors
+
     @staticmethod
     def _validate_qq_number(qq: str) -> bool:
         """验证QQ号格式"""
@@ -386,6 +669,7 @@ class ConfigTemplate:
             "web_port": 5111,
             "auto_save_interval": 10,  # 自动保存间隔（分钟），最小1分钟
             "proxy": "",  # 代理地址，格式如 http://127.0.0.1:7890，为空则不使用代理
+            "json_codec": "auto",  # JSON 实现：auto/orjson/msgspec/json，auto 按 orjson、msgspec、json 的顺序选择已安装的
             "backup_password": "",  # 启动时自动生成并持久化独立备份密码
             "backup": {
                 "enabled": True,  # 是否启用自动备份
@@ -4,7 +4,6 @@
 """
 
 import asyncio
-import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional
@@ -14,6 +13,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 from .models import Base, Message, MessageRecord
+from ..utils import json_codec
 from sqlalchemy.exc import OperationalError
 
 
@@ -170,7 +170,7 @@ class DatabaseManager:
                 message_content = str(message_data["message"])[:1000]  # 限制长度为1000字符
 
         # 发送者信息
-        sender_info = json.dumps(message_data.get("sender", {}), ensure_ascii=False)
+        sender_info = json_codec.dumps(message_data.get("sender", {}))
 
         # 时间戳
         timestamp = int(message_data.get("time", datetime.now().timestamp()))
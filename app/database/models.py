@@ -11,6 +11,8 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 
+from ..utils import json_codec
+
 Base = declarative_base()
 
 class Message(Base):
@@ -70,7 +72,7 @@ class MessageRecord:
         sender_info = {}
         if row.sender_info:
             try:
-                sender_info = json.loads(row.sender_info)
+                sender_info = json_codec.loads(row.sender_info)
             except (json.JSONDecodeError, TypeError):
                 sender_info = {}
 
@@ -7,6 +7,7 @@ import json
 from typing import Dict, Any, Optional, Union, List
 from pydantic import ValidationError
 
+from ..utils import json_codec
 from .models import (
     Event, PostType, MessageType, NoticeType, RequestType,
     PrivateMessageEvent, GroupMessageEvent, PrivateMessageSentEvent, GroupMessageSentEvent,
@@ -25,7 +26,7 @@ class EventParser:
         """解析原始数据为事件对象"""
         try:
             if isinstance(raw_data, str):
-                data = json.loads(raw_data)
+                data = json_codec.loads(raw_data)
             else:
                 data = raw_data
             
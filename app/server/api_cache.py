@@ -0,0 +1,136 @@
+"""
+只读 API 响应缓存
+多个框架反复调用 get_group_list、get_group_member_info 等只读接口时由代理直接应答，
+按 (self_id, action, 规范化参数) 缓存成功的响应，收到成员/好友变动通知时失效
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+# 可缓存的只读接口及默认缓存秒数
+DEFAULT_CACHE_TTL = {
+    "get_login_info": 300,
+    "get_group_list": 60,
+    "get_group_info": 60,
+    "get_group_member_info": 60,
+    "get_group_member_list": 60,
+    "get_friend_list": 60,
+}
+DEFAULT_CACHE_MAX_SIZE = 2000
+
+# 群成员相关的缓存，成员变动时按群失效
+_MEMBER_ACTIONS = ("get_group_member_info", "get_group_member_list", "get_group_info")
+# 不参与缓存键的参数，no_cache 只决定是否读缓存
+_IGNORED_PARAMS = ("no_cache",)
+
+CacheKey = Tuple[Any, str, Tuple[Tuple[str, str], ...]]
+
+
+def make_key(self_id: Any, action: str, params: Optional[Dict[str, Any]]) -> Optional[CacheKey]:
+    """规范化参数生成缓存键：键排序、值统一成字符串（"123" 与 123 视为相同），
+    参数里有列表/字典等复杂值时不缓存，返回 None"""
+    items = []
+    for name, value in (params or {}).items():
+        if name in _IGNORED_PARAMS:
+            continue
+        if isinstance(value, (dict, list, tuple)):
+            return None
+        items.append((name, str(value).lower() if isinstance(value, bool) else str(value)))
+    items.sort()
+    return (str(self_id), action, tuple(items))
+
+
+class _CacheEntry:
+    __slots__ = ("data", "expires_at", "group_id")
+
+    def __init__(self, data: Any, expires_at: float, group_id: Optional[str]):
+        self.data = data
+        self.expires_at = expires_at
+        self.group_id = group_id
+
+
+class ApiCache:
+    """TTL + LRU 的只读 API 响应缓存"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.ttl = dict(DEFAULT_CACHE_TTL)
+        # 按接口覆盖缓存秒数，设为 0 表示该接口不缓存
+        self.ttl.update(config.get("ttl", {}) or {})
+        self.max_size = int(config.get("max_size", DEFAULT_CACHE_MAX_SIZE))
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidated = 0
+
+    def cacheable(self, action: Any) -> bool:
+        return self.enabled and bool(self.ttl.get(action))
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """命中返回缓存的 data，未命中或已过期返回 None"""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.data
+
+    def put(self, key: CacheKey, data: Any):
+        action = key[1]
+        group_id = dict(key[2]).get("group_id")
+        self._entries[key] = _CacheEntry(data, time.monotonic() + self.ttl[action], group_id)
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def on_event(self, event: Dict[str, Any]):
+        """根据通知事件失效相关缓存"""
+        if not self._entries or event.get("post_type") != "notice":
+            return
+        notice_type = event.get("notice_type")
+        self_id = str(event.get("self_id"))
+        group_id = str(event.get("group_id"))
+        if notice_type in ("group_increase", "group_decrease"):
+            # 成员数变化；机器人自己进出群时群列表也会变
+            self._invalidate(self_id, _MEMBER_ACTIONS + ("get_group_list",), group_id)
+        elif notice_type in ("group_admin", "group_card"):
+            self._invalidate(self_id, _MEMBER_ACTIONS, group_id)
+        elif notice_type == "friend_add":
+            self._invalidate(self_id, ("get_friend_list",))
+
+    def _invalidate(self, self_id: str, actions: Tuple[str, ...], group_id: Optional[str] = None):
+        """失效某账号下指定接口的缓存；给出 group_id 时，带群号的缓存只失效该群"""
+        stale = [
+            key for key, entry in self._entries.items()
+            if key[0] == self_id and key[1] in actions
+            and (group_id is None or entry.group_id is None or entry.group_id == group_id)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidated += len(stale)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "invalidated": self.invalidated,
+        }
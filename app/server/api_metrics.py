@@ -0,0 +1,178 @@
+"""
+API 延迟与错误统计
+按 (目标, action) 记录框架发出请求到收到客户端响应的耗时和错误码。
+耗时放入固定边界的直方图，直方图按时间分片组成滑动窗口，只反映最近一段时间的情况，
+某个账号的 send_group_msg 变慢时能在状态接口中直接看到。
+起点取 echo 关联表登记请求的时间，发送限速排队的时间也计入；超过 echo TTL 未响应的请求记为 timeout 错误，
+关联表已满被淘汰的请求同样收不到响应，记为 evicted 错误
+"""
+
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 直方图桶的上边界（毫秒），最后还有一个超过 30 秒的桶
+BUCKET_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# 滑动窗口长度（秒）与分片数，窗口按分片整体滑动
+DEFAULT_METRICS_WINDOW = 300
+DEFAULT_METRICS_SLOTS = 10
+# 单个连接最多统计的 action 种类，超出的归入 OTHER_ACTION
+MAX_ACTIONS = 200
+OTHER_ACTION = "other"
+# 未收到响应的请求使用的错误码
+ERROR_TIMEOUT = "timeout"
+# 关联表已满被淘汰、不会再收到响应的请求使用的错误码
+ERROR_EVICTED = "evicted"
+UNANSWERED_ERRORS = (ERROR_TIMEOUT, ERROR_EVICTED)
+PERCENTILES = (50, 90, 99)
+
+
+class _Slot:
+    """一个时间分片内的计数"""
+    __slots__ = ("slot_id", "counts", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.reset(-1)
+
+    def reset(self, slot_id: int):
+        self.slot_id = slot_id
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.errors: Dict[str, int] = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class _ActionHistogram:
+    """单个 (目标, action) 的滑动窗口直方图"""
+    __slots__ = ("slots",)
+
+    def __init__(self, slots: int):
+        self.slots = [_Slot() for _ in range(slots)]
+
+    def _slot(self, slot_id: int) -> _Slot:
+        slot = self.slots[slot_id % len(self.slots)]
+        if slot.slot_id != slot_id:
+            slot.reset(slot_id)
+        return slot
+
+    def record(self, slot_id: int, elapsed_ms: Optional[float], error: Optional[str]):
+        slot = self._slot(slot_id)
+        if elapsed_ms is not None:
+            slot.counts[bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+            slot.total_ms += elapsed_ms
+            if elapsed_ms > slot.max_ms:
+                slot.max_ms = elapsed_ms
+        if error is not None:
+            slot.errors[error] = slot.errors.get(error, 0) + 1
+
+    def get_stats(self, slot_id: int) -> Optional[Dict[str, Any]]:
+        """合并窗口内的分片，窗口内没有数据时返回 None"""
+        counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        errors: Dict[str, int] = {}
+        total_ms = 0.0
+        max_ms = 0.0
+        oldest = slot_id - len(self.slots)
+        for slot in self.slots:
+            if slot.slot_id <= oldest or slot.slot_id > slot_id:
+                continue
+            for i, count in enumerate(slot.counts):
+                counts[i] += count
+            for code, count in slot.errors.items():
+                errors[code] = errors.get(code, 0) + count
+            total_ms += slot.total_ms
+            max_ms = max(max_ms, slot.max_ms)
+
+        responses = sum(counts)
+        unanswered = sum(errors.get(code, 0) for code in UNANSWERED_ERRORS)
+        if not responses and not unanswered:
+            return None
+        error_count = sum(errors.values())
+        stats = {
+            "count": responses + unanswered,
+            "errors": errors,
+            "error_rate": round(error_count / (responses + unanswered), 4),
+            "avg_ms": round(total_ms / responses, 2) if responses else None,
+            "max_ms": round(max_ms, 2) if responses else None,
+            "buckets": counts,
+        }
+        for p in PERCENTILES:
+            stats[f"p{p}_ms"] = _percentile(counts, responses, p, max_ms)
+        return stats
+
+
+def _percentile(counts: List[int], total: int, p: int, max_ms: float) -> Optional[float]:
+    """按桶估算分位数：取所在桶的上边界，不超过窗口内的最大值"""
+    if not total:
+        return None
+    rank = math.ceil(total * p / 100)
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            bound = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else max_ms
+            return round(min(bound, max_ms), 2)
+    return round(max_ms, 2)
+
+
+def error_code(response: Dict[str, Any]) -> Optional[str]:
+    """响应的错误码，成功时返回 None"""
+    retcode = response.get("retcode", 0)
+    if response.get("status", "ok") == "ok" and retcode == 0:
+        return None
+    return str(retcode) if retcode else str(response.get("status"))
+
+
+class ApiMetrics:
+    """单个连接的 API 延迟与错误统计，键为 (target_index, action)，target_index 0 为 BotShepherd 自身"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.window = float(config.get("window", DEFAULT_METRICS_WINDOW))
+        self.slot_count = int(config.get("slots", DEFAULT_METRICS_SLOTS))
+        self.slot_seconds = self.window / self.slot_count
+        self._histograms: Dict[Tuple[int, str], _ActionHistogram] = {}
+
+    def _histogram(self, target_index: int, action: str) -> _ActionHistogram:
+        key = (target_index, action)
+        histogram = self._histograms.get(key)
+        if histogram is None and len(self._histograms) >= MAX_ACTIONS:
+            # action 由框架决定，限制种类避免内存无限增长
+            key = (target_index, OTHER_ACTION)
+            histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = _ActionHistogram(self.slot_count)
+        return histogram
+
+    def _slot_id(self) -> int:
+        return int(time.time() // self.slot_seconds)
+
+    def record(self, target_index: int, action: str, created_at: float, response: Dict[str, Any]):
+        """记录一次响应，created_at 为请求登记时间（time.time()）"""
+        if not self.enabled:
+            return
+        elapsed_ms = max(time.time() - created_at, 0.0) * 1000
+        self._histogram(target_index, action or OTHER_ACTION).record(self._slot_id(), elapsed_ms, error_code(response))
+
+    def record_timeout(self, target_index: int, action: str, error: str = ERROR_TIMEOUT):
+        """记录一次未收到响应的请求，error 为 timeout 或 evicted"""
+        if not self.enabled:
+            return
+        self._histogram(target_index, action or OTHER_ACTION).record(self._slot_id(), None, error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """窗口内的统计，targets 按目标序号再按 action 分组，窗口内没有请求的 action 不返回"""
+        slot_id = self._slot_id()
+        targets: Dict[int, Dict[str, Any]] = {}
+        for (target_index, action), histogram in sorted(self._histograms.items()):
+            stats = histogram.get_stats(slot_id)
+            if stats is not None:
+                targets.setdefault(target_index, {})[action] = stats
+        return {
+            "enabled": self.enabled,
+            "window": self.window,
+            "buckets_ms": list(BUCKET_BOUNDS_MS),
+            "targets": targets,
+        }
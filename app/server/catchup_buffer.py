@@ -0,0 +1,114 @@
+"""
+目标补发缓冲
+目标断开重连期间（例如框架重启），发给它的事件按顺序暂存在一个有界缓冲里，
+重连并发出 greeting（客户端的第一条消息，框架用它注册）后按限定速率补发，
+框架重启窗口内用户发出的指令不再丢失。缓冲按条数、字节数和存放时间三重限制，
+过期的事件补发前丢弃，超出容量时淘汰最早的事件
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+
+# 最多暂存的事件数
+DEFAULT_CATCHUP_MAX_EVENTS = 500
+# 暂存事件的总长度上限（字符数）
+DEFAULT_CATCHUP_MAX_BYTES = 4 * 1024 * 1024
+# 事件最长暂存时间（秒），超过后补发给框架已无意义
+DEFAULT_CATCHUP_MAX_AGE = 120
+# 补发速率（条/秒），避免框架刚启动就被积压的事件压垮
+DEFAULT_CATCHUP_REPLAY_RATE = 20
+
+
+class CatchupBuffer:
+    """单个目标的补发缓冲，按入队顺序补发"""
+
+    def __init__(self, max_events: int = DEFAULT_CATCHUP_MAX_EVENTS, max_bytes: int = DEFAULT_CATCHUP_MAX_BYTES,
+                 max_age: float = DEFAULT_CATCHUP_MAX_AGE, replay_rate: float = DEFAULT_CATCHUP_REPLAY_RATE):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.replay_rate = replay_rate
+        self._items: Deque[Tuple[float, Any]] = deque()  # (入缓冲时间, 帧)
+        self._bytes = 0
+
+        # 统计
+        self.buffered = 0  # 进入缓冲的事件数
+        self.replayed = 0  # 已补发送达的事件数，由发送方在发送成功后计数，失败放回的事件不重复计入
+        self.expired = 0   # 超过 max_age 丢弃的事件数
+        self.evicted = 0   # 超过条数或字节数上限被淘汰的事件数
+
+    @classmethod
+    def from_options(cls, options: Optional[Dict[str, Any]]) -> Optional["CatchupBuffer"]:
+        """根据 target_options 中的 catchup 字段创建，未配置或已关闭时返回 None"""
+        if options is None or not options.get("enabled", True):
+            return None
+        return cls(
+            max_events=int(options.get("max_events", DEFAULT_CATCHUP_MAX_EVENTS)),
+            max_bytes=int(options.get("max_bytes", DEFAULT_CATCHUP_MAX_BYTES)),
+            max_age=float(options.get("max_age", DEFAULT_CATCHUP_MAX_AGE)),
+            replay_rate=float(options.get("replay_rate", DEFAULT_CATCHUP_REPLAY_RATE)),
+        )
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, payload: Any):
+        """暂存一条事件，放在最后"""
+        self._items.append((time.monotonic(), payload))
+        self._bytes += len(payload)
+        self.buffered += 1
+        self._trim()
+
+    def restore(self, payloads: Iterable[Any]):
+        """放回尚未送达的事件：它们比缓冲中已有的事件更早，放在最前面并保持原有顺序"""
+        # 沿用当前最早事件的时间，保持缓冲按时间有序
+        held_at = self._items[0][0] if self._items else time.monotonic()
+        items = [(held_at, payload) for payload in payloads]
+        if not items:
+            return
+        self._items.extendleft(reversed(items))
+        self._bytes += sum(len(payload) for _, payload in items)
+        self._trim()
+
+    def pop(self) -> Optional[Any]:
+        """取出最早的一条未过期事件，缓冲为空时返回 None"""
+        self._expire()
+        if not self._items:
+            return None
+        _, payload = self._items.popleft()
+        self._bytes -= len(payload)
+        return payload
+
+    def clear(self):
+        self._items.clear()
+        self._bytes = 0
+
+    def _expire(self):
+        deadline = time.monotonic() - self.max_age
+        while self._items and self._items[0][0] < deadline:
+            _, payload = self._items.popleft()
+            self._bytes -= len(payload)
+            self.expired += 1
+
+    def _trim(self):
+        self._expire()
+        while self._items and (len(self._items) > self.max_events or self._bytes > self.max_bytes):
+            _, payload = self._items.popleft()
+            self._bytes -= len(payload)
+            self.evicted += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._items),
+            "pending_bytes": self._bytes,
+            "max_events": self.max_events,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            "replay_rate": self.replay_rate,
+            "buffered": self.buffered,
+            "replayed": self.replayed,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,108 @@
+"""
+共享端口的客户端路由
+多个连接配置的 client_endpoint 使用同一个 host:port 时只启动一个监听，
+新连接按 URL 路径或 X-Self-Id 请求头分发给对应的连接配置
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .unix_socket import is_unix_endpoint, parse_unix_endpoint
+
+
+# (host, port)，Unix 套接字为 (套接字路径, None)
+ListenKey = Tuple[str, Optional[int]]
+
+SELF_ID_HEADER = "X-Self-Id"
+
+
+def parse_client_endpoint(client_endpoint: str) -> Tuple[str, Optional[int], str]:
+    """解析客户端端点，返回 (host, port, path)，Unix 套接字端点返回 (套接字路径, None, path)"""
+    if is_unix_endpoint(client_endpoint):
+        socket_path, path = parse_unix_endpoint(client_endpoint)
+        return socket_path, None, normalize_path(path)
+    if not client_endpoint.startswith("ws://"):
+        raise ValueError(f"不支持的客户端端点格式: {client_endpoint}")
+    url_part = client_endpoint[5:]  # 移除 "ws://"
+    if "/" in url_part:
+        host_port, path = url_part.split("/", 1)
+    else:
+        host_port = url_part
+        path = ""
+
+    if ":" in host_port:
+        host, port = host_port.split(":", 1)
+        port = int(port)
+    else:
+        host = host_port
+        port = 80
+    return host, port, normalize_path(path)
+
+
+def normalize_path(path: str) -> str:
+    """去掉查询参数和首尾斜杠，用于比较"""
+    return urlsplit(path).path.strip("/")
+
+
+class ClientRouter:
+    """一个 host:port 上的路由表"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Dict[str, Any]] = {}  # connection_id -> 连接配置
+        self.task: Optional[asyncio.Task] = None
+        self.listening = False
+
+        # 统计
+        self.routed = 0
+        self.rejected = 0
+
+    @property
+    def key(self) -> ListenKey:
+        return self.host, self.port
+
+    @property
+    def address(self) -> str:
+        return f"unix:{self.host}" if self.port is None else f"{self.host}:{self.port}"
+
+    def add_route(self, connection_id: str, config: Dict[str, Any]):
+        self.routes[connection_id] = config
+
+    def remove_route(self, connection_id: str) -> bool:
+        return self.routes.pop(connection_id, None) is not None
+
+    def resolve(self, path: str, self_id: Optional[str], known_self_ids: Dict[str, Any]) -> Optional[str]:
+        """选出连接配置：先按路径，路径相同的多个配置再按账号区分
+
+        账号优先取连接配置中的 self_id，未配置时取该连接上次连接时上报的账号
+        """
+        if len(self.routes) == 1:
+            # 只剩一个配置时与独占监听一致，不检查路径
+            return next(iter(self.routes))
+        path = normalize_path(path)
+        candidates = [
+            connection_id for connection_id, config in self.routes.items()
+            if parse_client_endpoint(config["client_endpoint"])[2] == path
+        ]
+        if len(candidates) == 1:
+            return candidates[0]
+        if not candidates:
+            # 路径都不匹配时在全部配置中按账号查找
+            candidates = list(self.routes)
+        if not self_id:
+            return None
+        for connection_id in candidates:
+            route_self_id = self.routes[connection_id].get("self_id") or known_self_ids.get(connection_id)
+            if route_self_id is not None and str(route_self_id) == self_id:
+                return connection_id
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "listen": self.address,
+            "routes": sorted(self.routes),
+            "routed": self.routed,
+            "rejected": self.rejected,
+        }
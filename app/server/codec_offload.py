@@ -0,0 +1,114 @@
+"""
+大帧编解码卸载
+几 MB 的群成员列表、合并转发消息在事件循环里解析/序列化会卡住进程内所有连接几十毫秒，
+超过阈值的帧交给一个小线程池处理，事件循环在此期间继续处理其它连接。
+调用方逐条 await，同一连接内的处理顺序不变
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from ..utils import json_codec
+
+
+# 超过该长度（字符数）的帧在线程池中编解码
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+# 线程池大小，进程内所有连接共享
+DEFAULT_OFFLOAD_WORKERS = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bs-codec")
+    return _executor
+
+
+def _timed(func, arg):
+    """在线程池中执行，异常原样抛回调用方"""
+    start = time.perf_counter()
+    result = func(arg)
+    return result, time.perf_counter() - start
+
+
+class _Timing:
+    """编解码耗时统计"""
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class CodecOffload:
+    """单个连接的编解码，大帧放到线程池
+
+    loop_blocking 记录在事件循环中直接编解码的耗时，即事件循环被占用的时间；
+    offloaded 记录线程池中的耗时，这段时间事件循环可以处理其它连接。
+    关闭卸载时大帧的耗时计入 loop_blocking，可与开启后对比
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.threshold = int(config.get("threshold", DEFAULT_OFFLOAD_THRESHOLD))
+        self.workers = int(config.get("workers", DEFAULT_OFFLOAD_WORKERS))
+        self.loop_blocking = _Timing()
+        self.offloaded = _Timing()
+
+    def _should_offload(self, size: int) -> bool:
+        return self.enabled and size >= self.threshold
+
+    async def loads(self, data: str) -> Any:
+        """解析帧，非法 JSON 抛出 json.JSONDecodeError"""
+        if self._should_offload(len(data)):
+            return await self._run(json_codec.loads, data)
+        start = time.perf_counter()
+        try:
+            return json_codec.loads(data)
+        finally:
+            self.loop_blocking.add(time.perf_counter() - start)
+
+    async def dumps(self, obj: Any, size: int) -> str:
+        """序列化，size 为该对象来源帧的长度，用于判断是否卸载"""
+        if self._should_offload(size):
+            return await self._run(json_codec.dumps, obj)
+        start = time.perf_counter()
+        try:
+            return json_codec.dumps(obj)
+        finally:
+            self.loop_blocking.add(time.perf_counter() - start)
+
+    async def _run(self, func, arg):
+        result, elapsed = await asyncio.get_running_loop().run_in_executor(
+            _get_executor(self.workers), _timed, func, arg
+        )
+        # 统计在事件循环线程中更新，不与其它线程竞争
+        self.offloaded.add(elapsed)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "loop_blocking": self.loop_blocking.get_stats(),
+            "offloaded": self.offloaded.get_stats(),
+        }
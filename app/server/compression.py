@@ -0,0 +1,168 @@
+"""
+WebSocket 压缩策略
+按端点配置 permessage-deflate：关闭、始终压缩、或只压缩超过阈值的帧，并统计压缩率和耗时
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from websockets.extensions.permessage_deflate import (
+    ClientPerMessageDeflateFactory,
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+from websockets.frames import CTRL_OPCODES, Opcode
+
+
+COMPRESSION_OFF = "off"              # 不协商压缩
+COMPRESSION_ALWAYS = "always"        # 每帧都压缩（原行为）
+COMPRESSION_THRESHOLD = "threshold"  # 只压缩不小于 min_size 字节的帧
+COMPRESSION_MODES = (COMPRESSION_OFF, COMPRESSION_ALWAYS, COMPRESSION_THRESHOLD)
+
+DEFAULT_COMPRESSION_MODE = COMPRESSION_ALWAYS
+# 心跳和普通消息基本在 1KB 以内，压缩收益很小
+DEFAULT_MIN_SIZE = 1024
+
+# 与 websockets 默认参数保持一致
+_COMPRESS_SETTINGS = {"memLevel": 5}
+_SERVER_MAX_WINDOW_BITS = 12
+
+
+class CompressionStats:
+    """单个端点的压缩统计，重连后继续累计"""
+
+    def __init__(self, mode: str, min_size: int):
+        self.mode = mode
+        self.min_size = min_size
+        self.negotiated = 0
+        self.sent_frames = 0
+        self.compressed_frames = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.compress_time = 0.0
+        self.received_compressed_frames = 0
+        self.received_compressed_bytes = 0
+        self.received_raw_bytes = 0
+        self.decompress_time = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "min_size": self.min_size if self.mode == COMPRESSION_THRESHOLD else None,
+            "negotiated": self.negotiated,
+            "sent_frames": self.sent_frames,
+            "compressed_frames": self.compressed_frames,
+            "ratio": round(self.compressed_bytes / self.raw_bytes, 4) if self.raw_bytes else None,
+            "compress_ms": round(self.compress_time * 1000, 3),
+            "received_compressed_frames": self.received_compressed_frames,
+            "received_ratio": round(self.received_compressed_bytes / self.received_raw_bytes, 4) if self.received_raw_bytes else None,
+            "decompress_ms": round(self.decompress_time * 1000, 3),
+        }
+
+
+class MeteredPerMessageDeflate(PerMessageDeflate):
+    """带阈值和计时的 permessage-deflate
+
+    RFC 7692 允许逐条消息决定是否压缩（RSV1 位），小帧直接原样发送，对端照常解析。
+    """
+
+    def __init__(self, *args, stats: CompressionStats, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self._skip_cont = False
+
+    def encode(self, frame):
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+
+        stats = self.stats
+        if frame.opcode is not Opcode.CONT:
+            stats.sent_frames += 1
+            self._skip_cont = (stats.mode == COMPRESSION_THRESHOLD and frame.fin
+                               and len(frame.data) < stats.min_size)
+        if self._skip_cont:
+            return frame
+
+        start = time.perf_counter()
+        encoded = super().encode(frame)
+        stats.compress_time += time.perf_counter() - start
+        if frame.opcode is not Opcode.CONT:
+            stats.compressed_frames += 1
+        stats.raw_bytes += len(frame.data)
+        stats.compressed_bytes += len(encoded.data)
+        return encoded
+
+    def decode(self, frame, *args, **kwargs):
+        if not frame.rsv1 and not (frame.opcode is Opcode.CONT and self.decode_cont_data):
+            return super().decode(frame, *args, **kwargs)
+
+        start = time.perf_counter()
+        decoded = super().decode(frame, *args, **kwargs)
+        stats = self.stats
+        stats.decompress_time += time.perf_counter() - start
+        if frame.opcode is not Opcode.CONT:
+            stats.received_compressed_frames += 1
+        stats.received_compressed_bytes += len(frame.data)
+        stats.received_raw_bytes += len(decoded.data)
+        return decoded
+
+
+def _metered(extension: PerMessageDeflate, stats: CompressionStats, compress_settings) -> MeteredPerMessageDeflate:
+    stats.negotiated += 1
+    return MeteredPerMessageDeflate(
+        extension.remote_no_context_takeover,
+        extension.local_no_context_takeover,
+        extension.remote_max_window_bits,
+        extension.local_max_window_bits,
+        compress_settings,
+        stats=stats,
+    )
+
+
+class MeteredServerDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, stats: CompressionStats):
+        super().__init__(
+            server_max_window_bits=_SERVER_MAX_WINDOW_BITS,
+            client_max_window_bits=_SERVER_MAX_WINDOW_BITS,
+            compress_settings=_COMPRESS_SETTINGS,
+        )
+        self.stats = stats
+
+    def process_request_params(self, *args, **kwargs):
+        params, extension = super().process_request_params(*args, **kwargs)
+        return params, _metered(extension, self.stats, self.compress_settings)
+
+
+class MeteredClientDeflateFactory(ClientPerMessageDeflateFactory):
+    def __init__(self, stats: CompressionStats):
+        super().__init__(compress_settings=_COMPRESS_SETTINGS)
+        self.stats = stats
+
+    def process_response_params(self, *args, **kwargs):
+        extension = super().process_response_params(*args, **kwargs)
+        return _metered(extension, self.stats, self.compress_settings)
+
+
+def stats_from_config(config: Optional[Dict[str, Any]], default_mode: str = DEFAULT_COMPRESSION_MODE) -> CompressionStats:
+    """根据端点配置中的 compression 字段创建统计对象，策略随之确定"""
+    config = config or {}
+    mode = config.get("mode", default_mode)
+    if mode not in COMPRESSION_MODES:
+        mode = default_mode
+    return CompressionStats(mode, int(config.get("min_size", DEFAULT_MIN_SIZE)))
+
+
+def server_compression_kwargs(stats: CompressionStats) -> Dict[str, Any]:
+    """websockets.serve 的压缩参数"""
+    if stats.mode == COMPRESSION_OFF:
+        return {"compression": None}
+    extensions: List = [MeteredServerDeflateFactory(stats)]
+    return {"compression": None, "extensions": extensions}
+
+
+def client_compression_kwargs(stats: CompressionStats) -> Dict[str, Any]:
+    """websockets.connect 的压缩参数"""
+    if stats.mode == COMPRESSION_OFF:
+        return {"compression": None}
+    extensions: List = [MeteredClientDeflateFactory(stats)]
+    return {"compression": None, "extensions": extensions}
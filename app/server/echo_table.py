@@ -0,0 +1,151 @@
+"""
+echo 关联表
+代理为每个发往客户端的 API 请求分配自己的整数 echo，响应回来时一次查表即可找到来源 target
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+# 请求超过该时间仍未收到响应则视为过期
+DEFAULT_ECHO_TTL = 120
+# 表项硬上限，超出时淘汰最早的请求
+DEFAULT_ECHO_MAX_SIZE = 10000
+# 代理 echo 保持在 int32 范围内，兼容把 echo 当作整数解析的实现
+MAX_PROXY_ECHO = 2 ** 31 - 1
+
+# 原请求没有 echo 字段时的占位，响应转回 target 前会删掉 echo
+NO_ECHO = object()
+
+
+@dataclass(slots=True)
+class EchoEntry:
+    """单个待响应的 API 请求"""
+    proxy_echo: int
+    target_index: int
+    original_echo: Any
+    request: Dict[str, Any]
+    action: str = ""
+    created_at: float = field(default_factory=time.time)
+    deadline: float = 0.0
+
+
+class EchoTable:
+    """echo 关联表
+
+    不同 target 使用相同 echo 也不会冲突，因为发给客户端的是代理自己分配的 echo。
+    所有请求的 TTL 相同，截止时间天然按登记顺序递增，所以用 FIFO 队列充当截止时间堆：
+    每次登记/查询时从队头弹出已过期的项，每项最多被弹出一次，清理开销均摊为 O(1)。
+    """
+
+    def __init__(self, ttl: float = DEFAULT_ECHO_TTL, max_size: int = DEFAULT_ECHO_MAX_SIZE,
+                 on_expire: Optional[Callable[[EchoEntry], None]] = None,
+                 on_evict: Optional[Callable[[EchoEntry], None]] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.on_expire = on_expire  # 请求超时未响应时回调，用于统计
+        self.on_evict = on_evict  # 表满淘汰未响应的请求时回调，用于统计
+        self._entries: Dict[int, EchoEntry] = {}
+        self._deadlines: deque = deque()  # (deadline, entry)，按登记顺序
+        self._next_echo = 1
+
+        # 统计
+        self.registered = 0
+        self.matched = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def register(self, target_index: int, original_echo: Any, request: Dict[str, Any]) -> int:
+        """登记请求，返回代理分配的 echo"""
+        now = time.monotonic()
+        self._expire(now)
+
+        while len(self._entries) >= self.max_size and self._deadlines:
+            _, oldest = self._deadlines.popleft()
+            if self._entries.get(oldest.proxy_echo) is oldest:
+                del self._entries[oldest.proxy_echo]
+                self.evicted += 1
+                if self.on_evict is not None:
+                    self.on_evict(oldest)
+
+        proxy_echo = self._allocate()
+        entry = EchoEntry(
+            proxy_echo=proxy_echo,
+            target_index=target_index,
+            original_echo=original_echo,
+            request=request,
+            action=str(request.get("action", "")),
+            deadline=now + self.ttl,
+        )
+        self._entries[proxy_echo] = entry
+        self._deadlines.append((entry.deadline, entry))
+        self.registered += 1
+
+        # 已响应的项仍留在队列里直到过期，积压过多时压缩一次，保证内存有界
+        if len(self._deadlines) > 2 * self.max_size:
+            self._deadlines = deque(
+                (e.deadline, e) for e in sorted(self._entries.values(), key=lambda e: e.deadline)
+            )
+        return proxy_echo
+
+    def pop(self, echo: Any) -> Optional[EchoEntry]:
+        """按客户端响应中的 echo 取出请求，不是代理分配的 echo 返回 None"""
+        self._expire(time.monotonic())
+        key = self._normalize(echo)
+        if key is None:
+            return None
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.matched += 1
+        return entry
+
+    def get(self, echo: Any) -> Optional[EchoEntry]:
+        """查看请求但不取出"""
+        key = self._normalize(echo)
+        if key is None:
+            return None
+        return self._entries.get(key)
+
+    def _allocate(self) -> int:
+        while True:
+            proxy_echo = self._next_echo
+            self._next_echo = proxy_echo + 1 if proxy_echo < MAX_PROXY_ECHO else 1
+            if proxy_echo not in self._entries:
+                return proxy_echo
+
+    def _expire(self, now: float):
+        """从队头清理已过期的项"""
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, entry = self._deadlines.popleft()
+            if self._entries.get(entry.proxy_echo) is entry:
+                del self._entries[entry.proxy_echo]
+                self.expired += 1
+                if self.on_expire is not None:
+                    self.on_expire(entry)
+
+    @staticmethod
+    def _normalize(echo: Any) -> Optional[int]:
+        """部分实现会把整数 echo 转成字符串返回"""
+        if isinstance(echo, bool):
+            return None
+        if isinstance(echo, int):
+            return echo
+        if isinstance(echo, str) and echo.isdigit():
+            return int(echo)
+        return None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """关联表统计"""
+        return {
+            "pending": len(self._entries),
+            "max_size": self.max_size,
+            "registered": self.registered,
+            "matched": self.matched,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -8,6 +8,7 @@ from typing import Dict, Any, Tuple
 from enum import Enum
 
 from ..onebotv11.models import ApiRequest, Event, MessageEvent, MessageSegmentType, GroupMessageEvent, NoticeEvent
+from ..utils.payload_format import format_payload
 
 class FilterAction(Enum):
     """过滤动作"""
@@ -70,7 +71,7 @@ class FilterManager:
             return message_data
             
         except Exception as e:
-            self.logger.message.error(f"过滤发送消息失败: {e}，将拦截！{message_data}"[:1000])
+            self.logger.message.error(f"过滤发送消息失败: {e}，将拦截！{format_payload(message_data)}")
             return None
     
     @staticmethod
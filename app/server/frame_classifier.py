@@ -0,0 +1,48 @@
+"""
+客户端帧分类器
+只扫描原始 JSON 文本判断事件类别，决定是否可以走原样转发的快速通道
+"""
+
+import re
+from typing import Optional
+
+
+# 快速通道类别
+LANE_FULL = "full"       # 需要完整解析、过滤、别名处理
+LANE_META = "meta"       # 元事件（心跳、生命周期），无需解码直接原样转发
+LANE_NOTICE = "notice"   # 通知事件，解码后确认不受黑名单/群过滤影响即可原样转发
+
+# 只对小帧做扫描；心跳和通知通常只有几百字节，大帧基本都是消息或 API 响应
+PEEK_LIMIT = 4096
+
+_POST_TYPE_RE = re.compile(r'"post_type"\s*:\s*"([a-z_]+)"')
+_SELF_ID_RE = re.compile(r'"self_id"\s*:\s*"?(\d+)')
+
+
+def classify_frame(frame) -> str:
+    """根据 post_type 判断帧应走的通道，无法确定时一律走完整流程"""
+    if not isinstance(frame, str) or len(frame) > PEEK_LIMIT:
+        return LANE_FULL
+    # API 响应需要回到 echo 路由
+    if '"echo"' in frame:
+        return LANE_FULL
+
+    post_types = _POST_TYPE_RE.findall(frame)
+    # 出现多个 post_type 说明有嵌套结构，交给完整流程
+    if len(post_types) != 1:
+        return LANE_FULL
+
+    post_type = post_types[0]
+    if post_type == "meta_event":
+        return LANE_META
+    if post_type == "notice":
+        return LANE_NOTICE
+    return LANE_FULL
+
+
+def peek_self_id(frame: str) -> Optional[int]:
+    """不解码读取 self_id"""
+    match = _SELF_ID_RE.search(frame)
+    if match:
+        return int(match.group(1))
+    return None
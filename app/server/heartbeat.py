@@ -0,0 +1,144 @@
+"""
+目标心跳合成
+协议端每个账号每隔几秒发一次心跳，逐条转发给所有框架意义不大。
+配置为合成模式的目标不再收到协议端的心跳，改由代理按该目标的间隔用最近一次的客户端状态生成；
+客户端停止发送心跳后合成也随之停止，框架侧的存活检测仍然有效
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils import json_codec
+
+
+HEARTBEAT_FORWARD = "forward"        # 原样转发协议端的心跳（默认）
+HEARTBEAT_SYNTHESIZE = "synthesize"  # 屏蔽协议端心跳，按目标间隔合成
+HEARTBEAT_MODES = (HEARTBEAT_FORWARD, HEARTBEAT_SYNTHESIZE)
+
+# 合成心跳的默认间隔（秒）
+DEFAULT_HEARTBEAT_INTERVAL = 30
+# 超过客户端心跳间隔的多少倍未收到心跳，视为客户端已停止
+STALE_FACTOR = 3
+# 客户端心跳未带 interval 时按该间隔（秒）判断
+DEFAULT_CLIENT_INTERVAL = 30
+
+
+def is_heartbeat(event: Any) -> bool:
+    return isinstance(event, dict) and event.get("post_type") == "meta_event" \
+        and event.get("meta_event_type") == "heartbeat"
+
+
+class _SynthTarget:
+    __slots__ = ("list_index", "interval", "next_due", "synthesized", "suppressed", "skipped")
+
+    def __init__(self, list_index: int, interval: float):
+        self.list_index = list_index
+        self.interval = interval
+        self.next_due = time.monotonic() + interval
+        self.synthesized = 0
+        self.suppressed = 0  # 屏蔽的协议端心跳数
+        self.skipped = 0     # 客户端无心跳而跳过的次数
+
+
+class HeartbeatSynthesizer:
+    """单个连接的心跳合成"""
+
+    def __init__(self, send: Callable[[int, str], None]):
+        self._send = send
+        self.targets: Dict[int, _SynthTarget] = {}  # list_index -> 合成设置
+        self._last_status: Optional[Dict[str, Any]] = None
+        self._self_id: Any = None
+        self._client_interval = DEFAULT_CLIENT_INTERVAL
+        self._last_seen: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def configure_target(self, list_index: int, options: Optional[Dict[str, Any]]):
+        """按 target_options 中的 heartbeat 字段设置该目标"""
+        options = options or {}
+        if options.get("mode", HEARTBEAT_FORWARD) == HEARTBEAT_SYNTHESIZE:
+            self.targets[list_index] = _SynthTarget(
+                list_index, float(options.get("interval", DEFAULT_HEARTBEAT_INTERVAL))
+            )
+
+    def __bool__(self):
+        return bool(self.targets)
+
+    def observe(self, event: Dict[str, Any]):
+        """记录客户端心跳"""
+        self._last_seen = time.monotonic()
+        self._self_id = event.get("self_id", self._self_id)
+        status = event.get("status")
+        if isinstance(status, dict):
+            self._last_status = status
+        interval = event.get("interval")
+        if isinstance(interval, (int, float)) and interval > 0:
+            self._client_interval = interval / 1000
+
+    def forward_indexes(self, list_indexes: Optional[List[int]], count: int) -> List[int]:
+        """客户端心跳应转发的目标，合成模式的目标被排除"""
+        if list_indexes is None:
+            list_indexes = range(count)
+        result = []
+        for list_index in list_indexes:
+            target = self.targets.get(list_index)
+            if target is None:
+                result.append(list_index)
+            else:
+                target.suppressed += 1
+        return result
+
+    def client_alive(self, now: float) -> bool:
+        return self._last_seen is not None and now - self._last_seen <= self._client_interval * STALE_FACTOR
+
+    def start(self):
+        if self.targets and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            alive = self.client_alive(now)
+            for target in self.targets.values():
+                if target.next_due > now:
+                    continue
+                target.next_due = now + target.interval
+                if not alive:
+                    target.skipped += 1
+                    continue
+                self._send(target.list_index, json_codec.dumps(self._build(target)))
+                target.synthesized += 1
+            next_due = min(target.next_due for target in self.targets.values())
+            await asyncio.sleep(max(0.0, next_due - time.monotonic()))
+
+    def _build(self, target: _SynthTarget) -> Dict[str, Any]:
+        return {
+            "time": int(time.time()),
+            "self_id": self._self_id,
+            "post_type": "meta_event",
+            "meta_event_type": "heartbeat",
+            "status": self._last_status if self._last_status is not None else {"online": True, "good": True},
+            "interval": int(target.interval * 1000),
+        }
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def get_target_stats(self, list_index: int) -> Optional[Dict[str, Any]]:
+        target = self.targets.get(list_index)
+        if target is None:
+            return None
+        return {
+            "mode": HEARTBEAT_SYNTHESIZE,
+            "interval": target.interval,
+            "synthesized": target.synthesized,
+            "suppressed": target.suppressed,
+            "skipped": target.skipped,
+            "client_alive": self.client_alive(time.monotonic()),
+        }
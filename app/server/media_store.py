@@ -0,0 +1,73 @@
+"""
+echo 表项中的 base64 媒体内容
+echo 关联表只需要请求的元数据来生成 SEND 记录，登记前把 base64:// 内容换成 sha256 摘要和长度，
+内容本身直接丢弃，不在内存或磁盘中保留；表项和发送记录里只有引用，可按摘要判断是否为同一张图片
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+
+BASE64_PREFIX = "base64://"
+# 引用格式 base64://sha256:<摘要>:<长度>，base64 字符集里没有冒号，不会与真实内容混淆
+MEDIA_REF_PREFIX = "base64://sha256:"
+
+# 小于该长度的内容直接留在请求里
+DEFAULT_MIN_SIZE = 4096
+
+
+class MediaStore:
+    """把 base64 内容替换为摘要引用"""
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE):
+        self.min_size = min_size
+
+        # 统计
+        self.stripped = 0
+        self.stripped_bytes = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "MediaStore":
+        """根据连接配置中的 media_store 字段创建"""
+        config = config or {}
+        return cls(min_size=int(config.get("min_size", DEFAULT_MIN_SIZE)))
+
+    def reference(self, body: str) -> str:
+        """base64 内容（不含前缀）对应的引用"""
+        digest = hashlib.sha256(body.encode("ascii", "surrogateescape")).hexdigest()
+        self.stripped += 1
+        self.stripped_bytes += len(body)
+        return f"{MEDIA_REF_PREFIX}{digest}:{len(body)}"
+
+    def strip(self, obj: Any) -> Any:
+        """返回把 base64 内容替换为引用后的副本，没有需要替换的内容时返回原对象"""
+        if isinstance(obj, str):
+            if len(obj) >= self.min_size and obj.startswith(BASE64_PREFIX) and not obj.startswith(MEDIA_REF_PREFIX):
+                return self.reference(obj[len(BASE64_PREFIX):])
+            return obj
+        if isinstance(obj, dict):
+            result = None
+            for key, value in obj.items():
+                stripped = self.strip(value)
+                if stripped is not value:
+                    if result is None:
+                        result = dict(obj)
+                    result[key] = stripped
+            return obj if result is None else result
+        if isinstance(obj, list):
+            result = None
+            for i, value in enumerate(obj):
+                stripped = self.strip(value)
+                if stripped is not value:
+                    if result is None:
+                        result = list(obj)
+                    result[i] = stripped
+            return obj if result is None else result
+        return obj
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "min_size": self.min_size,
+            "stripped": self.stripped,
+            "stripped_bytes": self.stripped_bytes,
+        }
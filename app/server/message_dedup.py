@@ -0,0 +1,69 @@
+"""
+消息去重窗口
+客户端重连或被新连接接管后，部分协议端会重发最近的事件。
+按 (账号, message_id) 记住每个账号最近处理过的消息，重复的在过滤、指令和入库之前丢弃；
+进程内所有连接共享，接管后的新连接也能识别旧连接处理过的消息
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# 每个账号记住的最近消息数
+DEFAULT_DEDUP_WINDOW = 2000
+# 参与去重的事件类型，通知等事件没有唯一的 message_id
+DEDUP_POST_TYPES = ("message", "message_sent")
+
+
+class _AccountWindow:
+    """单个账号最近的 message_id，超出窗口时淘汰最久未出现的"""
+    __slots__ = ("ids", "checked", "hits")
+
+    def __init__(self):
+        self.ids: OrderedDict = OrderedDict()
+        self.checked = 0
+        self.hits = 0
+
+
+class MessageDedup:
+    """按账号的 message_id 去重"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.window = int(config.get("window", DEFAULT_DEDUP_WINDOW))
+        self._accounts: Dict[str, _AccountWindow] = {}
+
+    def is_duplicate(self, event: Dict[str, Any]) -> bool:
+        """记录事件，已处理过的消息返回 True"""
+        if not self.enabled or event.get("post_type") not in DEDUP_POST_TYPES:
+            return False
+        message_id = event.get("message_id")
+        self_id = event.get("self_id")
+        if message_id is None or message_id == "" or self_id is None:
+            return False
+
+        account = self._accounts.get(str(self_id))
+        if account is None:
+            account = self._accounts[str(self_id)] = _AccountWindow()
+        account.checked += 1
+        ids = account.ids
+        if message_id in ids:
+            ids.move_to_end(message_id)
+            account.hits += 1
+            return True
+        ids[message_id] = None
+        if len(ids) > self.window:
+            ids.popitem(last=False)
+        return False
+
+    def get_account_stats(self, self_id: Any) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        account = self._accounts.get(str(self_id)) if self_id is not None else None
+        return {
+            "window": self.window,
+            "size": len(account.ids) if account else 0,
+            "checked": account.checked if account else 0,
+            "hits": account.hits if account else 0,
+        }
@@ -10,6 +10,7 @@ from ..onebotv11 import EventParser, MessageNormalizer
 from ..onebotv11.models import ApiRequest, Event, MessageEvent, MessageSegmentType, PrivateMessageEvent, GroupMessageEvent, NoticeEvent
 from ..onebotv11.message_segment import MessageSegmentParser
 from .filter_manager import FilterManager
+from ..utils.payload_format import format_payload
 
 class MessageProcessor:
     """消息处理器"""
@@ -67,6 +68,25 @@ class MessageProcessor:
             self.logger.message.error(f"预处理客户端消息失败: {e}")
             return None, None
     
+    async def is_passthrough_notice(self, message_data: Dict[str, Any]) -> bool:
+        """判断通知事件能否原样转发：不受黑名单和群过滤影响时，无需解析事件和重新编码"""
+        if message_data.get("post_type") != "notice":
+            return False
+
+        user_id = message_data.get("user_id")
+        if user_id and self.config_manager.is_in_blacklist("users", str(user_id)) and not self.config_manager.is_superuser(str(user_id)):
+            return False
+
+        group_id = message_data.get("group_id")
+        if group_id:
+            group_config = await self.config_manager.get_group_config(str(group_id))
+            filters = (group_config or {}).get("filters", {})
+            if filters.get("superuser_filters") or filters.get("admin_filters"):
+                return False
+
+        self._log_message(message_data, "RECV", "PROCESSED")
+        return True
+
     async def postprocess_target_message(self, message_data: Dict[str, Any], self_id: str) -> Optional[Dict[str, Any]]:
         """后处理目标消息"""
         try:            
@@ -307,7 +327,7 @@ class MessageProcessor:
                             elif segment.get("type") == "at":
                                 text_parts.append(f"@{segment.get('data', {}).get('qq', '')}")
                             else:
-                                text_parts.append(str(segment)[:1000])
+                                text_parts.append(format_payload(segment, 100))
                         # 处理MessageSegment对象
                         elif segment.get("type") and segment.get("data"):
                             if segment.type == "text":
@@ -315,10 +335,10 @@ class MessageProcessor:
                             elif segment.type == "at":
                                 text_parts.append("@{}".format(segment.data.get('qq', '')))
                             else:
-                                text_parts.append(str(segment)[:1000])
+                                text_parts.append(format_payload(segment, 100))
                     content_summary = "".join(text_parts)[:100]
                 else:
-                    content_summary = str(message_data["message"])[:100]
+                    content_summary = format_payload(message_data["message"], 100)
             elif "raw_message" in message_data:
                 content_summary = message_data["raw_message"][:100]
             else:
@@ -437,5 +457,5 @@ class MessageProcessor:
             return await self._apply_aliases(message_data, aliases)
             
         except Exception as e:
-            self.logger.message.error(f"应用群组别名失败: {e}，{message_data}")
+            self.logger.message.error(f"应用群组别名失败: {e}，{format_payload(message_data)}")
             return message_data
@@ -4,26 +4,66 @@
 """
 
 import asyncio
+import inspect
+import logging
 import websockets
 import json
-from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..onebotv11.models import ApiResponse, Event
 from ..onebotv11.message_segment import MessageSegmentParser
 from ..commands import CommandHandler
 from .message_processor import MessageProcessor
+from .target_sender import TargetSender
+from .compression import COMPRESSION_OFF, DEFAULT_COMPRESSION_MODE, stats_from_config, client_compression_kwargs
+from .unix_socket import is_unix_endpoint, parse_unix_endpoint, unix_uri
+from .reconnect_scheduler import ReconnectScheduler
+from .message_dedup import MessageDedup
+from .subscription import Subscription
+from .api_cache import ApiCache, make_key
+from .single_flight import SingleFlight
+from .send_scheduler import SendScheduler, resolve_send_rate, QUEUE_FULL_RETCODE
+from .media_store import MediaStore
+from .codec_offload import CodecOffload
+from .catchup_buffer import CatchupBuffer
+from .api_metrics import ApiMetrics, ERROR_EVICTED, ERROR_TIMEOUT
+from .heartbeat import HeartbeatSynthesizer, is_heartbeat
+from .echo_table import EchoTable, NO_ECHO, DEFAULT_ECHO_TTL, DEFAULT_ECHO_MAX_SIZE
+from .frame_classifier import classify_frame, peek_self_id, LANE_FULL, LANE_META, LANE_NOTICE
 from ..utils.reboot import construct_reboot_message
+from ..utils import json_codec
+from ..utils.payload_format import format_payload, log_payload
 
 
-# 向 target 发送的单次超时：防止某个卡住/假死的 target 阻塞整条 client→targets 转发循环
-TARGET_SEND_TIMEOUT = 10
+# 客户端入站队列默认上限：读协程收帧入队，处理协程按序消费
+DEFAULT_INGRESS_QUEUE_SIZE = 5000
+# 入站队列积压告警的最小间隔
+INGRESS_WARN_INTERVAL = 10
+# 单次连接 target 的超时（TCP 连接 + 握手），可在 target_options 中按端点覆盖
+DEFAULT_CONNECT_TIMEOUT = 10
+
+
+def _detect_header_kwarg() -> Optional[str]:
+    """websockets 14 起新实现使用 additional_headers，旧实现使用 extra_headers"""
+    try:
+        params = inspect.signature(websockets.connect).parameters
+    except (TypeError, ValueError):
+        return None
+    for name in ("additional_headers", "extra_headers"):
+        if name in params:
+            return name
+    return None
+
+
+# 启动时确定一次，不再每次连接逐个尝试
+HEADER_KWARG = _detect_header_kwarg()
 
 
 class ProxyConnection:
     """单个代理连接"""
 
-    def __init__(self, connection_id, config, client_ws, config_manager, database_manager, logger, backup_manager=None, status_callback=None, api_response_callback=None):
+    def __init__(self, connection_id, config, client_ws, config_manager, database_manager, logger, backup_manager=None, status_callback=None, api_response_callback=None, reconnect_scheduler=None, message_dedup=None):
         self.connection_id = connection_id
         self.config = config
         self.client_ws = client_ws
@@ -33,23 +73,81 @@ class ProxyConnection:
         self.backup_manager = backup_manager
         self.status_callback = status_callback
         self.api_response_callback = api_response_callback
-
-        self.target_connections = []
-        self.echo_cache = {}
+        # 由 ProxyServer 传入进程内共享的调度器，单独使用时退化为本连接私有
+        self.reconnect_scheduler = reconnect_scheduler or ReconnectScheduler(logger)
+        # 同上，接管后的新连接沿用旧连接记住的 message_id
+        self.message_dedup = message_dedup or MessageDedup(config_manager.get_global_config().get("message_dedup"))
+
+        # 按 list_index 对齐，未连接的为 None
+        self.target_connections = [None] * len(self.config.get("target_endpoints", []))
+        # 按目标和 action 统计 API 延迟与错误码
+        self.api_metrics = ApiMetrics(config_manager.get_global_config().get("api_metrics"))
+        echo_config = config.get("echo_table", {}) or {}
+        self.echo_table = EchoTable(
+            ttl=echo_config.get("ttl", DEFAULT_ECHO_TTL),
+            max_size=int(echo_config.get("max_size", DEFAULT_ECHO_MAX_SIZE)),
+            on_expire=lambda entry: self._record_unanswered(entry, ERROR_TIMEOUT),
+            on_evict=lambda entry: self._record_unanswered(entry, ERROR_EVICTED),
+        )
+        # 只读 API 响应缓存，默认关闭
+        self.api_cache = ApiCache(config.get("api_cache"))
+        # 多个 target 同时发出相同的只读请求时只向客户端发一次
+        self.single_flight = SingleFlight(self.echo_table, config.get("single_flight", True))
+        # send_* 请求按账号/群限速和优先级发给客户端，账号确定后再应用账号配置
+        self.send_scheduler = SendScheduler(
+            connection_id, logger, lambda payload: self.client_ws.send(payload),
+            resolve_send_rate(config_manager.get_global_config(), None),
+        )
+        # echo 表项中的 base64 内容换成 sha256 引用，内容本身不保留
+        self.media_store = MediaStore.from_config(config.get("media_store"))
+        # 超过阈值的大帧在线程池中编解码，不阻塞其它连接
+        self.codec = CodecOffload(config_manager.get_global_config().get("codec_offload"))
         self.running = False
         self.client_headers = None
         self.first_message = None
+        self._capture_greeting = False
         self.self_id: int | None = None
 
         self.reconnect_locks = []  # 每个 target_index 一个 Lock
-        for _ in self.config.get("target_endpoints", []):
+        self.target_senders = []   # 每个 target_index 一个出站队列，按 list_index 对齐
+        self.target_compression = []  # 每个 target_index 的压缩策略与统计，重连后继续累计
+        self.target_subscriptions = []  # 每个 target_index 的订阅规则，未配置为 None
+        # 合成心跳的目标不转发协议端心跳，由代理按目标间隔生成
+        self.heartbeat = HeartbeatSynthesizer(lambda list_index, payload: self._broadcast(payload, [list_index], catch_up=False))
+        for idx, endpoint in enumerate(self.config.get("target_endpoints", [])):
+            target_options = self._get_target_options(endpoint)
             self.reconnect_locks.append(asyncio.Lock())
+            # 配置了 catchup 的目标断开期间暂存事件，重连后补发
+            self.target_senders.append(TargetSender.from_config(
+                connection_id, self.list_index2target_index(idx), logger, self.config,
+                catchup=CatchupBuffer.from_options(target_options.get("catchup")),
+            ))
+            # 本机 Unix 套接字目标未配置时不压缩
+            default_compression = COMPRESSION_OFF if is_unix_endpoint(endpoint) else DEFAULT_COMPRESSION_MODE
+            self.target_compression.append(stats_from_config(target_options.get("compression"), default_compression))
+            self.target_subscriptions.append(Subscription.from_options(target_options))
+            self.heartbeat.configure_target(idx, target_options.get("heartbeat"))
+        self._has_subscriptions = any(self.target_subscriptions)
+
+        # 客户端入站队列：读协程不等待处理，NapCat 突发大量消息时 socket 不会被卡住
+        ingress_config = self.config.get("ingress_queue", {}) or {}
+        self.ingress_max_size = int(ingress_config.get("max_size", DEFAULT_INGRESS_QUEUE_SIZE))
+        self._ingress_queue = asyncio.Queue(maxsize=self.ingress_max_size)
+        self.ingress_received = 0
+        self.ingress_processed = 0
+        self.ingress_high_water = 0
+        self._last_ingress_warn = 0.0
+
+        # 快速通道：无需改写的帧原样转发
+        self.passthrough_enabled = self.config.get("passthrough", True)
+        self.passthrough_frames = 0
+        self.passthrough_bytes = 0
 
         # 初始化消息处理器
         self.message_processor = MessageProcessor(config_manager, database_manager, logger)
 
         # 自身指令处理
-        self.command_handler = CommandHandler(config_manager, database_manager, logger, backup_manager)
+        self.command_handler = CommandHandler(config_manager, database_manager, logger, backup_manager, self.api_metrics)
 
     async def start_proxy(self):
         """启动代理"""
@@ -75,45 +173,41 @@ class ProxyConnection:
                 self.client_headers = {}
 
 
-            # 连接到目标端点
-            await self._connect_to_targets()
+            # 并发连接所有目标，每个目标连上后立即开始转发，不等待最慢的目标
+            tasks = [
+                asyncio.create_task(self._run_target(self.list_index2target_index(idx)))
+                for idx in range(len(self.target_connections))
+            ]
 
             # 处理第一个消息，其中yunzai需要这个lifecycle消息来注册
-            await self._process_client_message(self.first_message)
+            # 转发出去的帧会作为各目标的 greeting，之后（重）连上的目标也会最先收到它
+            self._capture_greeting = True
+            try:
+                await self._process_client_message(self.first_message)
+            finally:
+                self._capture_greeting = False
 
             await self.send_reboot_message()
-
-            # 启动消息转发任务
-            tasks = []
+            self.heartbeat.start()
 
             # 客户端到目标的转发任务
             tasks.append(asyncio.create_task(self._forward_client_to_targets()))
 
-            # 目标到客户端的转发任务
-            for idx, target_ws in enumerate(self.target_connections):
-                if target_ws:
-                    tasks.append(asyncio.create_task(
-                        self._forward_target_to_client(target_ws, self.list_index2target_index(idx))
-                    ))
-
-            if tasks:
-                # 等待任务，当任意任务结束时（如客户端断开）立即取消其他任务
-                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-
-                # 取消所有未完成的任务
-                for task in pending:
-                    task.cancel()
-
-                # 等待所有任务真正结束
-                if pending:
-                    await asyncio.wait(pending, timeout=3.0)
-
-                # 检查是否是客户端断开导致的
-                for task in done:
-                    if task.exception():
-                        self.logger.ws.info(f"[{self.connection_id}] 任务异常退出: {task.exception()}")
-            else:
-                self.logger.ws.warning(f"[{self.connection_id}] 没有转发任务，连接将关闭")
+            # 等待任务，当任意任务结束时（如客户端断开）立即取消其他任务
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            # 取消所有未完成的任务
+            for task in pending:
+                task.cancel()
+
+            # 等待所有任务真正结束
+            if pending:
+                await asyncio.wait(pending, timeout=3.0)
+
+            # 检查是否是客户端断开导致的
+            for task in done:
+                if task.exception():
+                    self.logger.ws.info(f"[{self.connection_id}] 任务异常退出: {task.exception()}")
 
         except Exception as e:
             self.logger.ws.error(f"[{self.connection_id}] 代理运行错误: {e}")
@@ -124,8 +218,9 @@ class ProxyConnection:
     async def _connect_to_target(self, endpoint: str, target_index: int):
          try:
 
-            if target_index > len(self.target_connections) + 1 or target_index == 0:
+            if target_index < 1 or target_index > len(self.target_connections):
                 raise Exception(f"[{self.connection_id}] 目标ID {target_index} 超出范围!")
+            list_idx = self.target_index2list_index(target_index)
 
             # 使用客户端请求头连接目标
             extra_headers = {}
@@ -135,83 +230,90 @@ class ProxyConnection:
                     if header_name in self.client_headers:
                         extra_headers[header_name] = self.client_headers[header_name]
 
-            # 尝试使用不同的参数名连接，同时配置连接参数
-            target_ws = None
             connection_params = {
                 'max_size': None,  # 移除消息大小限制
                 'max_queue': None,  # 移除队列大小限制
                 'ping_interval': 20,  # 心跳间隔：20s 发一次 ping
                 'ping_timeout': 20,   # 心跳超时：20s 收不到 pong 判定半死并关闭（最坏 ~40s 探测到死连接）
                 'close_timeout': None,   # 关闭超时
-                'compression': 'deflate'
+                'open_timeout': self._get_target_options(endpoint).get("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+                **client_compression_kwargs(self.target_compression[list_idx])
             }
+            if HEADER_KWARG:
+                connection_params[HEADER_KWARG] = extra_headers
+            # 否则无法附带请求头，无法连接Nonebot2
 
-            connection_attempts = [
-                # 尝试 extra_headers 参数
-                lambda: websockets.connect(endpoint, extra_headers=extra_headers, **connection_params),
-                # 尝试 additional_headers 参数
-                lambda: websockets.connect(endpoint, additional_headers=extra_headers, **connection_params),
-                # 不使用额外头部，无法连接Nonebot2
-                lambda: websockets.connect(endpoint, **connection_params)
-            ]
-
-            for attempt in connection_attempts:
-                try:
-                    target_ws = await attempt()
-                    break
-                except TypeError:
-                    # 参数不支持，尝试下一种方式
-                    continue
-                except Exception as e:
-                    # 其他错误，直接抛出
-                    raise e
-
-            if target_index == len(self.target_connections) + 1: # next one to append
-                self.target_connections.append(target_ws) # 保证index正确，即使是None也添加
+            if is_unix_endpoint(endpoint):
+                socket_path, request_path = parse_unix_endpoint(endpoint)
+                target_ws = await websockets.unix_connect(socket_path, uri=unix_uri(request_path), **connection_params)
             else:
-                self.target_connections[self.target_index2list_index(target_index)] = target_ws
-            if target_ws is None:
-                raise Exception(f"[{self.connection_id}] 所有连接方式都失败")
+                target_ws = await websockets.connect(endpoint, **connection_params)
+
+            self.target_connections[list_idx] = target_ws
+            self.target_senders[list_idx].attach(target_ws)
 
             self.logger.ws.info(f"[{self.connection_id}] 已连接到目标: {endpoint}")
             return target_ws
 
          except Exception as e:
-            if target_index == len(self.target_connections) + 1:
-                self.target_connections.append(None)
-            else:
+            if 1 <= target_index <= len(self.target_connections):
                 self.target_connections[self.target_index2list_index(target_index)] = None
+                self.target_senders[self.target_index2list_index(target_index)].attach(None)
+            if isinstance(e, asyncio.TimeoutError):
+                e = f"连接超时({self._get_target_options(endpoint).get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)}s)"
             self.logger.ws.error(f"[{self.connection_id}] 连接目标失败 {endpoint}: {e}")
             return None
 
-
-    async def _connect_to_targets(self):
-        """连接到目标端点"""
-        target_endpoints = self.config.get("target_endpoints", [])
-
-        # 先标记哪些目标需要启动重连（避免在循环中启动任务）
-        failed_targets = []
-        for idx, endpoint in enumerate(target_endpoints):
-            target_ws = await self._connect_to_target(endpoint, self.list_index2target_index(idx))
-            # 如果连接失败（返回 None），记录下来稍后启动重连
-            if target_ws is None:
-                failed_targets.append(self.list_index2target_index(idx))
-
-        # 在所有连接尝试完成后，启动失败目标的重连任务
-        for target_index in failed_targets:
+    async def _run_target(self, target_index: int):
+        """连接单个目标并转发，失败时转入后台重连；客户端断开前不会返回"""
+        target_ws = await self._connect_scheduled(target_index)
+        if target_ws is None:
             self.logger.ws.warning(f"[{self.connection_id}] 目标 {target_index} 初始连接失败，启动后台重连")
-            asyncio.create_task(self._start_reconnect_with_delay(target_index))
+            await self._start_reconnect_with_delay(target_index)
+            return
+        await self._forward_target_to_client(target_ws, target_index)
 
     async def _forward_client_to_targets(self):
-        """转发客户端消息到目标"""
+        """转发客户端消息到目标：本协程只负责收帧入队，由处理协程按序消费"""
+        worker = asyncio.create_task(self._ingress_worker())
         try:
             async for message in self.client_ws:
-                try:
-                    await self._process_client_message(message)
-                except websockets.exceptions.ConnectionClosed:
-                    continue
+                self.ingress_received += 1
+                if self._ingress_queue.full():
+                    now = time.monotonic()
+                    if now - self._last_ingress_warn >= INGRESS_WARN_INTERVAL:
+                        self._last_ingress_warn = now
+                        self.logger.ws.warning(f"[{self.connection_id}] 客户端入站队列已满({self.ingress_max_size})，暂停读取等待处理")
+                await self._ingress_queue.put(message)
+                self.ingress_high_water = max(self.ingress_high_water, self._ingress_queue.qsize())
         except Exception as e:
             self.logger.ws.error(f"[{self.connection_id}] 客户端消息转发错误: {e}")
+        finally:
+            # 客户端断开后尽量把已收到的消息处理完，再停止处理协程
+            if not worker.done():
+                try:
+                    await asyncio.wait_for(self._ingress_queue.join(), timeout=5)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    pass
+                worker.cancel()
+                try:
+                    await worker
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    async def _ingress_worker(self):
+        """入站处理协程：按接收顺序逐条处理客户端消息"""
+        while True:
+            message = await self._ingress_queue.get()
+            try:
+                await self._process_client_message(message)
+            except websockets.exceptions.ConnectionClosed:
+                pass
+            except Exception as e:
+                self.logger.ws.error(f"[{self.connection_id}] 处理入站消息失败: {e}")
+            finally:
+                self.ingress_processed += 1
+                self._ingress_queue.task_done()
 
     async def _forward_target_to_client(self, target_ws, target_index):
         """转发目标消息到客户端"""
@@ -219,11 +321,26 @@ class ProxyConnection:
             async for message in target_ws:
                 await self._process_target_message(message, target_index)
         except websockets.exceptions.ConnectionClosed:
-            await self._reconnect_target(target_index)
+            pass
         except TypeError:
             await self._reconnect_target(target_index) # 如果是None，也挂一个后台重连
+            return
         except Exception as e:
             self.logger.ws.error(f"[{self.connection_id}] 目标消息转发错误 {target_index}: {e}")
+            return
+        # 框架重启时以 1000/1001 正常关闭，async for 直接结束，同样需要重连，而不是结束整个代理连接
+        if self.running:
+            self.target_senders[self.target_index2list_index(target_index)].mark_closed()
+            self.reconnect_scheduler.notify_disconnect(self._get_target_endpoint(target_index))
+        await self._reconnect_target(target_index)
+
+    async def _connect_scheduled(self, target_index: int):
+        """经重连调度器连接目标，同一地址的连接共享退避和熔断状态"""
+        endpoint = self._get_target_endpoint(target_index)
+        async with self.reconnect_scheduler.attempt(endpoint) as attempt:
+            target_ws = await self._connect_to_target(endpoint, target_index)
+            attempt.ok = target_ws is not None
+        return target_ws
 
     async def _start_reconnect_with_delay(self, target_index: int):
         """延迟启动重连任务，等待客户端完全初始化"""
@@ -231,75 +348,88 @@ class ProxyConnection:
         await self._reconnect_target(target_index)
 
     async def _reconnect_target(self, target_index: int):
-        self.logger.ws.info(f"[{self.connection_id}] 目标连接 {target_index} 已关闭。将在120秒内持续尝试重新连接。")
+        self.logger.ws.info(f"[{self.connection_id}] 目标连接 {target_index} 已关闭，将持续尝试重新连接。")
 
         lock = self.reconnect_locks[self.target_index2list_index(target_index)]
         if not lock.locked():
             async with lock:
-                for _ in range(40):
+                # 退避、熔断和恢复后的放行节奏都由重连调度器按目标地址统一安排
+                while self.running:
                     # 检查客户端连接是否还活着 - 使用 state 属性
                     client_state = getattr(self.client_ws, 'state', None)
-                    if not self.running or client_state != 1:  # 1 = OPEN 状态
-                        self.logger.ws.info(f"[{self.connection_id}] 客户端已断开 (running={self.running}, state={client_state})，停止重连目标 {target_index}")
-                        return
+                    if client_state != 1:  # 1 = OPEN 状态
+                        break
 
-                    await asyncio.sleep(3)
                     try:
-                        target_ws = await self._connect_to_target(self.config.get("target_endpoints", [])[self.target_index2list_index(target_index)], target_index)
+                        target_ws = await self._connect_scheduled(target_index)
                         if target_ws is None:
                             continue
-                        await self._process_client_message(self.first_message) # 比如yunzai需要使用first Message重新注册
+                        # 比如yunzai需要使用first Message重新注册，已由发送队列的 greeting 最先发出
                         self.logger.ws.info(f"[{self.connection_id}] 目标连接 {target_index} 恢复成功，5秒后重新开始转发。")
                         await asyncio.sleep(5)
                         await self._forward_target_to_client(target_ws, target_index)
+                    except asyncio.CancelledError:
+                        raise
                     except Exception as e:
                         self.logger.ws.warning(f"[{self.connection_id}] 尝试重连目标 {target_index} 失败: {e}")
 
-                # 长期重连:间隔 4s 起每次 +1s,封顶 300s
-                delay = 4
-                while self.running:
-                    # 检查客户端状态
-                    client_state = getattr(self.client_ws, 'state', None)
-                    if client_state != 1:  # 1 = OPEN 状态
-                        break
-
-                    await asyncio.sleep(delay)
-                    delay = min(delay + 1, 300)
-                    try:
-                        target_ws = await self._connect_to_target(self.config.get("target_endpoints", [])[self.target_index2list_index(target_index)], target_index)
-                        if target_ws:
-                            await self._process_client_message(self.first_message)
-                            self.logger.ws.info(f"[{self.connection_id}] 目标连接 {target_index} 恢复成功，5秒后重新开始转发。")
-                            delay = 4  # 恢复后退避归位
-                            await asyncio.sleep(5)
-                            await self._forward_target_to_client(target_ws, target_index)
-                    except Exception:
-                        pass
-
                 self.logger.ws.info(f"[{self.connection_id}] 客户端已断开，终止目标 {target_index} 的重连循环")
 
     async def _process_client_message(self, message: str):
         """处理客户端消息"""
         try:
+            # 快速通道：心跳、生命周期以及不受过滤影响的通知原样转发，省去解析和重新编码
+            lane = classify_frame(message) if self.passthrough_enabled else LANE_FULL
+            if lane == LANE_META:
+                self._update_self_id(peek_self_id(message))
+                # 有目标合成心跳时需要解码心跳，记录客户端状态
+                event = json_codec.loads(message) if self.heartbeat and '"heartbeat"' in message else None
+                # 心跳和生命周期事件过时后没有意义，不补发
+                self._broadcast_passthrough(message, event, catch_up=False)
+                return
+
             # 解析JSON消息
-            message_data = json.loads(message)
-            if message_data.get("self_id"): # 每次更新，客户端可能会换账号
-                if self.self_id and self.self_id != message_data["self_id"]:
-                    # 但是，不论是通过头注册还是yunzai的方式都不能支持账号的热切换
-                    self.logger.ws.warning("[{}] 客户端账号已切换到 {}，请重启该连接！".format(self.connection_id, message_data['self_id']))
-                self.self_id = message_data["self_id"]
-                # 通过回调更新状态中的self_id
-                if self.status_callback:
-                    self.status_callback('self_id', self.self_id)
+            message_data = await self.codec.loads(message)
+            # 成员/好友变动通知使相关的 API 缓存失效
+            self.api_cache.on_event(message_data)
+            if lane == LANE_NOTICE and await self.message_processor.is_passthrough_notice(message_data):
+                self._update_self_id(message_data.get("self_id"))
+                self._broadcast_passthrough(message, message_data)
+                return
+
+            self._update_self_id(message_data.get("self_id"))
+
+            # 重连后协议端重发的消息已处理过，不再过滤、入库和转发
+            if self.message_dedup.is_duplicate(message_data):
+                self.logger.ws.debug(f"[{self.connection_id}] 丢弃重复消息 {message_data.get('message_id')}")
+                return
 
             # 检查是否是API响应（有echo字段）
-            if message_data.get("echo"):
+            is_api_response = message_data.get("echo") is not None
+            echo_entry = None
+            if is_api_response:
                 echo_val = str(message_data["echo"])
                 # 调用API响应回调（用于处理待处理的API请求，如在线状态检查）
                 if self.api_response_callback:
                     if self.api_response_callback(echo_val, message_data):
                         return
 
+                # 代理分配的 echo 换回 target 原本的 echo
+                echo_entry = self.echo_table.pop(message_data["echo"])
+                waiters = self.single_flight.finish(echo_entry.proxy_echo) if echo_entry is not None else []
+                if echo_entry is not None:
+                    self.api_metrics.record(echo_entry.target_index, echo_entry.action, echo_entry.created_at, message_data)
+                    # 被合并的请求也各计一次，耗时从各自发出时算起
+                    for target_index, _, joined_at in waiters:
+                        self.api_metrics.record(target_index, echo_entry.action, joined_at, message_data)
+                    if echo_entry.original_echo is NO_ECHO:
+                        message_data.pop("echo", None)
+                    else:
+                        message_data["echo"] = echo_entry.original_echo
+                    # 合并的请求已计为收到响应，在预处理和指令处理之前应答，避免响应被拦截后它们收不到回复
+                    if waiters:
+                        self._answer_waiters(waiters, message_data)
+
             # 消息预处理
             message_data = await self.command_handler.preprocesser(message_data)
             processed_message, parsed_event = await self._preprocess_message(message_data)
@@ -311,12 +441,12 @@ class ProxyConnection:
                     if isinstance(data_in_api, dict): # get list api 不可能是发送
                         message_id = message_data.get("data", {}).get("message_id")
                         await self.database_manager.save_message(
-                            await self._construct_msg_from_echo(message_data["echo"], message_id=message_id), "SEND", self.connection_id
+                            await self._construct_msg_from_echo(echo_entry, message_id=message_id), "SEND", self.connection_id
                         )
                 else:
                     # 记录消息到数据库，注意记录的是处理后的消息，所以统计功能是无视别名的，只需要按key搜索即可
                     # 收到裸消息不会是api response
-                    self._log_api_call_fail(parsed_event)
+                    self._log_api_call_fail(parsed_event, echo_entry)
                     await self.database_manager.save_message(
                         processed_message, "RECV", self.connection_id
                     )
@@ -327,90 +457,136 @@ class ProxyConnection:
                     processed_message = None # 自身返回时，阻止事件传递给框架 Preprocesser不受影响
                     await self._process_target_message(resp_api, 0) # 自身的index为0，其实并不是连接
 
-                # 转发到所有目标
-                processed_json = json.dumps(processed_message, ensure_ascii=False)
-
-                if message_data.get("echo"):
-                    # api请求内容，尽可能保证各框架的发送api都使用了echo。
-                    # 尝试从各个 target_index 的缓存中查找
-                    echo_val = str(message_data["echo"])
-                    matched_target_index = None
-                    for idx in range(1, len(self.target_connections) + 1):
-                        echo_key = f"{idx}_{echo_val}"
-                        if echo_key in self.echo_cache:
-                            matched_target_index = self.echo_cache.pop(echo_key, {}).get("target_index")
-                            break
-
+                if is_api_response:
+                    if echo_entry is not None:
+                        self._store_api_cache(echo_entry, processed_message)
+                    # api响应只发回发起请求的 target，自身(index 0)发起的请求不转发
+                    matched_target_index = echo_entry.target_index if echo_entry else None
                     if matched_target_index is not None and matched_target_index > 0 and self.target_connections[self.target_index2list_index(matched_target_index)]:
-                        self.logger.ws.debug(f"[{self.connection_id}] 发送API请求到目标 {matched_target_index}: {processed_json[:1000]}")
-                        try:
-                            await asyncio.wait_for(
-                                self.target_connections[self.target_index2list_index(matched_target_index)].send(processed_json),
-                                timeout=TARGET_SEND_TIMEOUT,
-                            )
-                        except websockets.exceptions.ConnectionClosed:
-                            return
-                        except asyncio.TimeoutError:
-                            self.logger.ws.warning(f"[{self.connection_id}] API请求发送到目标 {matched_target_index} 超时({TARGET_SEND_TIMEOUT}s)，目标可能假死，丢弃")
-                            return
-                        except Exception as e:
-                            self.logger.ws.error(f"[{self.connection_id}] 发送到目标失败: {e}")
-                            raise
+                        processed_json = await self.codec.dumps(processed_message, len(message))
+                        log_payload(self.logger.ws, logging.DEBUG, f"[{self.connection_id}] 发送API请求到目标 {matched_target_index}: ", processed_json)
+                        self.target_senders[self.target_index2list_index(matched_target_index)].enqueue(processed_json)
                 else:
-                    for target_index, target_ws in enumerate(self.target_connections):
-                        if target_ws:
-                            try:
-                                await asyncio.wait_for(target_ws.send(processed_json), timeout=TARGET_SEND_TIMEOUT)
-                            except websockets.exceptions.ConnectionClosed:
-                                continue # 发送时不再捕捉
-                            except asyncio.TimeoutError:
-                                # 避免单个卡死 target 阻塞其它 target（队头阻塞）。取消 send 后该连接
-                                # 多半已坏，由接收侧 ConnectionClosed 触发重连（不保证即时，期间消息丢弃）。
-                                self.logger.ws.warning(f"[{self.connection_id}] 广播到目标 {self.list_index2target_index(target_index)} 超时({TARGET_SEND_TIMEOUT}s)，跳过，目标可能假死")
-                                continue
-                            except Exception as e:
-                                self.logger.ws.error(f"[{self.connection_id}] 发送到目标失败: {e}")
-                                raise
+                    # 转发到订阅了该事件的目标，没有目标订阅时不序列化
+                    list_indexes = self._event_targets(processed_message)
+                    if list_indexes is None or list_indexes:
+                        self._broadcast(
+                            await self.codec.dumps(processed_message, len(message)), list_indexes,
+                            catch_up=processed_message.get("post_type") != "meta_event",
+                        )
 
         except json.JSONDecodeError:
-            self.logger.ws.warning(f"[{self.connection_id}] 收到非JSON消息: {message[:1000]}")
+            self.logger.ws.warning(f"[{self.connection_id}] 收到非JSON消息: {format_payload(message)}")
         except websockets.exceptions.ConnectionClosed:
             raise
         except Exception as e:
             self.logger.ws.error(f"[{self.connection_id}] 处理客户端消息失败: {e}")
 
+    def _update_self_id(self, self_id):
+        """每次更新，客户端可能会换账号"""
+        if not self_id:
+            return
+        if self.self_id and self.self_id != self_id:
+            # 但是，不论是通过头注册还是yunzai的方式都不能支持账号的热切换
+            self.logger.ws.warning("[{}] 客户端账号已切换到 {}，请重启该连接！".format(self.connection_id, self_id))
+        if self.self_id != self_id:
+            self.self_id = self_id
+            self.send_scheduler.configure(resolve_send_rate(
+                self.config_manager.get_global_config(),
+                self.config_manager.get_all_account_configs().get(str(self_id)),
+            ))
+            # 通过回调更新状态中的self_id
+            if self.status_callback:
+                self.status_callback('self_id', self.self_id)
+
+    def _subscribers(self, event) -> Optional[List[int]]:
+        """订阅了该事件的目标 list_index，所有目标都未配置订阅规则时返回 None（全部）"""
+        if not self._has_subscriptions or not isinstance(event, dict):
+            return None
+        return [
+            list_index for list_index, subscription in enumerate(self.target_subscriptions)
+            if subscription is None or subscription.match(event)
+        ]
+
+    def _event_targets(self, event) -> Optional[List[int]]:
+        """事件应发往的目标：按订阅过滤，心跳再排除合成心跳的目标"""
+        list_indexes = self._subscribers(event)
+        if self.heartbeat and is_heartbeat(event):
+            self.heartbeat.observe(event)
+            list_indexes = self.heartbeat.forward_indexes(list_indexes, len(self.target_senders))
+        return list_indexes
+
+    def _broadcast(self, payload: str, list_indexes: Optional[List[int]] = None, catch_up: bool = True):
+        """广播到目标：只入队，由各 target 的写协程并发发送，单个慢 target 不会阻塞其它 target
+
+        catch_up 表示目标不可用时可暂存到补发缓冲（目标配置了 catchup 时）
+        """
+        if list_indexes is None:
+            list_indexes = range(len(self.target_senders))
+        if self._capture_greeting:
+            # greeting 每次连上都会最先发出，不需要补发
+            catch_up = False
+        connections = self.target_connections
+        for list_index in list_indexes:
+            if self._capture_greeting:
+                # 第一条消息转发出的帧，之后连上的目标会最先收到
+                self.target_senders[list_index].greeting = payload
+            # 停止后 target_connections 会被清空；尚未连上的目标仍可暂存可补发的事件
+            if (list_index < len(connections) and connections[list_index]) or (catch_up and self.running):
+                self.target_senders[list_index].enqueue(payload, catch_up)
+
+    def _broadcast_passthrough(self, frame: str, event: Optional[Dict[str, Any]] = None, catch_up: bool = True):
+        """原样广播客户端帧，event 为已解码的通知或心跳，用于判断订阅"""
+        self.passthrough_frames += 1
+        self.passthrough_bytes += len(frame)
+        self._broadcast(frame, self._event_targets(event), catch_up)
+
     async def _process_target_message(self, message: str | dict, target_index: int):
         """处理目标消息"""
         try:
             # 解析JSON消息
             if isinstance(message, str):
-                message_data = json.loads(message)
+                message_data = await self.codec.loads(message)
             else:
                 message_data = message
 
-            self.logger.ws.debug(f"[{self.connection_id}] 来自连接 {target_index} 的API响应: {str(message_data)[:1000]}")
-
-            if not self._construct_echo_info(message_data, target_index):
-                # 兼容不使用echo回报的框架，不清楚有没有
-                message_data_as_recv = await self._construct_data_as_msg(message_data)
-                await self.database_manager.save_message(
-                    message_data_as_recv, "SEND", self.connection_id
-                )
+            log_payload(self.logger.ws, logging.DEBUG, f"[{self.connection_id}] 来自连接 {target_index} 的API响应: ", message_data)
 
             # 消息后处理
             processed_message = await self._postprocess_message(message_data, str(self.self_id))
 
             if processed_message:
-                # 发送到客户端
-                processed_json = json.dumps(processed_message, ensure_ascii=False)
-                await self.client_ws.send(processed_json)
+                # 只读接口命中缓存时直接应答该 target，不再发给客户端
+                if target_index > 0 and self._answer_from_cache(processed_message, target_index):
+                    return
+
+                # 相同的只读请求正在进行时等待它的响应
+                flight_key = self._single_flight_key(processed_message, target_index)
+                if flight_key is not None and self.single_flight.join(
+                    flight_key, target_index, processed_message.get("echo", NO_ECHO)
+                ):
+                    self.logger.ws.debug(f"[{self.connection_id}] 目标 {target_index} 的 {processed_message.get('action')} 与进行中的请求合并")
+                    return
+
+                # 登记到 echo 关联表，并把 echo 改写为代理分配的 echo
+                proxy_echo = self._construct_echo_info(processed_message, target_index)
+                if flight_key is not None and proxy_echo is not None:
+                    self.single_flight.start(flight_key, proxy_echo)
+
+                # 发送到客户端，开启限速时 send_* 请求交给发送调度器排队
+                processed_json = await self.codec.dumps(processed_message, len(message) if isinstance(message, str) else 0)
+                if self.send_scheduler.enabled and str(processed_message.get("action", "")).startswith("send_"):
+                    if not self.send_scheduler.submit(processed_json, processed_message, target_index):
+                        self._reject_request(proxy_echo, target_index, QUEUE_FULL_RETCODE, "send queue full")
+                else:
+                    await self.client_ws.send(processed_json)
 
         except json.JSONDecodeError:
-            self.logger.ws.warning(f"[{self.connection_id}] 目标 {target_index} 发送非JSON消息: {message[:1000]}")
+            self.logger.ws.warning(f"[{self.connection_id}] 目标 {target_index} 发送非JSON消息: {format_payload(message)}")
         except websockets.exceptions.ConnectionClosed:
             raise
         except Exception as e:
-            self.logger.ws.error(f"[{self.connection_id}] 处理目标消息 {message} 失败: {e}")
+            self.logger.ws.error(f"[{self.connection_id}] 处理目标消息 {format_payload(message)} 失败: {e}")
 
     async def _preprocess_message(self, message_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Event]]:
         """消息预处理"""
@@ -425,35 +601,89 @@ class ProxyConnection:
         if api_resp:
             await self._process_target_message(api_resp, 0)
 
-    def _construct_echo_info(self, message_data, target_index) -> str | None:
-        echo = str(message_data.get("echo"))
-        if not echo:
+    def _construct_echo_info(self, message_data, target_index) -> int | None:
+        """登记 API 请求并改写 echo，不使用 echo 的框架同样登记，响应回来时再去掉 echo"""
+        if "action" not in message_data:
             return None
 
-        # 将 target_index 加入键值，防止不同连接的 echo 混淆
-        echo_key = f"{target_index}_{echo}"
-
-        echo_info = {
-            "data": message_data,
-            "create_timestamp": int(datetime.now().timestamp()),
-            "target_index": target_index,
-            "original_echo": echo
-        }
-
-        if echo_key in self.echo_cache:
-            self.logger.ws.warning(f"[{self.connection_id}] echo {echo_key} 已存在，将被覆盖")
-        self.echo_cache[echo_key] = echo_info
-        self.logger.ws.debug(f"[{self.connection_id}] 收到echo {echo_key}，缓存大小 {len(self.echo_cache)}")
-
-        # 当缓存首次达到100个的时候。该函数阻塞。如网络正常不应该有这么多cache。
-        if len(self.echo_cache) % 100 == 0:
-            self.logger.ws.warning(f"[{self.connection_id}] echo 缓存达到 {len(self.echo_cache)} 个，强制清理过期的echo!")
-            now_ts = int(datetime.now().timestamp())
-            old_keys = [k for k, v in self.echo_cache.items() if now_ts - v.get("create_timestamp", 0) > 120]
-            for k in old_keys:
-                del self.echo_cache[k]
-
-        return echo
+        original_echo = message_data.get("echo", NO_ECHO)
+        if original_echo is None:
+            original_echo = NO_ECHO
+        # 表项只用于生成 SEND 记录和日志，不需要图片等 base64 内容
+        proxy_echo = self.echo_table.register(target_index, original_echo, self.media_store.strip(message_data))
+        message_data["echo"] = proxy_echo
+        self.logger.ws.debug(f"[{self.connection_id}] 目标 {target_index} 的echo {original_echo if original_echo is not NO_ECHO else None} -> {proxy_echo}，缓存大小 {len(self.echo_table)}")
+        return proxy_echo
+
+    def _reject_request(self, proxy_echo: Optional[int], target_index: int, retcode: int, message: str):
+        """请求未发给客户端就被丢弃时，取消 echo 登记并直接回复失败，不让框架等到超时"""
+        echo_entry = self.echo_table.pop(proxy_echo) if proxy_echo is not None else None
+        if echo_entry is None:
+            return
+        response = {"status": "failed", "retcode": retcode, "data": None, "message": message, "wording": message}
+        self.api_metrics.record(target_index, echo_entry.action, echo_entry.created_at, response)
+        if target_index <= 0:
+            return
+        if echo_entry.original_echo is not NO_ECHO:
+            response["echo"] = echo_entry.original_echo
+        self.target_senders[self.target_index2list_index(target_index)].enqueue(json_codec.dumps(response))
+
+    def _answer_from_cache(self, message_data: Dict[str, Any], target_index: int) -> bool:
+        """用缓存应答只读 API 请求，返回是否已应答"""
+        action = message_data.get("action")
+        if not self.api_cache.cacheable(action):
+            return False
+        params = message_data.get("params") or {}
+        if params.get("no_cache"):
+            return False
+        key = make_key(self.self_id, action, params)
+        if key is None:
+            return False
+        data = self.api_cache.get(key)
+        if data is None:
+            return False
+
+        response = {"status": "ok", "retcode": 0, "data": data, "message": "", "wording": ""}
+        if message_data.get("echo") is not None:
+            response["echo"] = message_data["echo"]
+        self.logger.ws.debug(f"[{self.connection_id}] 目标 {target_index} 的 {action} 命中缓存")
+        self.target_senders[self.target_index2list_index(target_index)].enqueue(json_codec.dumps(response))
+        return True
+
+    def _single_flight_key(self, message_data: Dict[str, Any], target_index: int):
+        """可合并的只读请求返回请求键，否则返回 None"""
+        if target_index <= 0 or not self.single_flight.coalescable(message_data.get("action")):
+            return None
+        return make_key(self.self_id, message_data["action"], message_data.get("params"))
+
+    def _answer_waiters(self, waiters, response: Dict[str, Any]):
+        """把合并请求的响应换成各自的 echo 发给等待的 target"""
+        for target_index, original_echo, _ in waiters:
+            list_index = self.target_index2list_index(target_index)
+            if not self.target_connections[list_index]:
+                continue
+            reply = dict(response)
+            if original_echo is NO_ECHO or original_echo is None:
+                reply.pop("echo", None)
+            else:
+                reply["echo"] = original_echo
+            self.target_senders[list_index].enqueue(json_codec.dumps(reply))
+
+    def _record_unanswered(self, echo_entry, error: str):
+        """请求超时或被淘汰，不会再收到响应，发起者和等待它的合并请求都记为错误"""
+        self.api_metrics.record_timeout(echo_entry.target_index, echo_entry.action, error)
+        for target_index, _, _ in self.single_flight.finish(echo_entry.proxy_echo):
+            self.api_metrics.record_timeout(target_index, echo_entry.action, error)
+
+    def _store_api_cache(self, echo_entry, response: Optional[Dict[str, Any]]):
+        """缓存只读 API 的成功响应"""
+        if not response or not self.api_cache.cacheable(echo_entry.action):
+            return
+        if response.get("status") != "ok" or response.get("retcode") != 0 or response.get("data") is None:
+            return
+        key = make_key(self.self_id, echo_entry.action, echo_entry.request.get("params"))
+        if key is not None:
+            self.api_cache.put(key, response["data"])
 
     @staticmethod
     def _check_api_call_succ(event: Event):
@@ -461,46 +691,26 @@ class ProxyConnection:
             return event.status == "ok" and event.retcode == 0
         return False
 
-    def _log_api_call_fail(self, event: Event):
+    def _log_api_call_fail(self, event: Event, echo_entry=None):
         if isinstance(event, ApiResponse):
             if event.status != "ok" or event.retcode != 0:
-                # echo 现在包含 target_index 前缀，需要查找匹配的键
-                echo_val = str(event.echo)
-                echo_info = None
-                for idx in range(1, len(self.target_connections) + 1):
-                    echo_key = f"{idx}_{echo_val}"
-                    if echo_key in self.echo_cache:
-                        echo_info = self.echo_cache.get(echo_key, None)
-                        break
-
-                if echo_info:
+                if echo_entry:
                     # 截断过长的数据（如base64）避免日志爆炸
-                    data_str = str(echo_info['data'])
-                    if len(data_str) > 200:
-                        data_str = data_str[:200] + f"...[total length: {len(data_str)}]"
+                    data_str = format_payload(echo_entry.request, 200)
                     self.logger.ws.warning("[{}] API调用失败: {} -> {}".format(self.connection_id, data_str, event))
 
-    async def _construct_msg_from_echo(self, echo, **kwargs):
+    async def _construct_msg_from_echo(self, echo_entry, **kwargs):
         """从api结果中构造模拟收到消息"""
-        # echo 现在包含 target_index 前缀，需要查找匹配的键
-        echo_val = str(echo)
-        echo_info = None
-        for idx in range(1, len(self.target_connections) + 1):
-            echo_key = f"{idx}_{echo_val}"
-            if echo_key in self.echo_cache:
-                echo_info = self.echo_cache.get(echo_key, None)
-                break
-
-        if echo_info:
-            return await self._construct_data_as_msg(echo_info["data"], **kwargs)
+        if echo_entry:
+            return await self._construct_data_as_msg(echo_entry.request, **kwargs)
         return {}
 
     async def _construct_data_as_msg(self, message_data, **kwargs):
         """将发送api请求转换为消息事件"""
 
-        if 'send' not in message_data.get('action'):
+        if 'send' not in (message_data.get('action') or ''):
             return {}
-        params = message_data.get("params", {})
+        params = dict(message_data.get("params", {}))
         params.update({"self_id": self.self_id})
         if "sender" not in params:
             params.update({"sender": {"user_id": self.self_id, "nickname": "BS Bot Send"}})
@@ -512,6 +722,16 @@ class ProxyConnection:
         params.update(kwargs)
         return params
 
+    def _get_target_endpoint(self, target_index: int) -> str:
+        return self.config.get("target_endpoints", [])[self.target_index2list_index(target_index)]
+
+    def _get_target_options(self, endpoint: str) -> Dict[str, Any]:
+        """target_options 中该端点的选项，"*" 为所有端点的默认值"""
+        target_options = self.config.get("target_options", {}) or {}
+        options = dict(target_options.get("*", {}) or {})
+        options.update(target_options.get(endpoint, {}) or {})
+        return options
+
     @staticmethod
     def target_index2list_index(target_index):
         return target_index - 1
@@ -520,6 +740,22 @@ class ProxyConnection:
     def list_index2target_index(list_index):
         return list_index + 1
 
+    async def drain(self, timeout: float):
+        """平滑重启时调用：处理完已收到的消息、等发给客户端的请求得到响应、发给目标的帧发送完，
+        再以 1012 (Service Restart) 关闭客户端连接，客户端会立即重连到新进程"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and (
+            self._ingress_queue.qsize() or len(self.echo_table) or len(self.send_scheduler)
+        ):
+            await asyncio.sleep(0.05)
+        for sender in self.target_senders:
+            await sender.flush(deadline - time.monotonic())
+        self.logger.ws.info(f"[{self.connection_id}] 平滑重启：在途消息已处理，关闭客户端连接")
+        try:
+            await self.client_ws.close(1012, "Service Restart")
+        except Exception as e:
+            self.logger.ws.warning(f"[{self.connection_id}] 关闭客户端连接出错: {e}")
+
     async def stop(self):
         """停止代理连接"""
         self.running = False
@@ -544,8 +780,85 @@ class ProxyConnection:
             except Exception as e:
                 self.logger.ws.error(f"[{self.connection_id}] 关闭连接时出错: {e}")
 
+        await self.heartbeat.close()
         self.target_connections.clear()
 
+        for sender in self.target_senders:
+            await sender.close()
+        await self.send_scheduler.close()
+
+    def get_target_queue_stats(self) -> Dict[int, Dict[str, Any]]:
+        """各 target 发送队列统计，键为 target_index"""
+        return {sender.target_index: sender.get_stats() for sender in self.target_senders}
+
+    def get_compression_stats(self) -> Dict[int, Dict[str, Any]]:
+        """各 target 连接的压缩统计，键为 target_index"""
+        return {
+            self.list_index2target_index(idx): stats.get_stats()
+            for idx, stats in enumerate(self.target_compression)
+        }
+
+    def get_target_statuses(self) -> Dict[int, Dict[str, Any]]:
+        """各 target 的健康状态，键为 target_index"""
+        return {
+            sender.target_index: {
+                "endpoint": endpoint,
+                **sender.health.get_stats(),
+                "subscription": subscription.get_stats() if subscription else None,
+                "heartbeat": self.heartbeat.get_target_stats(self.target_index2list_index(sender.target_index)),
+            }
+            for sender, endpoint, subscription in zip(
+                self.target_senders, self.config.get("target_endpoints", []), self.target_subscriptions
+            )
+        }
+
+    def get_reconnect_stats(self) -> Dict[int, Dict[str, Any]]:
+        """各 target 地址在重连调度器中的状态，键为 target_index，从未断开过的不返回"""
+        stats = {}
+        for idx, endpoint in enumerate(self.config.get("target_endpoints", [])):
+            endpoint_stats = self.reconnect_scheduler.get_stats(endpoint)
+            if endpoint_stats is not None:
+                stats[self.list_index2target_index(idx)] = endpoint_stats
+        return stats
+
+    def get_ingress_stats(self) -> Dict[str, Any]:
+        """客户端入站队列统计"""
+        return {
+            "queued": self._ingress_queue.qsize(),
+            "high_water": self.ingress_high_water,
+            "max_size": self.ingress_max_size,
+            "received": self.ingress_received,
+            "processed": self.ingress_processed,
+            "passthrough": self.passthrough_frames,
+            "passthrough_bytes": self.passthrough_bytes,
+        }
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """入站与各 target 出站队列统计"""
+        return {
+            "ingress": self.get_ingress_stats(),
+            "targets": self.get_target_queue_stats(),
+            "echo": self.echo_table.get_stats(),
+            "outbound": self.send_scheduler.get_stats(),
+            "media": self.media_store.get_stats(),
+        }
+
+    def get_api_cache_stats(self) -> Dict[str, Any]:
+        """只读 API 缓存与请求合并统计"""
+        return {**self.api_cache.get_stats(), "single_flight": self.single_flight.get_stats()}
+
+    def get_codec_stats(self) -> Dict[str, Any]:
+        """编解码耗时与大帧卸载统计"""
+        return self.codec.get_stats()
+
+    def get_api_metrics(self) -> Dict[str, Any]:
+        """最近一段时间各目标各 action 的 API 延迟直方图与错误码"""
+        return self.api_metrics.get_stats()
+
+    def get_dedup_stats(self) -> Optional[Dict[str, Any]]:
+        """当前账号的消息去重统计"""
+        return self.message_dedup.get_account_stats(self.self_id)
+
     async def _close_websocket(self, ws):
         """安全关闭WebSocket连接"""
         try:
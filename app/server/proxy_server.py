@@ -4,22 +4,40 @@ WebSocket代理服务器
 """
 
 import asyncio
+import socket
+import sys
 import websockets
-import json
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional
+from http import HTTPStatus
+from typing import Dict, Any, List, Optional
 
 from .proxy_connection import ProxyConnection
+from .compression import COMPRESSION_OFF, DEFAULT_COMPRESSION_MODE, stats_from_config, server_compression_kwargs
+from .reconnect_scheduler import ReconnectScheduler
+from .message_dedup import MessageDedup
+from .client_router import ClientRouter, ListenKey, SELF_ID_HEADER, parse_client_endpoint
+from .unix_socket import prepare_socket_path, remove_socket_path
+from ..utils import handover, json_codec
+
+# 平滑重启时等待各连接处理完在途消息的时间（秒）
+HANDOVER_DRAIN_TIMEOUT = 10
+# 在线状态检查等待 get_status 响应的时间（秒）
+CHECK_ONLINE_TIMEOUT = 5.0
+
 
 class ProxyServer:
     """WebSocket代理服务器"""
 
-    def __init__(self, config_manager, database_manager, logger, backup_manager=None):
+    def __init__(self, config_manager, database_manager, logger, backup_manager=None, connection_ids=None):
         self.config_manager = config_manager
         self.database_manager = database_manager
         self.logger = logger
         self.backup_manager = backup_manager
 
+        # 多进程模式下本进程负责的连接，None 表示全部
+        self.connection_ids = set(connection_ids) if connection_ids is not None else None
+
         # 连接管理
         self.active_connections = {}  # connection_id -> ProxyConnection
         self.connection_locks = {}     # connection_id -> asyncio.Lock (防止竞态条件)
@@ -28,6 +46,19 @@ class ProxyServer:
         # 连接状态跟踪
         self.connection_statuses = {}  # connection_id -> status info
         self.connection_tasks = {}     # connection_id -> asyncio.Task (跟踪每个连接的服务器任务)
+        self.client_compression = {}   # connection_id -> CompressionStats (客户端端点压缩统计)
+        self.listener_keys = {}        # connection_id -> (host, port)，独占监听的连接
+        self.routers: Dict[ListenKey, ClientRouter] = {}  # 多个连接共用的监听
+        self.listeners: Dict[ListenKey, list] = {}  # 正在监听的 websockets 服务
+
+        # 平滑重启：从旧进程接收的监听套接字，以及本进程是否已把监听交给新进程
+        self.inherited_sockets: Dict[ListenKey, List[socket.socket]] = {}
+        self.handed_over = False
+
+        # 所有连接共享的目标重连调度器，按目标地址统一退避和熔断
+        self.reconnect_scheduler = ReconnectScheduler(logger, config_manager.get_global_config().get("reconnect"))
+        # 按账号的消息去重窗口，客户端重连、接管后重发的消息只处理一次
+        self.message_dedup = MessageDedup(config_manager.get_global_config().get("message_dedup"))
 
         # API响应等待（用于在线状态检查等）
         self.pending_api_requests = {}  # echo -> asyncio.Future
@@ -36,9 +67,17 @@ class ProxyServer:
         """启动代理服务器"""
         self.running = True
         self.logger.ws.info("启动WebSocket代理服务器...")
+        self.inherited_sockets = handover.take_sockets("proxy")
+        if self.inherited_sockets:
+            self.logger.ws.info(f"平滑重启：接管 {len(self.inherited_sockets)} 个监听地址")
 
         # 获取连接配置
         connections_config = self.config_manager.get_connections_config()
+        if self.connection_ids is not None:
+            connections_config = {
+                connection_id: config for connection_id, config in connections_config.items()
+                if connection_id in self.connection_ids
+            }
 
         # 初始化所有连接的状态
         for connection_id, config in connections_config.items():
@@ -61,14 +100,35 @@ class ProxyServer:
                     'self_id': None
                 }
 
-        # 为每个连接配置启动代理
-        tasks = []
+        # 按监听地址分组，同一 host:port 上的多个连接共用一个监听
+        groups: Dict[Any, Dict[str, Dict[str, Any]]] = {}
         for connection_id, config in connections_config.items():
             if config.get("enabled", False):
+                try:
+                    host, port, _ = parse_client_endpoint(config.get("client_endpoint", ""))
+                    key = (host, port)
+                except ValueError:
+                    key = connection_id  # 端点格式错误，由单独启动时报告
+                groups.setdefault(key, {})[connection_id] = config
+
+        # 为每个连接配置启动代理
+        tasks = []
+        for key, members in groups.items():
+            if len(members) > 1:
+                router = ClientRouter(*key)
+                for connection_id, config in members.items():
+                    router.add_route(connection_id, config)
+                self.routers[key] = router
+                router.task = asyncio.create_task(self._start_router(router))
+                tasks.append(router.task)
+                continue
+            for connection_id, config in members.items():
                 task = asyncio.create_task(
                     self._start_connection_proxy(connection_id, config)
                 )
                 self.connection_tasks[connection_id] = task
+                if isinstance(key, tuple):
+                    self.listener_keys[connection_id] = key
                 tasks.append(task)
 
         if tasks:
@@ -137,25 +197,15 @@ class ProxyServer:
         try:
             # 解析客户端监听地址
             client_endpoint = config["client_endpoint"]
-            # 提取主机和端口
-            if client_endpoint.startswith("ws://"):
-                url_part = client_endpoint[5:]  # 移除 "ws://"
-                if "/" in url_part:
-                    host_port, path = url_part.split("/", 1)
-                else:
-                    host_port = url_part
-                    path = ""
+            host, port, _ = parse_client_endpoint(client_endpoint)
 
-                if ":" in host_port:
-                    host, port = host_port.split(":", 1)
-                    port = int(port)
-                else:
-                    host = host_port
-                    port = 80
-            else:
-                raise ValueError(f"不支持的客户端端点格式: {client_endpoint}")
+            address = f"unix:{host}" if port is None else f"{host}:{port}"
+            self.logger.ws.info(f"启动连接代理 {connection_id}: {address}")
 
-            self.logger.ws.info(f"启动连接代理 {connection_id}: {host}:{port}")
+            # 客户端端点的压缩策略
+            client_options = config.get("client_options", {}) or {}
+            compression_stats = stats_from_config(client_options.get("compression"), self._default_compression(port))
+            self.client_compression[connection_id] = compression_stats
 
             # 更新状态为正在启动
             if connection_id in self.connection_statuses:
@@ -164,89 +214,12 @@ class ProxyServer:
 
             # 创建处理器函数
             async def connection_handler(ws):
-                # 记录 WebSocket 连接详细信息
-                ws_info = {
-                    "remote_address": getattr(ws, 'remote_address', None),
-                    "path": getattr(ws, 'path', '/'),
-                    "host": getattr(ws, 'host', None),
-                    "port": getattr(ws, 'port', None),
-                    "id": id(ws),  # Python 对象 ID
-                }
-                self.logger.ws.info(f"[{connection_id}] 收到新的WebSocket连接: {ws_info}")
-
-                # 更新状态为已连接
-                if connection_id in self.connection_statuses:
-                    self.connection_statuses[connection_id]['client_status'] = 'connected'
-                    self.connection_statuses[connection_id]['client_address'] = str(ws_info.get('remote_address', 'unknown'))
-
-                # 获取或创建该 connection_id 的锁（防止竞态条件）
-                if connection_id not in self.connection_locks:
-                    self.connection_locks[connection_id] = asyncio.Lock()
-
-                # 锁只覆盖"接管决策 + 注册新连接"；start_proxy 必须在释放锁后再跑，
-                # 否则锁被整条连接生命周期占用，旧连接半死时新连接拿不到锁、无法接管。
-                proxy_connection = None
-                async with self.connection_locks[connection_id]:
-                    if connection_id in self.active_connections:
-                        old_conn = self.active_connections[connection_id]
-                        old_ws = old_conn.client_ws
-
-                        # 半死的 TCP 连接 state 仍是 OPEN，不能只看 state；主动 ping 探活。
-                        # 两段 await 都加超时：ping() 的发送本身也可能因写背压阻塞。
-                        old_state = getattr(old_ws, 'state', None) if old_ws else None
-                        old_really_alive = False
-                        if old_ws and old_state == 1:  # 1 = OPEN
-                            try:
-                                pong_waiter = await asyncio.wait_for(old_ws.ping(), timeout=5)
-                                await asyncio.wait_for(pong_waiter, timeout=5)
-                                old_really_alive = True
-                            except Exception as e:
-                                self.logger.ws.warning(
-                                    f"[{connection_id}] 旧连接探活失败({e})，判定为假死，由新连接接管"
-                                )
-
-                        if old_really_alive:
-                            # 旧连接确认还活着，拒绝新连接（防止频繁重连）
-                            old_ip = getattr(old_ws, 'remote_address', 'unknown')
-                            new_ip = getattr(ws, 'remote_address', 'unknown')
-                            self.logger.ws.warning(
-                                f"[{connection_id}] 已存在活跃连接 (旧:{old_ip} vs 新:{new_ip})，拒绝新连接"
-                            )
-                            # close_timeout=None，给关闭加超时，避免异常客户端拖住该 id 的锁
-                            try:
-                                await asyncio.wait_for(ws.close(1008, "Connection already exists"), timeout=5)
-                            except Exception as e:
-                                self.logger.ws.warning(f"[{connection_id}] 关闭被拒绝的新连接出错: {e}")
-                            return
-                        else:
-                            # 旧连接已断开或探活失败(假死)，停止它，让新连接接管
-                            self.logger.ws.info(f"[{connection_id}] 清理旧连接（已断开或探活失败），新连接接管")
-                            try:
-                                await old_conn.stop()
-                            except Exception as e:
-                                self.logger.ws.warning(f"[{connection_id}] 停止旧连接出错: {e}")
-
-                    # 锁内原子注册：同一 connection_id 同时只有一个登记；
-                    # 旧 task 的 finally 有身份校验，不会误删此处登记的新连接。
-                    proxy_connection = ProxyConnection(
-                        connection_id=connection_id,
-                        config=config,
-                        client_ws=ws,
-                        config_manager=self.config_manager,
-                        database_manager=self.database_manager,
-                        logger=self.logger,
-                        backup_manager=self.backup_manager,
-                        status_callback=lambda key, value: self._update_connection_status(connection_id, key, value),
-                        api_response_callback=self._handle_api_response
-                    )
-                    self.active_connections[connection_id] = proxy_connection
-
-                # 锁已释放：在锁外运行代理（长生命周期），让后续新连接仍能抢锁接管
-                return await self._run_proxy_connection(proxy_connection, ws, connection_id)
+                return await self._handle_client(connection_id, config, ws)
 
             # 启动WebSocket服务器，移除大小和队列限制
+            listening = False
             try:
-                async with websockets.serve(
+                async with self._serve(
                     connection_handler,
                     host,
                     port,
@@ -255,8 +228,9 @@ class ProxyServer:
                     ping_interval=20,  # 心跳间隔：20s 主动 ping 一次客户端(NapCat)
                     ping_timeout=20,   # 心跳超时：20s 收不到 pong 即判定半死并关闭(最坏 ~40s 探测到假死连接)
                     close_timeout=None,   # 关闭超时
-                    compression='deflate'  # 启用压缩
+                    **server_compression_kwargs(compression_stats)  # 按配置启用压缩
                 ):
+                    listening = True
                     self.logger.ws.info(f"连接代理 {connection_id} 已启动在 {client_endpoint}")
                     # 更新状态为监听中
                     if connection_id in self.connection_statuses:
@@ -267,9 +241,9 @@ class ProxyServer:
                         await asyncio.sleep(1)
             except OSError as e:
                 # 处理端口被占用的情况，不抛出异常，只记录状态
-                error_msg = f"端口 {port} 已被占用"
+                error_msg = f"端口 {port} 已被占用" if port is not None else f"套接字 {host} 已被占用"
                 if "Address already in use" in str(e) or e.errno == 98 or e.errno == 10048:
-                    self.logger.ws.warning(f"连接代理 {connection_id} 端口 {port} 已被占用，跳过启动")
+                    self.logger.ws.warning(f"连接代理 {connection_id} {error_msg}，跳过启动")
                     if connection_id in self.connection_statuses:
                         self.connection_statuses[connection_id]['client_status'] = 'error'
                         self.connection_statuses[connection_id]['error'] = error_msg
@@ -279,6 +253,9 @@ class ProxyServer:
                     if connection_id in self.connection_statuses:
                         self.connection_statuses[connection_id]['client_status'] = 'error'
                         self.connection_statuses[connection_id]['error'] = error_msg
+            finally:
+                if listening and port is None and not self.handed_over:
+                    remove_socket_path(host)
 
         except Exception as e:
             error_msg = str(e)
@@ -287,6 +264,280 @@ class ProxyServer:
                 self.connection_statuses[connection_id]['client_status'] = 'error'
                 self.connection_statuses[connection_id]['error'] = error_msg
     
+    async def _start_router(self, router: ClientRouter):
+        """启动多个连接共用的监听，按路径或 X-Self-Id 分发"""
+        # 共用监听只能有一种压缩设置，取第一个连接的客户端端点配置，统计为该端口合计
+        first_config = router.routes[sorted(router.routes)[0]]
+        compression_stats = stats_from_config(
+            (first_config.get("client_options", {}) or {}).get("compression"), self._default_compression(router.port)
+        )
+        for connection_id in router.routes:
+            self.client_compression[connection_id] = compression_stats
+            self._set_route_status(connection_id, 'starting', None)
+
+        self.logger.ws.info(f"启动共享端口 {router.address}，连接: {', '.join(sorted(router.routes))}")
+
+        def process_request(connection, request):
+            # 握手阶段找不到对应配置时直接返回 404
+            if self._route(router, request) is None:
+                router.rejected += 1
+                self.logger.ws.warning(
+                    f"共享端口 {router.address} 无法分发连接: 路径 {request.path}，"
+                    f"{SELF_ID_HEADER}: {request.headers.get(SELF_ID_HEADER)}"
+                )
+                return connection.respond(HTTPStatus.NOT_FOUND, "No matching connection config\n")
+            return None
+
+        async def router_handler(ws):
+            connection_id = self._route(router, ws.request)
+            if connection_id is None:
+                # 握手后路由表已变化
+                await ws.close(1008, "No matching connection config")
+                return
+            router.routed += 1
+            return await self._handle_client(connection_id, router.routes[connection_id], ws)
+
+        try:
+            async with self._serve(
+                router_handler,
+                router.host,
+                router.port,
+                process_request=process_request,
+                max_size=None,
+                max_queue=None,
+                ping_interval=20,
+                ping_timeout=20,
+                close_timeout=None,
+                **server_compression_kwargs(compression_stats)
+            ):
+                router.listening = True
+                self.logger.ws.info(f"共享端口 {router.address} 已启动")
+                for connection_id in router.routes:
+                    self._set_route_status(connection_id, 'listening', None)
+
+                while self.running:
+                    await asyncio.sleep(1)
+        except OSError as e:
+            if "Address already in use" in str(e) or e.errno == 98 or e.errno == 10048:
+                error_msg = f"端口 {router.port} 已被占用" if router.port is not None else f"套接字 {router.host} 已被占用"
+            else:
+                error_msg = str(e)
+            self.logger.ws.error(f"共享端口 {router.address} 启动失败: {error_msg}")
+            for connection_id in router.routes:
+                self._set_route_status(connection_id, 'error', error_msg)
+        finally:
+            if router.listening and router.port is None and not self.handed_over:
+                remove_socket_path(router.host)
+            router.listening = False
+
+    @staticmethod
+    def _default_compression(port: Optional[int]) -> str:
+        # 本机 Unix 套接字压缩只会增加开销，未配置时不压缩
+        return COMPRESSION_OFF if port is None else DEFAULT_COMPRESSION_MODE
+
+    @asynccontextmanager
+    async def _serve(self, handler, host: str, port: Optional[int], **kwargs):
+        """TCP 监听，port 为 None 时 host 为 Unix 套接字路径；有旧进程交接来的套接字时直接使用"""
+        key = (host, port)
+        if port is None and sys.version_info >= (3, 13):
+            # 套接字文件由本类删除，交接后旧进程不能删掉新进程正在使用的文件
+            kwargs["cleanup_socket"] = False
+        inherited = self.inherited_sockets.pop(key, None)
+        async with AsyncExitStack() as stack:
+            if inherited:
+                serve = websockets.unix_serve if port is None else websockets.serve
+                servers = [await stack.enter_async_context(serve(handler, sock=sock, **kwargs)) for sock in inherited]
+            elif port is None:
+                prepare_socket_path(host)
+                servers = [await stack.enter_async_context(websockets.unix_serve(handler, host, **kwargs))]
+            else:
+                servers = [await stack.enter_async_context(websockets.serve(handler, host, port, **kwargs))]
+            self.listeners[key] = servers
+            try:
+                yield servers
+            finally:
+                if self.listeners.get(key) is servers:
+                    del self.listeners[key]
+
+    def listen_sockets(self) -> Dict[ListenKey, list]:
+        """所有监听套接字，平滑重启时交给新进程"""
+        return {
+            key: [sock for server in servers for sock in server.sockets]
+            for key, servers in self.listeners.items()
+        }
+
+    def release_inherited_sockets(self):
+        """关闭交接来但没有对应连接配置（已停用或删除）的套接字"""
+        for sockets in self.inherited_sockets.values():
+            for sock in sockets:
+                sock.close()
+        self.inherited_sockets.clear()
+
+    async def drain_for_handover(self, timeout: float = HANDOVER_DRAIN_TIMEOUT):
+        """监听已交给新进程：停止接受新连接，各连接处理完在途消息后关闭客户端连接，客户端随即重连到新进程"""
+        self.handed_over = True
+        for servers in self.listeners.values():
+            for server in servers:
+                server.close(close_connections=False)
+        connections = list(self.active_connections.values())
+        await asyncio.gather(*(connection.drain(timeout) for connection in connections), return_exceptions=True)
+
+    def _set_route_status(self, connection_id: str, client_status: str, error: Optional[str]):
+        # 已连接的连接不受监听状态影响
+        status = self.connection_statuses.get(connection_id)
+        if status is not None and status.get('client_status') != 'connected':
+            status['client_status'] = client_status
+            status['error'] = error
+
+    def _route(self, router: ClientRouter, request) -> Optional[str]:
+        """按请求路径和 X-Self-Id 找到连接配置"""
+        known_self_ids = {
+            connection_id: status.get('self_id')
+            for connection_id, status in self.connection_statuses.items()
+        }
+        for connection_id, connection in self.active_connections.items():
+            if connection.self_id:
+                known_self_ids[connection_id] = connection.self_id
+        return router.resolve(request.path, request.headers.get(SELF_ID_HEADER), known_self_ids)
+
+    def _router_of(self, connection_id: str) -> Optional[ClientRouter]:
+        for router in self.routers.values():
+            if connection_id in router.routes:
+                return router
+        return None
+
+    async def _launch_connection(self, connection_id: str, config: Dict[str, Any]):
+        """启动连接：监听地址已被共享端口或其它连接占用时加入路由，否则单独监听"""
+        try:
+            host, port, _ = parse_client_endpoint(config.get("client_endpoint", ""))
+            key = (host, port)
+        except ValueError:
+            key = None
+
+        router = self.routers.get(key) if key else None
+        if router is None and key:
+            other_id = next((
+                other for other, other_key in self.listener_keys.items()
+                if other_key == key and other != connection_id
+                and other in self.connection_tasks and not self.connection_tasks[other].done()
+            ), None)
+            other_config = self.config_manager.get_connection_config(other_id) if other_id else None
+            if other_config is not None:
+                # 该端口已被另一个连接独占，改为共享监听，该连接的客户端需要重连一次
+                self.logger.ws.info(f"[{connection_id}] 与 [{other_id}] 使用同一端口，改为共享端口监听")
+                other_task = self.connection_tasks.pop(other_id)
+                self.listener_keys.pop(other_id, None)
+                other_task.cancel()
+                try:
+                    await other_task
+                except (asyncio.CancelledError, Exception):
+                    pass
+                router = ClientRouter(*key)
+                router.add_route(other_id, other_config)
+                router.add_route(connection_id, config)
+                self.routers[key] = router
+                router.task = asyncio.create_task(self._start_router(router))
+                return
+
+        if router is not None:
+            router.add_route(connection_id, config)
+            self.client_compression[connection_id] = self.client_compression.get(sorted(router.routes)[0])
+            if router.listening:
+                self._set_route_status(connection_id, 'listening', None)
+            self.logger.ws.info(f"[{connection_id}] 加入共享端口 {router.address}")
+            return
+
+        task = asyncio.create_task(
+            self._start_connection_proxy(connection_id, config)
+        )
+        self.connection_tasks[connection_id] = task
+        if key:
+            self.listener_keys[connection_id] = key
+
+    async def _handle_client(self, connection_id: str, config: Dict[str, Any], ws):
+        """处理分配给某个连接配置的客户端连接，包括旧连接探活和接管"""
+        # 记录 WebSocket 连接详细信息
+        ws_info = {
+            "remote_address": getattr(ws, 'remote_address', None),
+            "path": getattr(ws, 'path', '/'),
+            "host": getattr(ws, 'host', None),
+            "port": getattr(ws, 'port', None),
+            "id": id(ws),  # Python 对象 ID
+        }
+        self.logger.ws.info(f"[{connection_id}] 收到新的WebSocket连接: {ws_info}")
+
+        # 更新状态为已连接
+        if connection_id in self.connection_statuses:
+            self.connection_statuses[connection_id]['client_status'] = 'connected'
+            self.connection_statuses[connection_id]['client_address'] = str(ws_info.get('remote_address', 'unknown'))
+
+        # 获取或创建该 connection_id 的锁（防止竞态条件）
+        if connection_id not in self.connection_locks:
+            self.connection_locks[connection_id] = asyncio.Lock()
+
+        # 锁只覆盖"接管决策 + 注册新连接"；start_proxy 必须在释放锁后再跑，
+        # 否则锁被整条连接生命周期占用，旧连接半死时新连接拿不到锁、无法接管。
+        proxy_connection = None
+        async with self.connection_locks[connection_id]:
+            if connection_id in self.active_connections:
+                old_conn = self.active_connections[connection_id]
+                old_ws = old_conn.client_ws
+
+                # 半死的 TCP 连接 state 仍是 OPEN，不能只看 state；主动 ping 探活。
+                # 两段 await 都加超时：ping() 的发送本身也可能因写背压阻塞。
+                old_state = getattr(old_ws, 'state', None) if old_ws else None
+                old_really_alive = False
+                if old_ws and old_state == 1:  # 1 = OPEN
+                    try:
+                        pong_waiter = await asyncio.wait_for(old_ws.ping(), timeout=5)
+                        await asyncio.wait_for(pong_waiter, timeout=5)
+                        old_really_alive = True
+                    except Exception as e:
+                        self.logger.ws.warning(
+                            f"[{connection_id}] 旧连接探活失败({e})，判定为假死，由新连接接管"
+                        )
+
+                if old_really_alive:
+                    # 旧连接确认还活着，拒绝新连接（防止频繁重连）
+                    old_ip = getattr(old_ws, 'remote_address', 'unknown')
+                    new_ip = getattr(ws, 'remote_address', 'unknown')
+                    self.logger.ws.warning(
+                        f"[{connection_id}] 已存在活跃连接 (旧:{old_ip} vs 新:{new_ip})，拒绝新连接"
+                    )
+                    # close_timeout=None，给关闭加超时，避免异常客户端拖住该 id 的锁
+                    try:
+                        await asyncio.wait_for(ws.close(1008, "Connection already exists"), timeout=5)
+                    except Exception as e:
+                        self.logger.ws.warning(f"[{connection_id}] 关闭被拒绝的新连接出错: {e}")
+                    return
+                else:
+                    # 旧连接已断开或探活失败(假死)，停止它，让新连接接管
+                    self.logger.ws.info(f"[{connection_id}] 清理旧连接（已断开或探活失败），新连接接管")
+                    try:
+                        await old_conn.stop()
+                    except Exception as e:
+                        self.logger.ws.warning(f"[{connection_id}] 停止旧连接出错: {e}")
+
+            # 锁内原子注册：同一 connection_id 同时只有一个登记；
+            # 旧 task 的 finally 有身份校验，不会误删此处登记的新连接。
+            proxy_connection = ProxyConnection(
+                connection_id=connection_id,
+                config=config,
+                client_ws=ws,
+                config_manager=self.config_manager,
+                database_manager=self.database_manager,
+                logger=self.logger,
+                backup_manager=self.backup_manager,
+                status_callback=lambda key, value: self._update_connection_status(connection_id, key, value),
+                api_response_callback=self._handle_api_response,
+                reconnect_scheduler=self.reconnect_scheduler,
+                message_dedup=self.message_dedup
+            )
+            self.active_connections[connection_id] = proxy_connection
+
+        # 锁已释放：在锁外运行代理（长生命周期），让后续新连接仍能抢锁接管
+        return await self._run_proxy_connection(proxy_connection, ws, connection_id)
+
     def _update_connection_status(self, connection_id: str, key: str, value: Any):
         """更新连接状态的某个字段"""
         if connection_id in self.connection_statuses:
@@ -302,7 +553,7 @@ class ProxyServer:
             return True  # 表示这是待处理的请求，应该停止处理
         return False  # 不是待处理的请求，继续处理
 
-    async def check_account_online_status(self, account_id: int) -> bool:
+    async def check_account_online_status(self, account_id: int, timeout: float = CHECK_ONLINE_TIMEOUT) -> bool:
         """通过向连接发送get_status API检查账号是否在线"""
         echo = None
         try:
@@ -327,12 +578,12 @@ class ProxyServer:
                 "echo": echo
             }
 
-            request_json = json.dumps(get_status_request, ensure_ascii=False)
+            request_json = json_codec.dumps(get_status_request)
             await matched_connection.client_ws.send(request_json)
 
             try:
-                response = await asyncio.wait_for(future, timeout=5.0)
-                self.logger.ws.debug(f"账号{account_id}收到get_status响应: {json.dumps(response, ensure_ascii=False)}")
+                response = await asyncio.wait_for(future, timeout=timeout)
+                self.logger.ws.debug(f"账号{account_id}收到get_status响应: {json_codec.dumps(response)}")
                 if isinstance(response, dict):
                     online = response.get("data", {}).get("online")
                     # 根据OneBot v11文档，get_status返回的data.online字段为true表示在线
@@ -376,8 +627,30 @@ class ProxyServer:
 
 
     def get_connection_statuses(self):
-        """获取所有连接的状态"""
-        return self.connection_statuses.copy()
+        """获取所有连接的状态，已连接的附带实时队列和压缩统计"""
+        statuses = {}
+        for connection_id, status in self.connection_statuses.items():
+            status = status.copy()
+            connection = self.active_connections.get(connection_id)
+            if self.client_compression.get(connection_id) is not None:
+                status['compression'] = {"client": self.client_compression[connection_id].get_stats()}
+            router = self._router_of(connection_id)
+            if router is not None:
+                status['router'] = router.get_stats()
+            if connection:
+                try:
+                    status['target_statuses'] = connection.get_target_statuses()
+                    status['queues'] = connection.get_queue_stats()
+                    status.setdefault('compression', {})['targets'] = connection.get_compression_stats()
+                    status['reconnect'] = connection.get_reconnect_stats()
+                    status['api_cache'] = connection.get_api_cache_stats()
+                    status['dedup'] = connection.get_dedup_stats()
+                    status['codec'] = connection.get_codec_stats()
+                    status['api_metrics'] = connection.get_api_metrics()
+                except Exception as e:
+                    self.logger.ws.debug(f"[{connection_id}] 获取队列统计失败: {e}")
+            statuses[connection_id] = status
+        return statuses
 
     async def restart_connection(self, connection_id: str):
         """重启指定的连接配置
@@ -386,6 +659,9 @@ class ProxyServer:
             connection_id: 要重启的连接ID
         """
         self.logger.ws.info(f"重启连接配置: {connection_id}")
+        if self.connection_ids is not None:
+            # 新增的连接由协调进程分配到本进程
+            self.connection_ids.add(connection_id)
 
         # 取消旧的服务器任务（如果有）
         if connection_id in self.connection_tasks:
@@ -399,6 +675,19 @@ class ProxyServer:
                 except Exception as e:
                     self.logger.ws.warning(f"[{connection_id}] 取消任务时出错: {e}")
             del self.connection_tasks[connection_id]
+        self.listener_keys.pop(connection_id, None)
+
+        # 从共享端口的路由表中移除，没有其它连接时关闭该监听
+        router = self._router_of(connection_id)
+        if router is not None:
+            router.remove_route(connection_id)
+            if not router.routes:
+                del self.routers[router.key]
+                router.task.cancel()
+                try:
+                    await router.task
+                except (asyncio.CancelledError, Exception):
+                    pass
 
         # 停止该连接的所有活动连接
         if connection_id in self.active_connections:
@@ -438,11 +727,8 @@ class ProxyServer:
                 'self_id': None
             }
 
-            # 创建并保存新的启动任务
-            task = asyncio.create_task(
-                self._start_connection_proxy(connection_id, config)
-            )
-            self.connection_tasks[connection_id] = task
+            # 创建并保存新的启动任务，监听地址已被占用时加入共享端口
+            await self._launch_connection(connection_id, config)
             self.logger.ws.info(f"[{connection_id}] 启动新连接任务")
         else:
             # 更新状态为禁用
@@ -472,6 +758,17 @@ class ProxyServer:
                 except Exception as e:
                     self.logger.ws.warning(f"[{connection_id}] 取消任务时出错: {e}")
         self.connection_tasks.clear()
+        self.listener_keys.clear()
+
+        # 关闭共享端口监听
+        for router in list(self.routers.values()):
+            if router.task is not None and not router.task.done():
+                router.task.cancel()
+                try:
+                    await router.task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self.routers.clear()
 
         # 关闭所有活动连接
         stop_tasks = []
@@ -494,4 +791,5 @@ class ProxyServer:
                 self.logger.ws.error(f"关闭连接任务时出错: {e}")
 
         self.active_connections.clear()
+        self.reconnect_scheduler.close()
         self.logger.ws.info("WebSocket代理服务器已停止")
\ No newline at end of file
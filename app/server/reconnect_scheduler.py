@@ -0,0 +1,237 @@
+"""
+目标重连调度器
+进程内所有连接共享，按目标地址统一安排重连：带抖动的指数退避 + 熔断器，
+恢复后逐个放行等待中的连接，避免多个账号同时冲击刚重启的框架
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+
+# 熔断器状态
+CIRCUIT_CLOSED = "closed"        # 正常，直接尝试
+CIRCUIT_OPEN = "open"            # 熔断，等待退避结束
+CIRCUIT_HALF_OPEN = "half_open"  # 只放一个连接试探，其余排队
+
+DEFAULT_BASE_DELAY = 3        # 退避起点（秒）
+DEFAULT_MAX_DELAY = 300       # 退避上限（秒）
+DEFAULT_FAILURE_THRESHOLD = 3  # 连续失败多少次后熔断
+DEFAULT_RELEASE_INTERVAL = 0.5  # 恢复后每隔多少秒放行一个等待的连接
+
+
+class ConnectAttempt:
+    """一次连接尝试，调用方在 attempt() 内设置 ok"""
+    __slots__ = ("ok", "probe")
+
+    def __init__(self, probe: bool):
+        self.ok: Optional[bool] = None
+        self.probe = probe
+
+
+class _Endpoint:
+    """单个目标地址的熔断状态"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self.probing = False
+        self.waiters: deque = deque()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.release_task: Optional[asyncio.Task] = None
+
+        # 统计
+        self.attempts = 0
+        self.successes = 0
+        self.opened = 0
+
+
+class ReconnectScheduler:
+    """按目标地址调度重连
+
+    - 有连接断开时进入半开状态：只有第一个来重连的连接去试探，其余排队
+    - 试探失败则熔断，等待带抖动的指数退避后再放一个连接试探
+    - 试探成功则闭合，排队的连接按 release_interval 逐个放行
+    """
+
+    def __init__(self, logger, config: Optional[Dict[str, Any]] = None):
+        self.logger = logger
+        config = config or {}
+        self.base_delay = config.get("base_delay", DEFAULT_BASE_DELAY)
+        self.max_delay = config.get("max_delay", DEFAULT_MAX_DELAY)
+        self.failure_threshold = int(config.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD))
+        self.release_interval = config.get("release_interval", DEFAULT_RELEASE_INTERVAL)
+        self._endpoints: Dict[str, _Endpoint] = {}
+
+    def _get(self, url: str) -> _Endpoint:
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            endpoint = self._endpoints[url] = _Endpoint(url)
+        return endpoint
+
+    def backoff(self, failures: int) -> float:
+        """第 failures 次连续失败后的退避时间，取 [d/2, d] 之间的随机值"""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(failures - 1, 0)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def notify_disconnect(self, url: str):
+        """目标连接断开：进入半开状态，由第一个重连的连接试探"""
+        endpoint = self._get(url)
+        if endpoint.state == CIRCUIT_CLOSED and endpoint.release_task is None:
+            endpoint.state = CIRCUIT_HALF_OPEN
+
+    @asynccontextmanager
+    async def attempt(self, url: str):
+        """获取一次连接机会
+
+        用法::
+
+            async with scheduler.attempt(url) as attempt:
+                ws = await connect()
+                attempt.ok = ws is not None
+        """
+        endpoint = self._get(url)
+        probe = await self._wait_turn(endpoint)
+        attempt = ConnectAttempt(probe)
+        endpoint.attempts += 1
+        try:
+            yield attempt
+        finally:
+            if attempt.ok is None:
+                # 被取消或异常退出，没有结论
+                if probe:
+                    endpoint.probing = False
+                    self._grant_probe(endpoint)
+            elif attempt.ok:
+                self._on_success(endpoint)
+            else:
+                self._on_failure(endpoint, probe)
+
+    async def _wait_turn(self, endpoint: _Endpoint) -> bool:
+        """等待轮到自己，返回是否为试探连接"""
+        if endpoint.state == CIRCUIT_CLOSED and endpoint.release_task is None:
+            if endpoint.failures:
+                # 未达到熔断阈值，各自退避，抖动把重试时间错开
+                await asyncio.sleep(self.backoff(endpoint.failures))
+            return False
+
+        if endpoint.state == CIRCUIT_HALF_OPEN and not endpoint.probing:
+            endpoint.probing = True
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        endpoint.waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                # 已被选为试探连接却被取消，交给下一个
+                endpoint.probing = False
+                self._grant_probe(endpoint)
+            else:
+                try:
+                    endpoint.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _grant_probe(self, endpoint: _Endpoint):
+        """半开状态下把试探机会交给排队的第一个连接"""
+        if endpoint.state != CIRCUIT_HALF_OPEN or endpoint.probing:
+            return
+        while endpoint.waiters:
+            waiter = endpoint.waiters.popleft()
+            if not waiter.done():
+                endpoint.probing = True
+                waiter.set_result(True)
+                return
+
+    def _half_open(self, endpoint: _Endpoint):
+        endpoint.timer = None
+        endpoint.state = CIRCUIT_HALF_OPEN
+        endpoint.probing = False
+        self._grant_probe(endpoint)
+
+    def _on_success(self, endpoint: _Endpoint):
+        endpoint.successes += 1
+        recovered = endpoint.state != CIRCUIT_CLOSED or endpoint.failures
+        endpoint.state = CIRCUIT_CLOSED
+        endpoint.failures = 0
+        endpoint.probing = False
+        if endpoint.timer:
+            endpoint.timer.cancel()
+            endpoint.timer = None
+        if recovered:
+            self.logger.ws.info(f"目标 {endpoint.url} 已恢复，{len(endpoint.waiters)} 个连接将逐个重连")
+        if endpoint.waiters and endpoint.release_task is None:
+            endpoint.release_task = asyncio.create_task(self._release(endpoint))
+
+    def _on_failure(self, endpoint: _Endpoint, probe: bool):
+        endpoint.failures += 1
+        if probe:
+            endpoint.probing = False
+        if endpoint.state == CIRCUIT_OPEN:
+            # 已经熔断，沿用当前的退避
+            return
+        if probe or endpoint.state == CIRCUIT_HALF_OPEN or endpoint.failures >= self.failure_threshold:
+            self._open(endpoint)
+
+    def _open(self, endpoint: _Endpoint):
+        if endpoint.release_task is not None:
+            endpoint.release_task.cancel()
+            endpoint.release_task = None
+        if endpoint.timer:
+            endpoint.timer.cancel()
+        delay = self.backoff(endpoint.failures)
+        if endpoint.state != CIRCUIT_OPEN:
+            endpoint.opened += 1
+            self.logger.ws.warning(f"目标 {endpoint.url} 连续 {endpoint.failures} 次连接失败，熔断 {delay:.1f} 秒")
+        endpoint.state = CIRCUIT_OPEN
+        endpoint.retry_at = time.monotonic() + delay
+        endpoint.timer = asyncio.get_running_loop().call_later(delay, self._half_open, endpoint)
+
+    async def _release(self, endpoint: _Endpoint):
+        """逐个放行等待中的连接"""
+        try:
+            while endpoint.waiters:
+                waiter = endpoint.waiters.popleft()
+                if waiter.done():
+                    continue
+                waiter.set_result(False)
+                await asyncio.sleep(self.release_interval)
+        finally:
+            if endpoint.release_task is asyncio.current_task():
+                endpoint.release_task = None
+
+    def get_stats(self, url: str) -> Optional[Dict[str, Any]]:
+        """单个目标地址的重连状态，从未断开过的地址返回 None"""
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            return None
+        return {
+            "state": endpoint.state,
+            "failures": endpoint.failures,
+            "waiting": sum(1 for waiter in endpoint.waiters if not waiter.done()),
+            "retry_in": round(max(endpoint.retry_at - time.monotonic(), 0), 1) if endpoint.state == CIRCUIT_OPEN else 0,
+            "attempts": endpoint.attempts,
+            "successes": endpoint.successes,
+            "opened": endpoint.opened,
+        }
+
+    def close(self):
+        """取消所有定时器和放行任务，唤醒等待中的连接"""
+        for endpoint in self._endpoints.values():
+            if endpoint.timer:
+                endpoint.timer.cancel()
+            if endpoint.release_task is not None:
+                endpoint.release_task.cancel()
+            while endpoint.waiters:
+                waiter = endpoint.waiters.popleft()
+                if not waiter.done():
+                    waiter.cancel()
+        self._endpoints.clear()
@@ -0,0 +1,271 @@
+"""
+出站发送调度
+框架发出的 send_* 请求按账号和群的令牌桶限速后再发给客户端，避免突发刷屏触发风控；
+指令回复走高优先级通道，合并转发等批量发送走低优先级通道，不会被批量发送拖慢
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import websockets.exceptions
+
+
+# 优先级通道，数字越小越先发送
+LANE_URGENT = "urgent"  # 指令回复（带回复段）、BotShepherd 自身的回复
+LANE_NORMAL = "normal"
+LANE_BULK = "bulk"      # 合并转发等批量发送
+LANES = (LANE_URGENT, LANE_NORMAL, LANE_BULK)
+
+# 视为批量发送的接口
+BULK_ACTIONS = ("send_forward_msg", "send_group_forward_msg", "send_private_forward_msg")
+
+DEFAULT_SEND_RATE = {
+    "enabled": False,
+    "account_rate": 3.0,   # 每个账号每秒最多发送的消息数
+    "account_burst": 5,    # 账号允许的突发条数
+    "group_rate": 1.0,     # 每个群每秒最多发送的消息数
+    "group_burst": 3,      # 单个群允许的突发条数
+    "max_queue": 2000,     # 排队上限，超出时丢弃新请求
+}
+
+# 每次调度最多向后查看的排队请求数，用于跳过被群限速卡住的请求
+LOOKAHEAD = 32
+# 群令牌桶数量超过该值时清理已回满的桶
+MAX_IDLE_BUCKETS = 1000
+# 排队溢出告警的最小间隔
+QUEUE_WARN_INTERVAL = 10
+# 排队已满丢弃请求时回复给框架的错误码
+QUEUE_FULL_RETCODE = 1429
+
+
+class TokenBucket:
+    """令牌桶：以 rate 每秒补充，最多攒 burst 个"""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.tokens < self.burst:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """距离有一个令牌还需要的秒数"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _Outgoing:
+    __slots__ = ("payload", "group_id", "enqueued_at")
+
+    def __init__(self, payload: str, group_id: Optional[str]):
+        self.payload = payload
+        self.group_id = group_id
+        self.enqueued_at = time.monotonic()
+
+
+class _LaneStats:
+    __slots__ = ("sent", "total_delay", "max_delay")
+
+    def __init__(self):
+        self.sent = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+
+    def record(self, delay: float):
+        self.sent += 1
+        self.total_delay += delay
+        if delay > self.max_delay:
+            self.max_delay = delay
+
+
+def classify_lane(message_data: Dict[str, Any], target_index: int) -> str:
+    """按请求内容选择优先级通道"""
+    if target_index == 0:
+        return LANE_URGENT
+    action = message_data.get("action")
+    if action in BULK_ACTIONS:
+        return LANE_BULK
+    message = (message_data.get("params") or {}).get("message")
+    if isinstance(message, list):
+        for seg in message:
+            if isinstance(seg, dict):
+                seg_type = seg.get("type")
+                if seg_type == "reply":
+                    return LANE_URGENT
+                if seg_type == "node":
+                    return LANE_BULK
+    return LANE_NORMAL
+
+
+def resolve_send_rate(global_config: Dict[str, Any], account_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """全局 send_rate 为默认值，账号配置中的 send_rate 覆盖"""
+    settings = dict(DEFAULT_SEND_RATE)
+    settings.update(global_config.get("send_rate", {}) or {})
+    if account_config:
+        settings.update(account_config.get("send_rate", {}) or {})
+    return settings
+
+
+class SendScheduler:
+    """单个账号的出站发送调度器"""
+
+    def __init__(self, connection_id: str, logger, send: Callable[[str], Awaitable[Any]],
+                 settings: Optional[Dict[str, Any]] = None):
+        self.connection_id = connection_id
+        self.logger = logger
+        self._send = send
+        self._lanes: Dict[str, Deque[_Outgoing]] = {lane: deque() for lane in LANES}
+        self._lane_stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+        self._group_buckets: Dict[str, TokenBucket] = {}
+        self._wakeup = asyncio.Event()
+        self._worker_task: Optional[asyncio.Task] = None
+        self._last_queue_warn = 0.0
+
+        # 统计
+        self.dropped = 0
+        self.throttled = 0  # 因限速等待的次数
+
+        self.configure(settings or DEFAULT_SEND_RATE)
+
+    def configure(self, settings: Dict[str, Any]):
+        """应用限速配置，已排队的请求按新配置继续发送"""
+        self.enabled = bool(settings.get("enabled", False))
+        self.account_rate = float(settings.get("account_rate", DEFAULT_SEND_RATE["account_rate"]))
+        self.account_burst = float(settings.get("account_burst", DEFAULT_SEND_RATE["account_burst"]))
+        self.group_rate = float(settings.get("group_rate", DEFAULT_SEND_RATE["group_rate"]))
+        self.group_burst = float(settings.get("group_burst", DEFAULT_SEND_RATE["group_burst"]))
+        self.max_queue = int(settings.get("max_queue", DEFAULT_SEND_RATE["max_queue"]))
+        self._account_bucket = TokenBucket(self.account_rate, self.account_burst)
+        self._group_buckets.clear()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def submit(self, payload: str, message_data: Dict[str, Any], target_index: int) -> bool:
+        """排队一条 send_* 请求，队列已满时丢弃并返回 False"""
+        if len(self) >= self.max_queue:
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._last_queue_warn >= QUEUE_WARN_INTERVAL:
+                self._last_queue_warn = now
+                self.logger.ws.warning(f"[{self.connection_id}] 出站发送队列已满({self.max_queue})，丢弃新的发送请求")
+            return False
+
+        group_id = (message_data.get("params") or {}).get("group_id")
+        lane = classify_lane(message_data, target_index)
+        self._lanes[lane].append(_Outgoing(payload, str(group_id) if group_id else None))
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.create_task(self._worker())
+        self._wakeup.set()
+        return True
+
+    def _group_bucket(self, group_id: str) -> TokenBucket:
+        bucket = self._group_buckets.get(group_id)
+        if bucket is None:
+            if len(self._group_buckets) >= MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                for idle in [gid for gid, b in self._group_buckets.items() if b.full(now)]:
+                    del self._group_buckets[idle]
+            bucket = self._group_buckets[group_id] = TokenBucket(self.group_rate, self.group_burst)
+        return bucket
+
+    def _next(self, now: float):
+        """按优先级找出现在可以发送的请求，返回 (lane, index, 需要等待的秒数)"""
+        wait = self._account_bucket.wait_time(now)
+        if wait > 0:
+            return None, -1, wait
+        min_wait = None
+        for lane in LANES:
+            queue = self._lanes[lane]
+            for index in range(min(len(queue), LOOKAHEAD)):
+                group_id = queue[index].group_id
+                if group_id is None:
+                    return lane, index, 0.0
+                group_wait = self._group_bucket(group_id).wait_time(now)
+                if group_wait <= 0:
+                    return lane, index, 0.0
+                min_wait = group_wait if min_wait is None else min(min_wait, group_wait)
+        return None, -1, min_wait
+
+    async def _worker(self):
+        while True:
+            if not len(self):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            lane, index, wait = self._next(now)
+            if lane is None:
+                # 全部被限速，等到最早可发送的时刻，期间有新请求入队时重新调度
+                self.throttled += 1
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            queue = self._lanes[lane]
+            item = queue[index]
+            del queue[index]
+            self._account_bucket.consume()
+            if item.group_id is not None:
+                self._group_bucket(item.group_id).consume()
+            self._lane_stats[lane].record(now - item.enqueued_at)
+
+            try:
+                await self._send(item.payload)
+            except websockets.exceptions.ConnectionClosed:
+                for pending in self._lanes.values():
+                    pending.clear()
+                return
+            except Exception as e:
+                self.logger.ws.error(f"[{self.connection_id}] 发送请求到客户端失败: {e}")
+
+    async def close(self):
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker_task = None
+        for queue in self._lanes.values():
+            queue.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lanes = {}
+        for lane in LANES:
+            stats = self._lane_stats[lane]
+            lanes[lane] = {
+                "queued": len(self._lanes[lane]),
+                "sent": stats.sent,
+                "avg_delay_ms": round(stats.total_delay / stats.sent * 1000, 1) if stats.sent else None,
+                "max_delay_ms": round(stats.max_delay * 1000, 1),
+            }
+        return {
+            "enabled": self.enabled,
+            "account_rate": self.account_rate,
+            "group_rate": self.group_rate,
+            "queued": len(self),
+            "dropped": self.dropped,
+            "throttled": self.throttled,
+            "lanes": lanes,
+        }
@@ -0,0 +1,92 @@
+"""
+相同只读请求合并
+一个事件广播给多个框架后，它们往往在几毫秒内发出完全相同的 get_* 请求。
+同一时刻只把第一个请求发给客户端，其余请求等待它的响应，再各自换回自己的 echo。
+等待者记录加入时间，API 统计按各自的等待时间为每个等待者计一次
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .api_cache import CacheKey
+from .echo_table import EchoTable
+
+
+# 只合并只读接口
+READ_ACTION_PREFIXES = ("get_", "can_")
+
+# (target_index, original_echo, 加入时间 time.time())
+Waiter = Tuple[int, Any, float]
+
+
+class _InFlight:
+    __slots__ = ("proxy_echo", "waiters")
+
+    def __init__(self, proxy_echo: int):
+        self.proxy_echo = proxy_echo
+        self.waiters: List[Waiter] = []
+
+
+class SingleFlight:
+    """按请求键合并进行中的只读请求，请求是否还在进行以 echo 关联表为准"""
+
+    def __init__(self, echo_table: EchoTable, enabled: bool = True):
+        self.echo_table = echo_table
+        self.enabled = enabled
+        self._calls: Dict[CacheKey, _InFlight] = {}
+        self._keys: Dict[int, CacheKey] = {}  # proxy_echo -> key
+
+        # 统计
+        self.leaders = 0
+        self.coalesced = 0
+
+    def coalescable(self, action: Any) -> bool:
+        return self.enabled and isinstance(action, str) and action.startswith(READ_ACTION_PREFIXES)
+
+    def join(self, key: CacheKey, target_index: int, original_echo: Any) -> bool:
+        """有相同请求正在进行时加入等待，返回是否已加入"""
+        call = self._calls.get(key)
+        if call is None:
+            return False
+        if not self._alive(call.proxy_echo):
+            # 请求已过期或被淘汰，响应不会再来，由当前请求重新发起
+            self._drop(call.proxy_echo)
+            return False
+        call.waiters.append((target_index, original_echo, time.time()))
+        self.coalesced += 1
+        return True
+
+    def start(self, key: CacheKey, proxy_echo: int):
+        """登记新发出的请求"""
+        if key in self._calls:
+            self._drop(self._calls[key].proxy_echo)
+        elif len(self._calls) >= self.echo_table.max_size:
+            # 响应一直没来的请求不会被 finish，积累过多时清理一次
+            for stale in [echo for echo in self._keys if not self._alive(echo)]:
+                self._drop(stale)
+        self._calls[key] = _InFlight(proxy_echo)
+        self._keys[proxy_echo] = key
+        self.leaders += 1
+
+    def finish(self, proxy_echo: int) -> List[Waiter]:
+        """请求收到响应（或已过期、被淘汰），返回等待该响应的其它请求"""
+        call = self._drop(proxy_echo)
+        return call.waiters if call is not None else []
+
+    def _alive(self, proxy_echo: int) -> bool:
+        entry = self.echo_table.get(proxy_echo)
+        return entry is not None and entry.deadline > time.monotonic()
+
+    def _drop(self, proxy_echo: int) -> Optional[_InFlight]:
+        key = self._keys.pop(proxy_echo, None)
+        if key is None:
+            return None
+        return self._calls.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
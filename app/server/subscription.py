@@ -0,0 +1,131 @@
+"""
+目标事件订阅
+每个目标可以只订阅部分事件（按 post_type、message_type、notice_type、群号、指令前缀），
+规则在连接建立时编译成一个判断函数，广播前逐目标判断，不订阅的目标不入队也不序列化
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+
+# 元事件（心跳、生命周期）不受订阅规则影响，框架依赖它们注册和保活
+ALWAYS_DELIVERED_POST_TYPES = ("meta_event",)
+# 按消息处理的 post_type，message_types / commands_only 只作用于它们
+MESSAGE_POST_TYPES = ("message", "message_sent")
+
+# 判断指令前缀时跳过的前导 CQ 码，例如 "[CQ:reply,id=1][CQ:at,qq=2] /help"
+_LEADING_CQ_TYPES = ("[CQ:reply,", "[CQ:at,")
+
+
+def _id_set(values) -> frozenset:
+    """群号同时以 int 和 str 形式放入集合，判断时无需转换类型"""
+    result = set()
+    for value in values:
+        result.add(str(value))
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            result.add(int(value))
+    return frozenset(result)
+
+
+def _strip_leading_cq(raw_message: str) -> str:
+    text = raw_message.lstrip()
+    while text.startswith(_LEADING_CQ_TYPES):
+        end = text.find("]")
+        if end < 0:
+            break
+        text = text[end + 1:].lstrip()
+    return text
+
+
+def compile_rules(rules: Optional[Dict[str, Any]]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """把订阅规则编译为判断函数，没有任何有效规则时返回 None（全部转发）"""
+    if not rules:
+        return None
+
+    checks: List[Callable[[Dict[str, Any]], bool]] = []
+
+    post_types = rules.get("post_types")
+    if post_types:
+        post_type_set = frozenset(post_types)
+        checks.append(lambda event: event.get("post_type") in post_type_set)
+
+    message_types = rules.get("message_types")
+    if message_types:
+        message_type_set = frozenset(message_types)
+        checks.append(lambda event: event.get("post_type") not in MESSAGE_POST_TYPES
+                      or event.get("message_type") in message_type_set)
+
+    notice_types = rules.get("notice_types")
+    if notice_types:
+        notice_type_set = frozenset(notice_types)
+        checks.append(lambda event: event.get("post_type") != "notice"
+                      or event.get("notice_type") in notice_type_set)
+
+    # 群号规则只作用于带 group_id 的事件，私聊等事件不受影响
+    groups_allow = rules.get("groups_allow")
+    if groups_allow:
+        allow_set = _id_set(groups_allow)
+        checks.append(lambda event: event.get("group_id") is None or event["group_id"] in allow_set)
+
+    groups_deny = rules.get("groups_deny")
+    if groups_deny:
+        deny_set = _id_set(groups_deny)
+        checks.append(lambda event: event.get("group_id") not in deny_set)
+
+    prefixes = tuple(p for p in (rules.get("command_prefixes") or []) if p)
+    if rules.get("commands_only") and prefixes:
+        def is_command(event: Dict[str, Any]) -> bool:
+            if event.get("post_type") not in MESSAGE_POST_TYPES:
+                return True
+            raw_message = event.get("raw_message")
+            if not isinstance(raw_message, str):
+                return False
+            return raw_message.startswith(prefixes) or _strip_leading_cq(raw_message).startswith(prefixes)
+        checks.append(is_command)
+
+    if not checks:
+        return None
+
+    checks_tuple = tuple(checks)
+
+    def predicate(event: Dict[str, Any]) -> bool:
+        if event.get("post_type") in ALWAYS_DELIVERED_POST_TYPES:
+            return True
+        for check in checks_tuple:
+            if not check(event):
+                return False
+        return True
+
+    return predicate
+
+
+class Subscription:
+    """单个目标的订阅规则及命中统计"""
+
+    def __init__(self, rules: Dict[str, Any], predicate: Callable[[Dict[str, Any]], bool]):
+        self.rules = rules
+        self._predicate = predicate
+        self.matched = 0
+        self.filtered = 0
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> Optional["Subscription"]:
+        """根据目标选项中的 subscribe 字段创建，未配置规则时返回 None"""
+        rules = options.get("subscribe") or {}
+        predicate = compile_rules(rules)
+        if predicate is None:
+            return None
+        return cls(rules, predicate)
+
+    def match(self, event: Dict[str, Any]) -> bool:
+        if self._predicate(event):
+            self.matched += 1
+            return True
+        self.filtered += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rules": self.rules,
+            "matched": self.matched,
+            "filtered": self.filtered,
+        }
@@ -0,0 +1,106 @@
+"""
+目标健康状态
+根据发送耗时、发送超时、ping 往返时间和连接关闭事件判断 target 是否可用
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+
+HEALTH_CONNECTING = "connecting"  # 尚未连上
+HEALTH_HEALTHY = "healthy"        # 正常
+HEALTH_DEGRADED = "degraded"      # 发送变慢或 ping 延迟高，仍然发送
+HEALTH_DEAD = "dead"              # 超时、断开或连接失败，跳过发送直到重连成功
+
+# 发送耗时（指数加权平均）超过该值判定为变慢，回落到一半以下恢复
+DEGRADED_SEND_LATENCY = 1.0
+# ping 往返时间超过该值判定为变慢，回落到一半以下恢复
+DEGRADED_PING_RTT = 2.0
+# 发送耗时平均的平滑系数
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class TargetHealth:
+    """单个 target 的健康状态机
+
+    connecting -> healthy <-> degraded，任意状态遇到超时/关闭/连接失败进入 dead，
+    只有重连成功（on_connected）才会离开 dead。
+    """
+
+    def __init__(self):
+        self.state = HEALTH_CONNECTING
+        self.reason: Optional[str] = None
+        self.since = time.time()
+        self.send_latency: Optional[float] = None
+        self.ping_rtt: Optional[float] = None
+        self.transitions = 0
+        self.dead_count = 0
+
+    @property
+    def usable(self) -> bool:
+        """是否应该向该 target 发送"""
+        return self.state in (HEALTH_HEALTHY, HEALTH_DEGRADED)
+
+    def _set(self, state: str, reason: Optional[str] = None) -> bool:
+        """切换状态，返回是否发生了变化"""
+        if state == self.state:
+            return False
+        self.state = state
+        self.reason = reason
+        self.since = time.time()
+        self.transitions += 1
+        if state == HEALTH_DEAD:
+            self.dead_count += 1
+        return True
+
+    def on_connected(self) -> bool:
+        self.send_latency = None
+        self.ping_rtt = None
+        return self._set(HEALTH_HEALTHY)
+
+    def on_connect_failed(self, reason: str = "连接失败") -> bool:
+        return self._set(HEALTH_DEAD, reason)
+
+    def on_closed(self, reason: str = "连接已关闭") -> bool:
+        return self._set(HEALTH_DEAD, reason)
+
+    def on_timeout(self) -> bool:
+        return self._set(HEALTH_DEAD, "发送超时")
+
+    def record_send(self, latency: float) -> bool:
+        """记录一次成功发送的耗时"""
+        if self.send_latency is None:
+            self.send_latency = latency
+        else:
+            self.send_latency += LATENCY_EWMA_ALPHA * (latency - self.send_latency)
+        return self._evaluate()
+
+    def record_rtt(self, rtt: float) -> bool:
+        """记录 websockets 心跳测得的往返时间"""
+        self.ping_rtt = rtt
+        return self._evaluate()
+
+    def _evaluate(self) -> bool:
+        if not self.usable:
+            return False
+        slow_send = self.send_latency is not None and self.send_latency > DEGRADED_SEND_LATENCY
+        slow_ping = self.ping_rtt is not None and self.ping_rtt > DEGRADED_PING_RTT
+        if slow_send or slow_ping:
+            reason = "发送变慢" if slow_send else "ping 延迟高"
+            return self._set(HEALTH_DEGRADED, reason)
+        if self.state == HEALTH_DEGRADED:
+            # 回落到阈值一半以下才恢复，避免在阈值附近来回切换
+            if (self.send_latency or 0) < DEGRADED_SEND_LATENCY / 2 and (self.ping_rtt or 0) < DEGRADED_PING_RTT / 2:
+                return self._set(HEALTH_HEALTHY)
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "reason": self.reason,
+            "since": int(self.since),
+            "send_latency_ms": round(self.send_latency * 1000, 1) if self.send_latency is not None else None,
+            "ping_rtt_ms": round(self.ping_rtt * 1000, 1) if self.ping_rtt is not None else None,
+            "transitions": self.transitions,
+            "dead_count": self.dead_count,
+        }
@@ -0,0 +1,313 @@
+"""
+目标发送队列
+每个 target 一个有界出站队列和独立写协程，慢 target 不再拖累其它 target
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+import websockets.exceptions
+
+from .target_health import TargetHealth
+from .catchup_buffer import CatchupBuffer
+
+
+# 向 target 发送的单次超时：防止某个卡住/假死的 target 一直占着写协程
+TARGET_SEND_TIMEOUT = 10
+
+# 队列溢出策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"   # 丢弃最早入队的消息，保证最新事件送达
+OVERFLOW_DROP_NEWEST = "drop_newest"   # 丢弃新消息，保证已排队的消息按序送达
+OVERFLOW_DISCONNECT = "disconnect"     # 断开该 target，交给重连流程恢复
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_DISCONNECT)
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_OVERFLOW = OVERFLOW_DROP_OLDEST
+
+# 溢出告警的最小间隔，避免突发时刷屏
+OVERFLOW_WARN_INTERVAL = 10
+
+# 队列项的 catch_up 标记：补发的事件，发送成功后才计入补发数（同样视为 True）
+CATCH_UP_REPLAY = 2
+
+
+class TargetSender:
+    """单个 target 的出站队列
+
+    转发循环只负责 enqueue，真正的 send 在本对象的写协程里完成，
+    因此广播的耗时取决于最快的 target，而不是所有 target 的累加。
+    配置了补发缓冲时，target 不可用期间的事件暂存在缓冲中，重连后由补发协程按速率放回队列。
+    队列中的元素为 (帧, 是否可补发)。
+    """
+
+    def __init__(self, connection_id: str, target_index: int, logger,
+                 max_size: int = DEFAULT_QUEUE_SIZE, overflow: str = DEFAULT_OVERFLOW,
+                 catchup: Optional[CatchupBuffer] = None):
+        self.connection_id = connection_id
+        self.target_index = target_index
+        self.logger = logger
+        self.max_size = max_size
+        self.overflow = overflow if overflow in OVERFLOW_POLICIES else DEFAULT_OVERFLOW
+
+        self.ws = None
+        self.greeting = None  # 每次连上 target 后最先发送的帧（客户端的第一条消息）
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._writer_task = None
+        self._last_overflow_warn = 0.0
+        self.health = TargetHealth()
+        self.catchup = catchup
+        self._replay_task = None
+
+        # 统计
+        self.sent = 0
+        self.dropped = 0
+        self.skipped = 0  # target 不可用时直接跳过的消息
+        self.timeouts = 0
+        self.high_water = 0
+
+    @classmethod
+    def from_config(cls, connection_id: str, target_index: int, logger, config: Dict[str, Any],
+                    catchup: Optional[CatchupBuffer] = None) -> "TargetSender":
+        """根据连接配置中的 send_queue 字段创建"""
+        queue_config = config.get("send_queue", {}) or {}
+        return cls(
+            connection_id,
+            target_index,
+            logger,
+            max_size=int(queue_config.get("max_size", DEFAULT_QUEUE_SIZE)),
+            overflow=queue_config.get("overflow", DEFAULT_OVERFLOW),
+            catchup=catchup,
+        )
+
+    def attach(self, target_ws):
+        """绑定（或重连后重新绑定）target 连接，并确保写协程在运行
+
+        已设置 greeting 时立即入队，保证它排在该连接的所有其它帧之前，断开期间暂存的事件随后补发。
+        """
+        old_ws, self.ws = self.ws, target_ws
+        if target_ws is None:
+            if self.health.on_connect_failed():
+                self._log_health()
+            return
+        if self.health.on_connected():
+            self._log_health()
+        if old_ws is not None and old_ws is not target_ws:
+            # 积压的是发给旧连接的帧，旧连接已断，不能排在 greeting 前面
+            self._clear()
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        if self.greeting is not None:
+            self.enqueue(self.greeting)
+        self._start_replay()
+
+    def enqueue(self, payload, catch_up: bool = False) -> bool:
+        """非阻塞入队，返回是否入队成功；catch_up 表示 target 不可用时可暂存到补发缓冲的事件"""
+        if catch_up and self.catchup is not None and (self.ws is None or not self.health.usable or self.catchup):
+            # 还有未补发的事件时排在它们后面，保证事件顺序
+            self.catchup.add(payload)
+            self._start_replay()
+            return True
+        if self.ws is None:
+            return False
+        if not self.health.usable:
+            # 已判定为超时/断开，不再排队等超时，直接跳过直到重连成功
+            self.skipped += 1
+            return False
+
+        if self._queue.full():
+            self._on_overflow()
+            if self.overflow != OVERFLOW_DROP_OLDEST:
+                return False
+
+        self._queue.put_nowait((payload, catch_up))
+        self.high_water = max(self.high_water, self._queue.qsize())
+        return True
+
+    def _on_overflow(self):
+        """按策略处理队列溢出"""
+        self.dropped += 1
+        now = time.monotonic()
+        if now - self._last_overflow_warn >= OVERFLOW_WARN_INTERVAL:
+            self._last_overflow_warn = now
+            self.logger.ws.warning(
+                f"[{self.connection_id}] 目标 {self.target_index} 发送队列已满({self.max_size})，"
+                f"策略 {self.overflow}，累计丢弃 {self.dropped} 条"
+            )
+
+        if self.overflow == OVERFLOW_DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+            except asyncio.QueueEmpty:
+                pass
+        elif self.overflow == OVERFLOW_DISCONNECT:
+            # 断开后由接收侧 ConnectionClosed 触发重连，积压的消息已无意义（启用补发时放回补发缓冲）
+            self._clear()
+            ws, self.ws = self.ws, None
+            self.mark_closed("发送队列溢出")
+            if ws is not None:
+                asyncio.create_task(self._close_ws(ws))
+
+    async def _writer_loop(self):
+        """写协程：逐条发送，单条超时只影响本 target"""
+        while True:
+            payload, catch_up = await self._queue.get()
+            try:
+                ws = self.ws
+                if ws is None:
+                    if not self._requeue(payload, catch_up):
+                        self.dropped += 1
+                    continue
+                if not self.health.usable:
+                    if not self._requeue(payload, catch_up):
+                        self.skipped += 1
+                    continue
+                start = time.monotonic()
+                await asyncio.wait_for(ws.send(payload), timeout=TARGET_SEND_TIMEOUT)
+                self.sent += 1
+                if catch_up == CATCH_UP_REPLAY:
+                    self.catchup.replayed += 1
+                changed = self.health.record_send(time.monotonic() - start)
+                # websockets 心跳测得的往返时间，尚未测量时为 0
+                rtt = getattr(ws, "latency", 0)
+                if rtt:
+                    changed = self.health.record_rtt(rtt) or changed
+                if changed:
+                    self._log_health()
+            except websockets.exceptions.ConnectionClosed:
+                # 由接收侧 ConnectionClosed 触发重连，期间跳过发送
+                self.mark_closed()
+                if not self._requeue(payload, catch_up):
+                    self.dropped += 1
+            except asyncio.TimeoutError:
+                # 取消 send 后该连接多半已坏：立即判定为不可用并主动断开，交给重连流程恢复，
+                # 后续消息不再逐条等待超时；超时的这一帧可能已部分发出，不再补发
+                self.timeouts += 1
+                self.logger.ws.warning(f"[{self.connection_id}] 发送到目标 {self.target_index} 超时({TARGET_SEND_TIMEOUT}s)，目标可能假死，断开重连")
+                if self.health.on_timeout():
+                    self._log_health()
+                self._clear()
+                asyncio.create_task(self._close_ws(ws, 1011, "send timeout"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.dropped += 1
+                self.logger.ws.error(f"[{self.connection_id}] 发送到目标 {self.target_index} 失败: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _clear(self, hold: bool = True):
+        """清空队列，启用补发且 hold 为 True 时积压的事件放回补发缓冲"""
+        pending = []
+        while True:
+            try:
+                payload, catch_up = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            self._queue.task_done()
+            if hold and catch_up and self.catchup is not None:
+                pending.append(payload)
+            else:
+                self.dropped += 1
+        if pending:
+            self.catchup.restore(pending)
+
+    def _requeue(self, payload, catch_up: bool) -> bool:
+        """未送达的事件放回补发缓冲最前面，返回是否已放回"""
+        if not catch_up or self.catchup is None:
+            return False
+        self.catchup.restore([payload])
+        return True
+
+    def _start_replay(self):
+        """target 可用且有暂存事件时启动补发协程"""
+        if not self.catchup or self.ws is None or not self.health.usable:
+            return
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.create_task(self._replay_loop())
+
+    async def _replay_loop(self):
+        """补发协程：等 greeting 和上一条事件发出后，按 replay_rate 逐条放回发送队列，target 再次不可用时暂停"""
+        catchup = self.catchup
+        interval = 1 / catchup.replay_rate
+        replayed = 0
+        self.logger.ws.info(f"[{self.connection_id}] 目标 {self.target_index} 开始补发断开期间的 {len(catchup)} 条事件")
+        while True:
+            await self._queue.join()
+            await asyncio.sleep(interval)
+            if self.ws is None or not self.health.usable:
+                self.logger.ws.warning(f"[{self.connection_id}] 目标 {self.target_index} 不可用，暂停补发（剩余 {len(catchup)} 条）")
+                return
+            payload = catchup.pop()
+            if payload is None:
+                break
+            try:
+                self._queue.put_nowait((payload, CATCH_UP_REPLAY))
+            except asyncio.QueueFull:
+                # 等待期间实时消息占满了队列，放回缓冲最前面，等队列排空后再补发
+                catchup.restore([payload])
+                continue
+            replayed += 1
+        self.logger.ws.info(f"[{self.connection_id}] 目标 {self.target_index} 补发完成，共 {replayed} 条")
+
+    async def _close_ws(self, ws, code: int = 1013, reason: str = "send queue overflow"):
+        try:
+            await asyncio.wait_for(ws.close(code, reason), timeout=5)
+        except Exception as e:
+            self.logger.ws.warning(f"[{self.connection_id}] 关闭目标 {self.target_index} 出错({reason}): {e}")
+
+    def mark_closed(self, reason: str = "连接已关闭"):
+        """连接关闭：在重连成功前跳过发送，启用补发时积压的事件转入补发缓冲"""
+        if self.health.on_closed(reason):
+            self._log_health()
+        if self.catchup is not None:
+            self._clear()
+
+    def _log_health(self):
+        health = self.health
+        message = f"[{self.connection_id}] 目标 {self.target_index} 状态: {health.state}" + (f"（{health.reason}）" if health.reason else "")
+        if health.usable:
+            self.logger.ws.info(message)
+        else:
+            self.logger.ws.warning(message)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """队列统计"""
+        return {
+            "queued": self._queue.qsize(),
+            "high_water": self.high_water,
+            "max_size": self.max_size,
+            "overflow": self.overflow,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "timeouts": self.timeouts,
+            "catchup": self.catchup.get_stats() if self.catchup is not None else None,
+        }
+
+    async def flush(self, timeout: float) -> bool:
+        """等待积压的帧发送完，未连接时不等待"""
+        if self.ws is None or self._writer_task is None or self._writer_task.done():
+            return False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=max(timeout, 0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self):
+        """停止写协程并丢弃积压"""
+        self.ws = None
+        for task in (self._replay_task, self._writer_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._replay_task = None
+        self._writer_task = None
+        self._clear(hold=False)
+        if self.catchup is not None:
+            self.catchup.clear()
@@ -0,0 +1,73 @@
+"""
+Unix 域套接字端点
+协议端、框架与 BotShepherd 在同一台机器上时，可以用 ws+unix:// 端点代替 TCP 回环，
+写法为 ws+unix://套接字路径，需要指定请求路径时在后面加 :/路径，
+例如 ws+unix:///run/botshepherd/napcat.sock:/OneBotv11
+"""
+
+import errno
+import os
+import socket
+import stat
+from typing import Tuple
+
+
+UNIX_SCHEME = "ws+unix://"
+# 套接字路径与请求路径之间的分隔
+PATH_SEPARATOR = ":/"
+# 握手请求使用的主机名，Unix 套接字上没有实际意义
+UNIX_HOST = "localhost"
+
+
+def is_unix_endpoint(endpoint: str) -> bool:
+    return isinstance(endpoint, str) and endpoint.startswith(UNIX_SCHEME)
+
+
+def parse_unix_endpoint(endpoint: str) -> Tuple[str, str]:
+    """返回 (套接字路径, 请求路径)"""
+    if not is_unix_endpoint(endpoint):
+        raise ValueError(f"不是 Unix 套接字端点: {endpoint}")
+    rest = endpoint[len(UNIX_SCHEME):]
+    idx = rest.rfind(PATH_SEPARATOR)
+    if idx > 0:
+        socket_path, request_path = rest[:idx], rest[idx + 1:]
+    else:
+        socket_path, request_path = rest, "/"
+    if not socket_path:
+        raise ValueError(f"Unix 套接字端点缺少套接字路径: {endpoint}")
+    return socket_path, request_path
+
+
+def unix_uri(request_path: str) -> str:
+    """Unix 套接字连接握手用的 URI"""
+    return f"ws://{UNIX_HOST}{request_path}"
+
+
+def prepare_socket_path(socket_path: str):
+    """监听前清理上次未删除的套接字文件；仍有进程在监听时保留，由绑定时报地址占用"""
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        directory = os.path.dirname(socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, f"{socket_path} 已存在且不是套接字文件")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(socket_path)
+    except OSError:
+        pass
+    finally:
+        probe.close()
+
+
+def remove_socket_path(socket_path: str):
+    try:
+        if stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)
+    except OSError:
+        pass
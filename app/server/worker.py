@@ -0,0 +1,204 @@
+"""
+worker 进程
+多进程模式下每个 worker 运行一个只负责部分连接的 ProxyServer；
+数据库写入和查询交给协调进程，配置变更经通信通道与协调进程双向同步
+"""
+
+import asyncio
+import signal
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config.config_manager import ConfigManager
+from ..utils import event_loop, json_codec
+from ..utils.backup_manager import BackupManager
+from ..utils.logger import BSLogger
+from ..utils.reboot import set_reboot_hooks
+from .proxy_server import ProxyServer
+from .worker_channel import WorkerChannel
+
+
+# worker 中账号、群组脏配置同步给协调进程的间隔（秒），协调进程仍按 auto_save_interval 写盘
+WORKER_FLUSH_INTERVAL = 5
+# 连接状态上报间隔（秒）
+STATUS_INTERVAL = 1
+# 消息写入按批发给协调进程：攒够条数或等待该时间（秒）后发送
+DB_SAVE_BATCH_SIZE = 200
+DB_SAVE_BATCH_INTERVAL = 0.05
+# 只有这些事件会写入数据库，其它事件不必发给协调进程
+SAVED_POST_TYPES = ("message", "message_sent")
+# worker 内在线状态检查的超时（秒），需小于协调进程等待的 CHECK_ONLINE_TIMEOUT
+WORKER_CHECK_ONLINE_TIMEOUT = 4.0
+
+
+class RemoteDatabase:
+    """worker 进程中的数据库代理，消息写入直接转交，其它方法通过请求在协调进程中执行"""
+
+    def __init__(self, channel: WorkerChannel):
+        self.channel = channel
+        self.db_path = Path("data") / "botshepherd.db"
+        self._pending_saves: List[tuple] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def save_message(self, message_data: Dict[str, Any], direction: str, connection_id: str = None):
+        """保存消息到数据库（不等待写入结果，与本地写队列一致），按批发给协调进程"""
+        if message_data.get("post_type") not in SAVED_POST_TYPES:
+            return
+        self._pending_saves.append((message_data, direction, connection_id))
+        if len(self._pending_saves) >= DB_SAVE_BATCH_SIZE:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(DB_SAVE_BATCH_INTERVAL, self.flush)
+
+    def flush(self):
+        """把攒下的消息写入发给协调进程"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending_saves:
+            batch, self._pending_saves = self._pending_saves, []
+            self.channel.notify("db_save_batch", batch)
+
+    def get_database_size(self) -> int:
+        """获取数据库文件大小（单位：字节）"""
+        try:
+            return self.db_path.stat().st_size if self.db_path.exists() else 0
+        except OSError:
+            return 0
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.channel.request("db_call", (name, args, kwargs))
+        return call
+
+
+class WorkerConfigManager(ConfigManager):
+    """worker 进程的配置管理器，不直接写盘，变更交给协调进程保存"""
+
+    def __init__(self, channel: WorkerChannel):
+        super().__init__()
+        self.channel = channel
+        self.add_change_listener(self._forward_change)
+
+    def _start_auto_save_task(self):
+        self._auto_save_task = asyncio.create_task(self._auto_save_loop(WORKER_FLUSH_INTERVAL))
+
+    def _forward_change(self, kind: str, key: Optional[str], config: Optional[Dict[str, Any]]):
+        # 账号、群组的修改很频繁（发送计数等），按脏数据批量同步；删除立即同步
+        if kind in ("global", "connection") or config is None:
+            self.channel.notify("config", (kind, key, config))
+
+    def _save_global_config_sync(self, notify: bool = True):
+        if notify:
+            self._notify_change("global", None, self._global_config)
+
+    async def flush_dirty_configs(self):
+        changes = []
+        for account_id in list(self._dirty_accounts):
+            if account_id in self._account_configs:
+                changes.append(("account", account_id, self._account_configs[account_id]))
+        for group_id in list(self._dirty_groups):
+            if group_id in self._group_configs:
+                changes.append(("group", group_id, self._group_configs[group_id]))
+        self._dirty_accounts.clear()
+        self._dirty_groups.clear()
+        if changes:
+            self.channel.notify("config_batch", changes)
+
+
+class Worker:
+    """单个 worker 进程"""
+
+    def __init__(self, index: int, connection_ids: List[str], conn):
+        self.index = index
+        self.connection_ids = connection_ids
+        self.conn = conn
+        self.channel: Optional[WorkerChannel] = None
+        self.config_manager: Optional[WorkerConfigManager] = None
+        self.proxy_server: Optional[ProxyServer] = None
+        self.database: Optional[RemoteDatabase] = None
+        self.logger = None
+        self._stop_event = asyncio.Event()
+
+    async def run(self):
+        self.channel = WorkerChannel(self.conn, self._handle, on_close=self._stop_event.set)
+        self.config_manager = WorkerConfigManager(self.channel)
+        await self.config_manager.initialize()
+
+        global_config = self.config_manager.get_global_config()
+        self.logger = BSLogger(global_config, log_dir=Path("logs") / f"worker-{self.index}")
+        self.config_manager.set_logger(self.logger)
+        self.channel.logger = self.logger
+        json_codec.select_codec(global_config.get("json_codec", "auto"))
+        set_reboot_hooks(delegate=self._delegate_reboot)
+
+        from ..commands import initialize_builtin_commands, load_plugins
+        initialize_builtin_commands(self.logger)
+        load_plugins(self.logger)
+
+        self.database = RemoteDatabase(self.channel)
+        self.proxy_server = ProxyServer(
+            config_manager=self.config_manager,
+            database_manager=self.database,
+            logger=self.logger,
+            backup_manager=BackupManager(config_dir="./config", backup_dir="./config/backup"),
+            connection_ids=self.connection_ids,
+        )
+        self.logger.info(f"worker {self.index} 已启动，负责连接: {', '.join(self.connection_ids) or '无'}")
+
+        # 初始化完成后再开始处理协调进程的消息，之前的消息在管道中等待
+        self.channel.start()
+        proxy_task = asyncio.create_task(self.proxy_server.start())
+        status_task = asyncio.create_task(self._report_status())
+        await self._stop_event.wait()
+
+        self.logger.info(f"worker {self.index} 正在停止...")
+        status_task.cancel()
+        await self.proxy_server.stop()
+        proxy_task.cancel()
+        for task in (status_task, proxy_task):
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        # 把未发出的消息写入和未同步的账号、群组配置交给协调进程
+        self.database.flush()
+        await self.config_manager.shutdown()
+        self.channel.close()
+
+    async def _report_status(self):
+        while True:
+            statuses = self.proxy_server.get_connection_statuses()
+            online = {
+                connection_id: connection.self_id
+                for connection_id, connection in list(self.proxy_server.active_connections.items())
+            }
+            if not self.channel.notify("status", {"statuses": statuses, "online": online}):
+                return
+            await asyncio.sleep(STATUS_INTERVAL)
+
+    async def _handle(self, kind: str, body: Any):
+        if kind == "config":
+            await self.config_manager.apply_change(*body, persist=False)
+        elif kind == "restart":
+            await self.proxy_server.restart_connection(body)
+        elif kind == "check_online":
+            return await self.proxy_server.check_account_online_status(body, WORKER_CHECK_ONLINE_TIMEOUT)
+        elif kind == "stop":
+            self._stop_event.set()
+
+    async def _delegate_reboot(self):
+        self.channel.notify("reboot")
+
+
+def run_worker(index: int, connection_ids: List[str], conn, loop_name: str = event_loop.LOOP_ASYNCIO):
+    """worker 进程入口，使用与协调进程相同的事件循环"""
+    # Ctrl+C 由协调进程处理，再通知 worker 停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        event_loop.run(Worker(index, connection_ids, conn).run(), loop_name)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,184 @@
+"""
+协调进程与 worker 进程之间的通信通道
+基于 multiprocessing.Pipe，后台线程阻塞读取后交回事件循环，发送同样交给后台线程，
+对端处理不过来、管道写满时不会卡住事件循环；通知按到达顺序逐条处理，请求另开任务处理并回复结果
+"""
+
+import asyncio
+import itertools
+import queue
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+# 请求默认超时（秒）
+DEFAULT_REQUEST_TIMEOUT = 30.0
+# 关闭通道时等待发送线程写完积压消息的时间（秒）
+CLOSE_FLUSH_TIMEOUT = 5.0
+
+_REPLY = "reply"
+_CLOSED = object()
+
+# handler(kind, body) -> 请求的结果，通知的返回值被忽略
+Handler = Callable[[str, Any], Awaitable[Any]]
+
+
+class ChannelClosed(Exception):
+    """对端已退出"""
+
+
+class WorkerChannel:
+    """一端的通信通道，两端代码相同"""
+
+    def __init__(self, conn, handler: Handler, logger=None, on_close: Optional[Callable[[], None]] = None):
+        self.conn = conn
+        self.handler = handler
+        self.logger = logger
+        self.on_close = on_close
+        self.closed = False
+        # 发送队列由发送线程逐条写入管道，事件循环和 Web 线程中的发送都只入队
+        self._outbox: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._inbox: Optional[asyncio.Queue] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed_event: Optional[asyncio.Event] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+        self._closed_event = asyncio.Event()
+        self._dispatch_task = asyncio.create_task(self._dispatch())
+        threading.Thread(target=self._read_loop, name="worker-channel-reader", daemon=True).start()
+        self._writer = threading.Thread(target=self._write_loop, name="worker-channel-writer", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            message = self._outbox.get()
+            if message is _CLOSED:
+                return
+            try:
+                self.conn.send(message)
+            except (OSError, ValueError):
+                # 对端已退出，由读线程收到 EOF 后标记关闭
+                return
+            except Exception as e:
+                # 无法序列化的消息跳过
+                if self.logger:
+                    self.logger.ws.error(f"进程间消息发送失败: {e}")
+
+    def _read_loop(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                message = _CLOSED
+            except Exception as e:
+                # 无法反序列化的消息跳过
+                if self.logger:
+                    self.logger.ws.error(f"进程间消息解析失败: {e}")
+                continue
+            try:
+                self._loop.call_soon_threadsafe(self._inbox.put_nowait, message)
+            except RuntimeError:
+                # 事件循环已关闭
+                return
+            if message is _CLOSED:
+                return
+
+    async def _dispatch(self):
+        while True:
+            message = await self._inbox.get()
+            if message is _CLOSED:
+                self._mark_closed()
+                return
+            kind, request_id, body = message
+            if kind == _REPLY:
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    ok, result = body
+                    if ok:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(RuntimeError(result))
+            elif request_id is None:
+                try:
+                    await self.handler(kind, body)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.ws.error(f"处理进程间通知 {kind} 失败: {e}")
+            else:
+                asyncio.create_task(self._answer(kind, request_id, body))
+
+    async def _answer(self, kind: str, request_id: int, body: Any):
+        try:
+            reply = (True, await self.handler(kind, body))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        try:
+            self._send((_REPLY, request_id, reply))
+        except ChannelClosed:
+            pass
+
+    def _send(self, message):
+        """入队后立即返回，由发送线程写入管道"""
+        if self.closed:
+            raise ChannelClosed()
+        self._outbox.put(message)
+
+    def notify(self, kind: str, body: Any = None) -> bool:
+        """发送通知，对端已退出时返回 False"""
+        try:
+            self._send((kind, None, body))
+            return True
+        except ChannelClosed:
+            return False
+
+    async def request(self, kind: str, body: Any = None, timeout: float = DEFAULT_REQUEST_TIMEOUT) -> Any:
+        """发送请求并等待结果"""
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._send((kind, request_id, body))
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _mark_closed(self):
+        if self.closed:
+            return
+        self.closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ChannelClosed())
+        self._pending.clear()
+        if self._closed_event is not None:
+            self._closed_event.set()
+        if self.on_close:
+            self.on_close()
+
+    async def wait_closed(self, timeout: float):
+        """等待对端退出且已收到的消息处理完"""
+        if self._closed_event is None:
+            return
+        try:
+            await asyncio.wait_for(self._closed_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def close(self):
+        self._mark_closed()
+        if self._dispatch_task is not None:
+            self._dispatch_task.cancel()
+        # 先让发送线程写完已入队的消息（如退出前同步的配置）
+        if self._writer is not None:
+            self._outbox.put(_CLOSED)
+            self._writer.join(CLOSE_FLUSH_TIMEOUT)
+        try:
+            self.conn.close()
+        except OSError:
+            pass
@@ -0,0 +1,245 @@
+"""
+多进程模式的协调端
+按连接配置把连接分给 N 个 worker 进程，数据库写入、Web 管理和配置落盘留在协调进程；
+对 Web 服务提供与 ProxyServer 相同的接口
+"""
+
+import asyncio
+import inspect
+import multiprocessing
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from ..utils.event_loop import get_loop_name
+from ..utils.reboot import reboot, set_reboot_hooks
+from .client_router import parse_client_endpoint
+from .worker import run_worker
+from .worker_channel import ChannelClosed, WorkerChannel
+
+
+# worker 意外退出后重新拉起前的等待时间（秒）
+RESPAWN_DELAY = 3
+# 停止时等待 worker 退出的时间（秒）
+STOP_TIMEOUT = 10
+# 在线状态检查的超时（秒），需小于 Web 接口等待的 5 秒，worker 内部检查本身 4 秒超时
+CHECK_ONLINE_TIMEOUT = 4.5
+
+
+class _WorkerHandle:
+    __slots__ = ("index", "connection_ids", "process", "channel", "statuses", "online")
+
+    def __init__(self, index: int, connection_ids: List[str]):
+        self.index = index
+        self.connection_ids = connection_ids
+        self.process = None
+        self.channel: Optional[WorkerChannel] = None
+        self.statuses: Dict[str, Dict[str, Any]] = {}
+        self.online: Dict[str, Any] = {}  # connection_id -> self_id
+
+
+class WorkerPool:
+    """worker 进程池"""
+
+    def __init__(self, config_manager, database_manager, logger, backup_manager=None, workers: int = 2):
+        self.config_manager = config_manager
+        self.database_manager = database_manager
+        self.logger = logger
+        self.backup_manager = backup_manager
+        self.worker_count = max(1, workers)
+        self.running = False
+
+        self.workers: List[_WorkerHandle] = []
+        self.assignments: Dict[str, int] = {}  # connection_id -> worker 序号
+        # 由 worker 上报，仅用于统计已连接数
+        self.active_connections: Dict[str, Any] = {}
+
+        # 使用 spawn，子进程不继承协调进程的事件循环和线程
+        self._context = multiprocessing.get_context("spawn")
+
+        # 本进程（Web 界面等）发生的配置变更同步给所有 worker
+        config_manager.add_change_listener(self._broadcast_change)
+        set_reboot_hooks(before=self.terminate_workers)
+
+    @staticmethod
+    def _listen_key(config: Dict[str, Any]):
+        try:
+            host, port, _ = parse_client_endpoint(config.get("client_endpoint", ""))
+            return host, port
+        except ValueError:
+            return None
+
+    def _shared_worker(self, connection_id: str) -> Optional[int]:
+        """同一端口的连接必须在同一个 worker 中共享监听"""
+        key = self._listen_key(self.config_manager.get_connection_config(connection_id) or {})
+        if key is None:
+            return None
+        for other_id, index in self.assignments.items():
+            other_config = self.config_manager.get_connection_config(other_id)
+            if other_id != connection_id and other_config and self._listen_key(other_config) == key:
+                return index
+        return None
+
+    def _assign(self):
+        """按配置文件顺序轮流分配连接，使用同一端口的连接分到同一个 worker"""
+        connection_ids = sorted(self.config_manager.get_connections_config())
+        self.workers = [_WorkerHandle(i, []) for i in range(self.worker_count)]
+        next_index = 0
+        for connection_id in connection_ids:
+            index = self._shared_worker(connection_id)
+            if index is None:
+                index = next_index % self.worker_count
+                next_index += 1
+            self.workers[index].connection_ids.append(connection_id)
+            self.assignments[connection_id] = index
+
+    def _spawn(self, handle: _WorkerHandle):
+        parent_conn, child_conn = self._context.Pipe()
+        handle.process = self._context.Process(
+            target=run_worker,
+            args=(handle.index, list(handle.connection_ids), child_conn, get_loop_name()),
+            name=f"BotShepherd-worker-{handle.index}",
+            daemon=True,
+        )
+        handle.process.start()
+        child_conn.close()
+        handle.statuses = {}
+        handle.online = {}
+        handle.channel = WorkerChannel(parent_conn, partial(self._handle, handle), logger=self.logger)
+        handle.channel.start()
+        self.logger.ws.info(f"worker {handle.index} 已启动 (pid {handle.process.pid})，负责 {len(handle.connection_ids)} 个连接")
+
+    async def start(self):
+        """启动所有 worker 并监视其运行"""
+        self.running = True
+        self._assign()
+        self.logger.ws.info(f"多进程模式: {self.worker_count} 个 worker 进程")
+        for handle in self.workers:
+            self._spawn(handle)
+
+        while self.running:
+            await asyncio.sleep(1)
+            for handle in self.workers:
+                if self.running and not handle.process.is_alive():
+                    self.logger.ws.error(f"worker {handle.index} 意外退出 (exitcode {handle.process.exitcode})，{RESPAWN_DELAY} 秒后重启")
+                    handle.channel.close()
+                    self._update_active()
+                    await asyncio.sleep(RESPAWN_DELAY)
+                    if self.running:
+                        self._spawn(handle)
+
+    async def _handle(self, handle: _WorkerHandle, kind: str, body: Any):
+        if kind == "db_save_batch":
+            for item in body:
+                await self.database_manager.save_message(*item)
+        elif kind == "db_call":
+            name, args, kwargs = body
+            result = getattr(self.database_manager, name)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        elif kind == "status":
+            handle.statuses = body["statuses"]
+            handle.online = body["online"]
+            self._update_active()
+        elif kind == "config":
+            await self._apply_worker_changes(handle, [body])
+        elif kind == "config_batch":
+            await self._apply_worker_changes(handle, body)
+        elif kind == "reboot":
+            asyncio.create_task(reboot(wait_seconds=0))
+
+    async def _apply_worker_changes(self, origin: _WorkerHandle, changes):
+        """保存 worker 发来的配置变更，并转发给其它 worker"""
+        for kind, key, config in changes:
+            try:
+                await self.config_manager.apply_change(kind, key, config)
+            except Exception as e:
+                self.logger.ws.error(f"应用 worker {origin.index} 的配置变更失败 ({kind} {key}): {e}")
+                continue
+            for handle in self.workers:
+                if handle is not origin and handle.channel is not None:
+                    handle.channel.notify("config", (kind, key, config))
+
+    def _broadcast_change(self, kind: str, key: Optional[str], config: Optional[Dict[str, Any]]):
+        for handle in self.workers:
+            if handle.channel is not None:
+                handle.channel.notify("config", (kind, key, config))
+
+    def _update_active(self):
+        active = {}
+        for handle in self.workers:
+            if handle.channel is not None and not handle.channel.closed:
+                active.update(handle.online)
+        self.active_connections = active
+
+    def get_connection_statuses(self):
+        """汇总各 worker 上报的连接状态"""
+        statuses = {}
+        for handle in self.workers:
+            for connection_id, status in handle.statuses.items():
+                status = dict(status)
+                status['worker'] = handle.index
+                statuses[connection_id] = status
+        return statuses
+
+    async def restart_connection(self, connection_id: str):
+        """在负责该连接的 worker 中重启连接，新连接分给负责连接最少的 worker"""
+        index = self.assignments.get(connection_id)
+        if index is None:
+            index = self._shared_worker(connection_id)
+        if index is None:
+            handle = min(self.workers, key=lambda h: len(h.connection_ids))
+            handle.connection_ids.append(connection_id)
+            self.assignments[connection_id] = handle.index
+        else:
+            handle = self.workers[index]
+            if connection_id not in handle.connection_ids:
+                handle.connection_ids.append(connection_id)
+                self.assignments[connection_id] = index
+        if handle.channel is None or not handle.channel.notify("restart", connection_id):
+            self.logger.ws.warning(f"[{connection_id}] worker {handle.index} 未运行，无法重启连接")
+
+    async def check_account_online_status(self, account_id: int) -> bool:
+        """转交给该账号所在的 worker 检查"""
+        for handle in self.workers:
+            if account_id in handle.online.values() and handle.channel is not None:
+                try:
+                    return bool(await handle.channel.request("check_online", account_id, timeout=CHECK_ONLINE_TIMEOUT))
+                except (ChannelClosed, asyncio.TimeoutError, RuntimeError) as e:
+                    self.logger.ws.warning(f"检查账号{account_id}在线状态失败: {e}")
+                    return False
+        self.logger.ws.debug(f"账号{account_id}没有匹配的连接，返回离线")
+        return False
+
+    def terminate_workers(self):
+        """同步停止所有 worker，用于替换进程前"""
+        self.running = False
+        for handle in self.workers:
+            if handle.channel is not None:
+                handle.channel.notify("stop")
+        for handle in self.workers:
+            if handle.process is not None:
+                handle.process.join(STOP_TIMEOUT)
+                if handle.process.is_alive():
+                    handle.process.terminate()
+
+    async def stop(self):
+        """通知所有 worker 停止，等待其把未同步的配置交回后退出"""
+        self.running = False
+        self.logger.ws.info("正在停止 worker 进程...")
+        for handle in self.workers:
+            if handle.channel is not None:
+                handle.channel.notify("stop")
+        for handle in self.workers:
+            if handle.process is None:
+                continue
+            await asyncio.to_thread(handle.process.join, STOP_TIMEOUT)
+            if handle.process.is_alive():
+                self.logger.ws.warning(f"worker {handle.index} 停止超时，强制结束")
+                handle.process.terminate()
+        for handle in self.workers:
+            if handle.channel is not None:
+                # 处理完 worker 退出前发来的消息（配置、消息记录）再关闭
+                await handle.channel.wait_closed(timeout=1)
+                handle.channel.close()
+        self.active_connections = {}
@@ -0,0 +1,53 @@
+"""
+事件循环选择
+默认使用 asyncio 自带的事件循环；指定 uvloop 且已安装（仅 Linux/macOS）时改用 uvloop，
+否则回退默认事件循环。事件循环必须在 asyncio.run 之前确定，所以入口处直接读取配置文件
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Coroutine, Optional
+
+
+LOOP_ASYNCIO = "asyncio"
+LOOP_UVLOOP = "uvloop"
+LOOP_NAMES = (LOOP_ASYNCIO, LOOP_UVLOOP)
+
+
+def _import_uvloop():
+    if sys.platform == "win32":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop
+
+
+def configured_loop(config_file: str = "config/global_config.json") -> str:
+    """读取全局配置中的 event_loop，文件不存在或无法解析时返回默认值"""
+    try:
+        with open(Path(config_file), "r", encoding="utf-8") as f:
+            name = json.load(f).get("event_loop", LOOP_ASYNCIO)
+    except (OSError, ValueError, AttributeError):
+        return LOOP_ASYNCIO
+    return name if name in LOOP_NAMES else LOOP_ASYNCIO
+
+
+def run(main: Coroutine[Any, Any, Any], name: Optional[str] = LOOP_ASYNCIO) -> Any:
+    """在指定的事件循环中运行协程，uvloop 不可用时使用默认事件循环"""
+    uvloop = _import_uvloop() if name == LOOP_UVLOOP else None
+    if uvloop is None:
+        return asyncio.run(main)
+    if sys.version_info >= (3, 12):
+        return asyncio.run(main, loop_factory=uvloop.new_event_loop)
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(main)
+
+
+def get_loop_name() -> str:
+    """当前运行中的事件循环实现"""
+    loop = asyncio.get_running_loop()
+    return LOOP_UVLOOP if type(loop).__module__.startswith("uvloop") else LOOP_ASYNCIO
@@ -0,0 +1,120 @@
+"""
+平滑重启（监听套接字交接）
+重启时不直接替换进程，而是先启动新进程，经 Unix 套接字把所有监听套接字传给它。
+新进程在同一批套接字上开始监听后，旧进程停止接受新连接，处理完在途消息、清空数据库写队列后退出。
+期间端口一直可连接，协议端重连会立即被新进程接受，不会遇到连接被拒绝后的退避等待。
+
+已建立的 WebSocket 会话无法交接：握手状态和 permessage-deflate 压缩上下文都在旧进程的内存里，
+所以旧进程以 1012 (Service Restart) 关闭客户端连接，由客户端重连到新进程；目标框架同样会看到一次重连
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from .reboot import python_command
+
+
+RESTART_EXEC = "exec"          # 直接替换进程（默认）
+RESTART_HANDOVER = "handover"  # 交接监听套接字后退出
+RESTART_MODES = (RESTART_EXEC, RESTART_HANDOVER)
+
+# 新进程通过该环境变量找到交接用的 Unix 套接字
+HANDOVER_ENV = "BOTSHEPHERD_HANDOVER"
+# 等待新进程连上交接套接字的时间（秒）
+CONNECT_TIMEOUT = 30
+# 等待新进程完成初始化并开始监听的时间（秒）
+READY_TIMEOUT = 60
+READY_MESSAGE = b"ready"
+MAX_FDS = 256
+
+# (类别, 监听地址, 套接字)，类别为 proxy 或 web
+Listener = Tuple[str, Tuple[Any, ...], Any]
+
+# 新进程中收到的套接字：类别 -> 监听地址 -> 套接字列表
+_inherited: Dict[str, Dict[Tuple[Any, ...], List[socket.socket]]] = {}
+_channel = None
+
+
+class HandoverError(Exception):
+    """交接失败，调用方应改为直接重启"""
+
+
+def supported() -> bool:
+    return sys.platform != "win32" and hasattr(socket, "send_fds")
+
+
+def hand_over(listeners: List[Listener]) -> subprocess.Popen:
+    """启动新进程并把监听套接字交给它，新进程开始监听后返回（阻塞调用）"""
+    directory = tempfile.mkdtemp(prefix="botshepherd-")
+    path = os.path.join(directory, "handover.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    process = None
+    try:
+        server.bind(path)
+        server.listen(1)
+        server.settimeout(CONNECT_TIMEOUT)
+        process = subprocess.Popen(python_command(), env={**os.environ, HANDOVER_ENV: path})
+
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            raise HandoverError(f"新进程 {CONNECT_TIMEOUT} 秒内未连接")
+        with conn:
+            conn.settimeout(READY_TIMEOUT)
+            meta = json.dumps([[kind, list(key)] for kind, key, _ in listeners]).encode("utf-8")
+            socket.send_fds(conn, [meta], [sock.fileno() for _, _, sock in listeners])
+            try:
+                reply = conn.recv(len(READY_MESSAGE))
+            except socket.timeout:
+                raise HandoverError(f"新进程 {READY_TIMEOUT} 秒内未开始监听")
+            if reply != READY_MESSAGE:
+                raise HandoverError(f"新进程异常退出 (exitcode {process.poll()})")
+        return process
+    except BaseException:
+        if process is not None and process.poll() is None:
+            process.terminate()
+        raise
+    finally:
+        server.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def receive_sockets() -> bool:
+    """新进程启动时接收旧进程的监听套接字，不是由平滑重启启动时返回 False"""
+    global _channel
+    path = os.environ.pop(HANDOVER_ENV, None)
+    if not path:
+        return False
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(CONNECT_TIMEOUT)
+    conn.connect(path)
+    meta, fds, _, _ = socket.recv_fds(conn, 65536, MAX_FDS)
+    for (kind, key), fd in zip(json.loads(meta.decode("utf-8")), fds):
+        _inherited.setdefault(kind, {}).setdefault(tuple(key), []).append(socket.socket(fileno=fd))
+    _channel = conn
+    return True
+
+
+def take_sockets(kind: str) -> Dict[Tuple[Any, ...], List[socket.socket]]:
+    """取出某一类别的监听套接字，每类只能取一次"""
+    return _inherited.pop(kind, {})
+
+
+def notify_ready():
+    """告诉旧进程新进程已开始监听，旧进程随后退出"""
+    global _channel
+    if _channel is None:
+        return
+    try:
+        _channel.sendall(READY_MESSAGE)
+    except OSError:
+        pass
+    finally:
+        _channel.close()
+        _channel = None
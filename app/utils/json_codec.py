@@ -0,0 +1,174 @@
+"""
+JSON 编解码
+启动时选择实现：优先 orjson / msgspec，未安装时回退标准库 json。
+所有实现输出一致：保留非 ASCII 字符、紧凑分隔符、非字符串键转为字符串、NaN/Infinity 输出为 null；
+序列化时快速实现处理不了的值（超过 64 位的整数等）自动交给标准库，行为与标准库相同。
+与直接调用 json.dumps 相比有两处有意的差异：不输出 ", " 和 ": " 中的空格，
+不输出 NaN/Infinity 这类非标准 JSON（orjson、msgspec 只能输出 null，标准库随之统一，客户端按标准 JSON 解析不会出错）。
+"""
+
+import json
+import math
+from typing import Any, Callable, Dict, Optional
+
+
+CODEC_AUTO = "auto"
+CODEC_ORJSON = "orjson"
+CODEC_MSGSPEC = "msgspec"
+CODEC_STDLIB = "json"
+CODEC_NAMES = (CODEC_AUTO, CODEC_ORJSON, CODEC_MSGSPEC, CODEC_STDLIB)
+
+# auto 模式下的尝试顺序
+_AUTO_ORDER = (CODEC_ORJSON, CODEC_MSGSPEC, CODEC_STDLIB)
+
+_SEPARATORS = (",", ":")
+
+
+def _finite(obj: Any) -> Any:
+    """把 NaN/Infinity 替换为 None 后的副本"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+class StdlibCodec:
+    """标准库实现，也是其它实现的兜底"""
+    name = CODEC_STDLIB
+
+    def dumps(self, obj: Any, default: Optional[Callable] = None, sort_keys: bool = False) -> str:
+        try:
+            return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS, allow_nan=False,
+                              default=default, sort_keys=sort_keys)
+        except ValueError:
+            # 含 NaN/Infinity 时很少见，替换为 null 后重试，与 orjson、msgspec 的输出一致
+            return json.dumps(_finite(obj), ensure_ascii=False, separators=_SEPARATORS,
+                              default=default, sort_keys=sort_keys)
+
+    def loads(self, data) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(StdlibCodec):
+    """orjson 实现"""
+    name = CODEC_ORJSON
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        # datetime/dataclass 交给 default 处理，与标准库一致（标准库不会直接序列化它们）
+        self._option = (orjson.OPT_NON_STR_KEYS
+                        | orjson.OPT_PASSTHROUGH_DATETIME
+                        | orjson.OPT_PASSTHROUGH_DATACLASS)
+        self._sorted_option = self._option | orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj: Any, default: Optional[Callable] = None, sort_keys: bool = False) -> str:
+        try:
+            return self._orjson.dumps(
+                obj, default=default, option=self._sorted_option if sort_keys else self._option
+            ).decode("utf-8")
+        except TypeError:
+            # orjson.JSONEncodeError 是 TypeError 的子类
+            return super().dumps(obj, default=default, sort_keys=sort_keys)
+
+    def loads(self, data) -> Any:
+        # 注意 orjson 会把超过 64 位的整数解析为 float，OneBot 的各类 ID 都在 int64 范围内
+        try:
+            return self._orjson.loads(data)
+        except ValueError:
+            # 非法 JSON 由标准库抛出 json.JSONDecodeError，调用方无需区分实现
+            return super().loads(data)
+
+
+class MsgspecCodec(StdlibCodec):
+    """msgspec 实现"""
+    name = CODEC_MSGSPEC
+
+    def __init__(self):
+        import msgspec
+        self._msgspec = msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._sorted_encoder = msgspec.json.Encoder(order="sorted")
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any, default: Optional[Callable] = None, sort_keys: bool = False) -> str:
+        if default is not None:
+            # msgspec 会直接序列化 datetime 等类型而不经过 default，需要 default 时用标准库
+            return super().dumps(obj, default=default, sort_keys=sort_keys)
+        encoder = self._sorted_encoder if sort_keys else self._encoder
+        try:
+            return encoder.encode(obj).decode("utf-8")
+        except (TypeError, ValueError, self._msgspec.EncodeError):
+            return super().dumps(obj, sort_keys=sort_keys)
+
+    def loads(self, data) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except (ValueError, self._msgspec.DecodeError):
+            return super().loads(data)
+
+
+_CODEC_CLASSES = {
+    CODEC_ORJSON: OrjsonCodec,
+    CODEC_MSGSPEC: MsgspecCodec,
+    CODEC_STDLIB: StdlibCodec,
+}
+
+
+def create_codec(name: str) -> StdlibCodec:
+    """创建指定实现，依赖未安装时抛出 ImportError"""
+    if name not in _CODEC_CLASSES:
+        raise ValueError(f"未知的 JSON 实现: {name}")
+    return _CODEC_CLASSES[name]()
+
+
+def available_codecs() -> Dict[str, StdlibCodec]:
+    """当前环境可用的全部实现"""
+    codecs = {}
+    for name in _AUTO_ORDER:
+        try:
+            codecs[name] = create_codec(name)
+        except ImportError:
+            continue
+    return codecs
+
+
+def _resolve(name: str) -> StdlibCodec:
+    if name != CODEC_AUTO:
+        try:
+            return create_codec(name)
+        except (ImportError, ValueError):
+            pass
+    for candidate in _AUTO_ORDER:
+        try:
+            return create_codec(candidate)
+        except ImportError:
+            continue
+    return StdlibCodec()
+
+
+_codec: StdlibCodec = _resolve(CODEC_AUTO)
+
+
+def select_codec(name: str = CODEC_AUTO) -> str:
+    """选择全局使用的实现，指定的实现不可用时按 auto 顺序回退，返回实际使用的实现名"""
+    global _codec
+    _codec = _resolve(name or CODEC_AUTO)
+    return _codec.name
+
+
+def get_codec_name() -> str:
+    return _codec.name
+
+
+def dumps(obj: Any, default: Optional[Callable] = None, sort_keys: bool = False) -> str:
+    """序列化为字符串，保留非 ASCII 字符"""
+    return _codec.dumps(obj, default=default, sort_keys=sort_keys)
+
+
+def loads(data) -> Any:
+    """反序列化，非法 JSON 抛出 json.JSONDecodeError"""
+    return _codec.loads(data)
@@ -5,13 +5,13 @@ from datetime import datetime
 
 class BSLogger:
 
-    def __init__(self, global_config=None):
+    def __init__(self, global_config=None, log_dir="logs"):
         # 1. 设置和解析配置
         self._setup_config(global_config)
 
         # 2. 创建根日志目录
-        self.log_dir = Path("logs")
-        self.log_dir.mkdir(exist_ok=True)
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
 
         # 3. 配置主日志记录器 ("BotShepherd")
         self._setup_main_logger()
@@ -0,0 +1,120 @@
+"""
+日志用的消息摘要
+边遍历边截断，base64 内容只记录长度，几 MB 的图片消息也不会被整体转成字符串；
+log_payload 先判断日志级别，未启用时完全不格式化
+"""
+
+import logging
+from typing import Any, List
+
+
+# 日志中单条消息的默认最大长度
+DEFAULT_PAYLOAD_LIMIT = 1000
+
+_BASE64_PREFIX = "base64://"
+_TRUNCATED = "...[truncated]"
+
+
+def _size_marker(length: int) -> str:
+    if length >= 1024 * 1024:
+        return f"base64://<{length / 1024 / 1024:.1f}MB>"
+    if length >= 1024:
+        return f"base64://<{length / 1024:.1f}KB>"
+    return f"base64://<{length}B>"
+
+
+class _Writer:
+    """带长度预算的输出缓冲"""
+    __slots__ = ("parts", "remaining")
+
+    def __init__(self, limit: int):
+        self.parts: List[str] = []
+        self.remaining = limit
+
+    @property
+    def full(self) -> bool:
+        return self.remaining <= 0
+
+    def write(self, text: str):
+        if self.remaining <= 0:
+            return
+        if len(text) > self.remaining:
+            text = text[:self.remaining]
+        self.parts.append(text)
+        self.remaining -= len(text)
+
+
+def _write_text(writer: _Writer, text: str, quote: bool):
+    """写入字符串，base64 内容替换为长度标记，只扫描预算以内的部分"""
+    if quote:
+        writer.write("'")
+    pos = 0
+    length = len(text)
+    while pos < length and not writer.full:
+        idx = text.find(_BASE64_PREFIX, pos, pos + writer.remaining + len(_BASE64_PREFIX))
+        if idx < 0:
+            writer.write(text[pos:pos + writer.remaining])
+            pos = length
+            break
+        writer.write(text[pos:idx])
+        # 解析后的字符串中 base64 一直到结尾，原始 JSON 文本中则到下一个引号
+        end = length if quote else text.find('"', idx)
+        if end < 0:
+            end = length
+        writer.write(_size_marker(end - idx - len(_BASE64_PREFIX)))
+        pos = end
+    if quote:
+        writer.write("'")
+
+
+def _write(writer: _Writer, obj: Any):
+    if writer.full:
+        return
+    if isinstance(obj, str):
+        _write_text(writer, obj, quote=True)
+    elif isinstance(obj, dict):
+        writer.write("{")
+        first = True
+        for key, value in obj.items():
+            if writer.full:
+                return
+            if not first:
+                writer.write(", ")
+            first = False
+            writer.write(f"'{key}': " if isinstance(key, str) else f"{key!r}: ")
+            _write(writer, value)
+        writer.write("}")
+    elif isinstance(obj, (list, tuple)):
+        writer.write("[")
+        for i, item in enumerate(obj):
+            if writer.full:
+                return
+            if i:
+                writer.write(", ")
+            _write(writer, item)
+        writer.write("]")
+    elif isinstance(obj, (bytes, bytearray)):
+        writer.write(f"<{len(obj)} bytes>")
+    else:
+        writer.write(repr(obj))
+
+
+def format_payload(payload: Any, limit: int = DEFAULT_PAYLOAD_LIMIT) -> str:
+    """生成不超过 limit 个字符的摘要（另加截断标记），原始 JSON 文本和解析后的结构都可以"""
+    writer = _Writer(limit)
+    if isinstance(payload, str):
+        # 原始帧按文本处理，不加引号
+        _write_text(writer, payload, quote=False)
+        truncated = writer.full and len(payload) > limit
+    else:
+        _write(writer, payload)
+        truncated = writer.full
+    text = "".join(writer.parts)
+    return text + _TRUNCATED if truncated else text
+
+
+def log_payload(logger: logging.Logger, level: int, message: str, payload: Any,
+                limit: int = DEFAULT_PAYLOAD_LIMIT):
+    """按级别记录带消息摘要的日志，级别未启用时直接返回"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message + format_payload(payload, limit))
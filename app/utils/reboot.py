@@ -6,6 +6,30 @@ from ..onebotv11.api_handler import ApiHandler
 
 REBOOT_RECORD = "data/.reboot"
 
+# 多进程模式下的重启回调：协调进程在替换进程前先停止 worker，
+# worker 进程不替换自身，把重启交给协调进程
+_before_reboot = None
+_reboot_delegate = None
+# 平滑重启回调：返回 True 表示已交给新进程，本进程稍后自行退出
+_reboot_handover = None
+
+
+def set_reboot_hooks(before=None, delegate=None, handover=None):
+    """设置重启回调，before 为同步函数，delegate 和 handover 为协程函数"""
+    global _before_reboot, _reboot_delegate, _reboot_handover
+    _before_reboot = before
+    _reboot_delegate = delegate
+    _reboot_handover = handover
+
+
+def python_command() -> list:
+    """重新启动本程序使用的命令，优先使用虚拟环境"""
+    if sys.platform == "win32" and os.path.exists("./venv/Scripts/python.exe"):
+        return ["venv/Scripts/python.exe"] + sys.argv
+    elif os.path.exists("./venv/bin/python"):
+        return ["venv/bin/python"] + sys.argv
+    return [sys.executable] + sys.argv
+
 def is_rebooting():
     """检查是否正在重启"""
     return os.path.exists(REBOOT_RECORD)
@@ -24,12 +48,15 @@ async def reboot(event = None, wait_seconds: int = 3):
             print(f"记录重启数据失败: {e}")
     
     await asyncio.sleep(wait_seconds)
-    if sys.platform == "win32" and os.path.exists("./venv/Scripts/python.exe"):
-        os.execv("venv/Scripts/python.exe", ["venv/Scripts/python.exe"] + sys.argv)
-    elif os.path.exists("./venv/bin/python"):
-        os.execv("venv/bin/python", ["venv/bin/python"] + sys.argv)
-    else:
-        os.execv(sys.executable, ['python'] + sys.argv)
+    if _reboot_delegate is not None:
+        await _reboot_delegate()
+        return
+    if _reboot_handover is not None and await _reboot_handover():
+        return
+    if _before_reboot is not None:
+        _before_reboot()
+    command = python_command()
+    os.execv(command[0], command)
 
 
 async def read_reboot_record():
@@ -13,13 +13,16 @@ import time
 import concurrent.futures
 from datetime import datetime, timedelta, timezone
 from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import requests
-from waitress import serve
+from waitress import create_server
+from waitress.server import BaseWSGIServer
 import threading
 
 from app.utils.reboot import reboot
 from app.utils.backup_manager import get_or_create_backup_password
+from app.utils import handover, json_codec
 
 
 PBKDF2_ITERATIONS = 200000
@@ -93,6 +96,23 @@ def _load_or_create_secret_key() -> str:
         return secrets.token_hex(32)
 
 
+class CodecJSONProvider(DefaultJSONProvider):
+    """jsonify 使用与代理相同的 JSON 实现，键排序和 datetime 等类型的处理与 Flask 默认一致"""
+
+    def dumps(self, obj, **kwargs):
+        if "indent" in kwargs:
+            # 调试模式下的格式化输出仍交给标准库
+            return super().dumps(obj, **kwargs)
+        return json_codec.dumps(
+            obj,
+            default=kwargs.get("default", self.default),
+            sort_keys=kwargs.get("sort_keys", self.sort_keys),
+        )
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
+
 class WebServer:
     """Web服务器"""
     
@@ -103,12 +123,15 @@ class WebServer:
         self.logger = logger
         self.port = port
         self.loop = loop
+        self._listen_host = None
+        self._server_map = {}  # waitress 的 socket map，用于找到监听套接字
         
         # 创建Flask应用
         self.app = Flask(__name__, 
                         template_folder="../../templates",
                         static_folder="../../static")
         self.app.secret_key = _load_or_create_secret_key()
+        self.app.json = CodecJSONProvider(self.app)
 
         # Waitress 使用多线程，登录失败记录需要加锁保护。
         self._login_attempts = {}
@@ -554,6 +577,11 @@ class WebServer:
 
                 # 获取原配置以比较
                 old_config = self.config_manager.get_connection_config(connection_id)
+
+                # 网页端只提交基础字段，保留原配置中的高级字段（如 send_queue），避免保存时被清掉
+                if old_config:
+                    for key, value in old_config.items():
+                        config.setdefault(key, value)
                 old_enabled = old_config.get('enabled', False) if old_config else False
                 old_targets = old_config.get('target_endpoints', []) if old_config else []
                 new_enabled = config.get('enabled', False)
@@ -568,13 +596,19 @@ class WebServer:
                 # 1. enabled状态发生变化
                 # 2. 目标端点发生变化
                 # 3. 客户端端点发生变化（需要重启监听）
+                # 4. 高级字段发生变化（如 send_queue）
                 old_client_endpoint = old_config.get('client_endpoint', '') if old_config else ''
                 new_client_endpoint = config.get('client_endpoint', '')
+                advanced_changed = bool(old_config) and any(
+                    old_config.get(key) != value for key, value in config.items()
+                    if key not in ('name', 'description', 'enabled', 'client_endpoint', 'target_endpoints')
+                )
 
                 needs_restart = (
                     old_enabled != new_enabled or
                     old_targets != new_targets or
-                    old_client_endpoint != new_client_endpoint
+                    old_client_endpoint != new_client_endpoint or
+                    advanced_changed
                 )
 
                 if needs_restart and hasattr(self, 'proxy_server') and self.proxy_server:
@@ -1651,10 +1685,23 @@ class WebServer:
         # 先完成密码迁移，再对外接受登录请求。
         await self._migrate_web_password()
         
+        # 平滑重启时使用旧进程交来的监听套接字，地址已修改时重新监听
+        web_host = self.config_manager.get_global_config().get('web_host', '0.0.0.0')
+        inherited = handover.take_sockets("web")
+        sockets = inherited.pop((web_host, self.port), None)
+        for others in inherited.values():
+            for sock in others:
+                sock.close()
+        self._listen_host = web_host
+
         # 在单独线程中运行Flask应用
         def run_server():
-            web_host = self.config_manager.get_global_config().get('web_host', '0.0.0.0')
-            serve(self.app, host=web_host, port=self.port, threads=4)
+            if sockets:
+                server = create_server(self.app, map=self._server_map, sockets=sockets, threads=4)
+            else:
+                server = create_server(self.app, map=self._server_map, host=web_host, port=self.port, threads=4)
+            server.print_listen("Serving on http://{}:{}")
+            server.run()
         
         self.server_thread = threading.Thread(target=run_server, daemon=True)
         self.server_thread.start()
@@ -1665,6 +1712,14 @@ class WebServer:
         while self.running:
             await asyncio.sleep(1)
     
+    def listen_sockets(self):
+        """Web 监听套接字，平滑重启时交给新进程"""
+        sockets = [
+            server.socket for server in list(self._server_map.values())
+            if isinstance(server, BaseWSGIServer)
+        ]
+        return {(self._listen_host, self.port): sockets} if sockets else {}
+
     async def stop(self):
         """停止Web服务器"""
         self.running = False
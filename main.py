@@ -25,9 +25,12 @@ def import_app_modules():
     from app.config.config_manager import ConfigManager
     from app.database.database_manager import DatabaseManager
     from app.server.proxy_server import ProxyServer
+    from app.server.worker_pool import WorkerPool
     from app.web_api.web_server import WebServer
     from app.utils.logger import BSLogger
     from app.utils.backup_manager import BackupManager, get_or_create_backup_password
+    from app.utils import json_codec, event_loop, handover
+    from app.utils.reboot import set_reboot_hooks
     from app.commands import initialize_builtin_commands, load_plugins
     from app import __version__, __github__, __description__
     globals().update(locals())
@@ -45,7 +48,9 @@ if not success and import_err:
 class BotShepherd:
     """BotShepherd主应用类"""
 
-    def __init__(self):
+    def __init__(self, workers=None, loop_name=None):
+        self.workers = workers  # 命令行指定的 worker 进程数，None 时读取全局配置
+        self.loop_name = loop_name  # 要求使用的事件循环，实际是否生效见启动日志
         self.config_manager = None
         self.database_manager = None
         self.proxy_server = None
@@ -56,6 +61,8 @@ class BotShepherd:
         self.shutdown_event = None
         self._shutdown_in_progress = False
         self._backup_task = None
+        self._loop = None
+        self._inherited_listeners = False  # 由平滑重启启动，监听套接字来自旧进程
         
     async def initialize(self):
         """初始化系统组件"""
@@ -77,6 +84,24 @@ class BotShepherd:
             self.logger.info(f"仓库：{__github__}")
             self.logger.info(f"{__description__}")
 
+            # 选择 JSON 实现，指定的实现未安装时自动回退
+            codec_name = self.config_manager.get_global_config().get("json_codec", "auto")
+            self.logger.info(f"JSON 实现: {json_codec.select_codec(codec_name)}")
+
+            # 事件循环在 asyncio.run 之前已确定，这里只记录结果
+            loop_name = event_loop.get_loop_name()
+            self.logger.info(f"事件循环: {loop_name}")
+            if self.loop_name == event_loop.LOOP_UVLOOP and loop_name != event_loop.LOOP_UVLOOP:
+                self.logger.warning("uvloop 未安装或当前平台不支持，已使用默认事件循环")
+
+            # 由平滑重启启动时先接收旧进程的监听套接字
+            try:
+                self._inherited_listeners = handover.receive_sockets()
+            except OSError as e:
+                self.logger.error(f"接收旧进程的监听套接字失败: {e}")
+            if self._inherited_listeners:
+                self.logger.info("平滑重启：已接收旧进程的监听套接字")
+
             # 初始化数据库
             self.database_manager = DatabaseManager(self.config_manager)
             await self.database_manager.initialize()
@@ -87,13 +112,28 @@ class BotShepherd:
                 backup_dir="./config/backup"
             )
 
-            # 初始化WebSocket代理服务器
-            self.proxy_server = ProxyServer(
-                config_manager=self.config_manager,
-                database_manager=self.database_manager,
-                logger=self.logger,
-                backup_manager=self.backup_manager
-            )
+            # 初始化WebSocket代理服务器，配置了 worker 进程数时连接分散到多个进程
+            workers = self.workers
+            if workers is None:
+                workers = self.config_manager.get_global_config().get("workers", 0)
+            if workers > 0:
+                self.proxy_server = WorkerPool(
+                    config_manager=self.config_manager,
+                    database_manager=self.database_manager,
+                    logger=self.logger,
+                    backup_manager=self.backup_manager,
+                    workers=workers
+                )
+            else:
+                self.proxy_server = ProxyServer(
+                    config_manager=self.config_manager,
+                    database_manager=self.database_manager,
+                    logger=self.logger,
+                    backup_manager=self.backup_manager
+                )
+                # 多进程模式的监听在 worker 中，只有单进程模式支持平滑重启
+                self._loop = asyncio.get_running_loop()
+                set_reboot_hooks(handover=self._reboot_handover)
 
             # 初始化指令系统
             initialize_builtin_commands(self.logger)
@@ -198,6 +238,8 @@ class BotShepherd:
 
             # 启动WebSocket代理服务器
             proxy_task = asyncio.create_task(self.proxy_server.start())
+            if self._inherited_listeners:
+                asyncio.create_task(self._finish_handover())
 
             # 启动每日备份任务
             global_config = self.config_manager.get_global_config()
@@ -230,6 +272,53 @@ class BotShepherd:
             self.logger.error(f"服务启动失败: {e}")
             return False
 
+    async def _finish_handover(self):
+        """交接来的监听全部启动后通知旧进程退出"""
+        for _ in range(100):
+            if not self.proxy_server.inherited_sockets:
+                break
+            await asyncio.sleep(0.1)
+        self.proxy_server.release_inherited_sockets()
+        handover.notify_ready()
+        self.logger.info("平滑重启：已接管所有监听，旧进程处理完剩余消息后退出")
+
+    async def _reboot_handover(self):
+        """重启回调：restart_mode 为 handover 时交接监听，返回 False 时由调用方直接重启"""
+        if self.config_manager.get_global_config().get("restart_mode", handover.RESTART_EXEC) != handover.RESTART_HANDOVER:
+            return False
+        if asyncio.get_running_loop() is self._loop:
+            return await self.handover()
+        # Web 界面的重启在单独线程的事件循环中执行
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.handover(), self._loop))
+
+    async def handover(self):
+        """平滑重启：启动新进程并交出监听套接字，处理完在途消息后退出本进程"""
+        if not handover.supported():
+            self.logger.warning("当前平台不支持平滑重启，改为直接重启")
+            return False
+
+        # 新进程启动时读取的是磁盘上的配置
+        await self.config_manager.flush_dirty_configs()
+        listeners = [
+            ("proxy", key, sock)
+            for key, sockets in self.proxy_server.listen_sockets().items() for sock in sockets
+        ] + [
+            ("web", key, sock)
+            for key, sockets in self.web_server.listen_sockets().items() for sock in sockets
+        ]
+        self.logger.info(f"平滑重启：启动新进程并交接 {len(listeners)} 个监听套接字...")
+        try:
+            process = await asyncio.to_thread(handover.hand_over, listeners)
+        except Exception as e:
+            self.logger.error(f"平滑重启失败，改为直接重启: {e}")
+            return False
+
+        self.logger.info(f"平滑重启：新进程 (pid {process.pid}) 已开始监听，正在处理剩余消息")
+        await self.proxy_server.drain_for_handover()
+        # 按正常流程停止，关闭数据库前会清空写队列
+        self.shutdown()
+        return True
+
     def shutdown(self):
         """触发关闭"""
         if self.shutdown_event and not self.shutdown_event.is_set():
@@ -458,13 +547,16 @@ def check_config_exists():
 # 全局应用实例
 app_instance = None
     
-async def main():
-    """主函数"""
+def parse_args():
+    """解析命令行参数"""
     parser = argparse.ArgumentParser(description='BotShepherd - 星星花与牧羊人')
     parser.add_argument('--setup', action='store_true', help='初始化配置和环境')
+    parser.add_argument('--workers', type=int, default=None, help='worker 进程数，0 为单进程（默认读取全局配置 workers）')
+    parser.add_argument('--loop', choices=['asyncio', 'uvloop'], default=None, help='事件循环实现（默认读取全局配置 event_loop）')
+    return parser.parse_args()
 
-    args = parser.parse_args()
-
+async def main(args, loop_name=None):
+    """主函数"""
     if args.setup or not os.path.exists("./venv"):
         await setup_initial_config()
         
@@ -478,7 +570,7 @@ async def main():
 
     # 创建并启动BotShepherd
     global app_instance
-    app_instance = BotShepherd()
+    app_instance = BotShepherd(workers=args.workers, loop_name=loop_name)
 
     try:
         await app_instance.start()
@@ -490,8 +582,14 @@ async def main():
         await app_instance.stop()
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        asyncio.run(main())
+        if success:
+            loop_name = args.loop or event_loop.configured_loop()
+            event_loop.run(main(args, loop_name), loop_name)
+        else:
+            # 依赖未安装，先按默认事件循环完成初始化
+            asyncio.run(main(args))
     except KeyboardInterrupt:
         print("\nBotShepherd已停止")
     except Exception as e:
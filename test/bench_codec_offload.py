@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+BotShepherd 大帧编解码卸载基准测试
+一个连接不断收到几 MB 的群成员列表响应并解析、重新编码，
+同时另一个协程每毫秒醒来一次，醒来的延迟即其它连接在这期间需要等待的时间。
+分别在关闭和开启卸载时运行，比较事件循环的延迟分布
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.server.codec_offload import CodecOffload
+from app.utils import json_codec
+
+
+TICK = 0.001
+
+
+def member_list_frame(members: int) -> str:
+    now = int(time.time())
+    return json.dumps({"status": "ok", "retcode": 0, "echo": 42, "data": [
+        {"group_id": 1053786482, "user_id": 10000 + i, "nickname": f"成员{i}", "card": "", "sex": "unknown",
+         "age": 0, "area": "", "join_time": now - i * 3600, "last_sent_time": now, "level": "1",
+         "role": "member", "unfriendly": False, "title": "", "title_expire_time": 0, "card_changeable": True}
+        for i in range(members)]}, ensure_ascii=False)
+
+
+async def ticker(lags: List[float], stop: asyncio.Event):
+    """模拟其它连接：每 TICK 秒需要运行一次"""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - t0 - TICK)
+
+
+async def run(frame: str, frames: int, enabled: bool) -> Dict[str, float]:
+    codec = CodecOffload({"enabled": enabled})
+    lags: List[float] = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        data = await codec.loads(frame)
+        await codec.dumps(data, len(frame))
+        # 两帧之间让出事件循环，相当于等待收下一帧
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick_task
+    lags.sort()
+    return {
+        "p50_ms": lags[len(lags) // 2] * 1000,
+        "p99_ms": lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000,
+        "max_ms": lags[-1] * 1000,
+        "fps": frames / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BotShepherd 大帧编解码卸载基准测试")
+    parser.add_argument("--members", type=int, default=20000, help="成员列表中的成员数（默认: 20000）")
+    parser.add_argument("--frames", type=int, default=30, help="处理的帧数（默认: 30）")
+    args = parser.parse_args()
+
+    frame = member_list_frame(args.members)
+    print(f"JSON 实现: {json_codec.get_codec_name()}，帧大小: {len(frame.encode('utf-8')) / 1024 / 1024:.1f}MB，帧数: {args.frames}")
+
+    print(f"{'模式':<12}{'延迟 p50 ms':>14}{'延迟 p99 ms':>14}{'延迟 max ms':>14}{'大帧/s':>10}")
+    for name, enabled in (("事件循环内", False), ("线程池卸载", True)):
+        r = asyncio.run(run(frame, args.frames, enabled))
+        print(f"{name:<12}{r['p50_ms']:>14.2f}{r['p99_ms']:>14.2f}{r['max_ms']:>14.2f}{r['fps']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+BotShepherd JSON 实现基准测试
+比较标准库 json / orjson / msgspec 在 OneBot 帧上的编解码速度
+
+每条客户端消息在代理里至少经历一次解码和一次编码，
+这里按 "解码 + 编码" 的往返计时，换算成单连接每秒可处理的帧数。
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils import json_codec
+
+
+def sample_frames() -> List[str]:
+    """内置的典型帧：心跳、群消息、通知、发送请求、带图片的请求、成员列表响应"""
+    now = int(time.time())
+    frames = [
+        {"time": now, "self_id": 3145443954, "post_type": "meta_event", "meta_event_type": "heartbeat",
+         "status": {"online": True, "good": True}, "interval": 30000},
+        {"self_id": 3145443954, "user_id": 2408736708, "time": now, "message_id": 1234567890,
+         "message_seq": 1234567890, "real_id": 1234567890, "real_seq": "56789", "message_type": "group",
+         "sender": {"user_id": 2408736708, "nickname": "测试用户", "card": "群名片", "role": "member"},
+         "raw_message": "[CQ:at,qq=3145443954] 今日运势", "font": 14, "sub_type": "normal",
+         "message": [{"type": "at", "data": {"qq": "3145443954"}}, {"type": "text", "data": {"text": " 今日运势"}}],
+         "message_format": "array", "post_type": "message", "group_id": 1053786482},
+        {"time": now, "self_id": 3145443954, "post_type": "notice", "notice_type": "notify", "sub_type": "poke",
+         "target_id": 3145443954, "user_id": 2408736708, "group_id": 1053786482,
+         "raw_info": [{"col": "1", "nm": "", "type": "qq", "uid": "u_xxx"}, {"txt": "戳了戳", "type": "nor"}]},
+        {"action": "send_group_msg", "params": {"group_id": 1053786482, "message": [
+            {"type": "reply", "data": {"id": "1234567890"}},
+            {"type": "text", "data": {"text": "今日运势：大吉\n宜：写代码\n忌：周五上线"}}]}, "echo": "1700000000.123"},
+        {"action": "send_group_msg", "params": {"group_id": 1053786482, "message": [
+            {"type": "image", "data": {"file": "base64://" + base64.b64encode(os.urandom(96 * 1024)).decode()}}]},
+         "echo": "1700000000.456"},
+        {"status": "ok", "retcode": 0, "echo": 42, "data": [
+            {"group_id": 1053786482, "user_id": 10000 + i, "nickname": f"成员{i}", "card": "", "sex": "unknown",
+             "age": 0, "area": "", "join_time": now - i * 3600, "last_sent_time": now, "level": "1",
+             "role": "member", "unfriendly": False, "title": "", "title_expire_time": 0, "card_changeable": True}
+            for i in range(500)]},
+    ]
+    return [json.dumps(frame, ensure_ascii=False) for frame in frames]
+
+
+def load_frames(path: str) -> List[str]:
+    """从文件读取录制的帧，每行一条 JSON"""
+    frames = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                json.loads(line)
+                frames.append(line)
+    return frames
+
+
+def bench(codec, frames: List[str], rounds: int):
+    objs = [codec.loads(frame) for frame in frames]
+    total_bytes = sum(len(frame.encode("utf-8")) for frame in frames)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            codec.loads(frame)
+    decode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for obj in objs:
+            codec.dumps(obj)
+    encode_time = time.perf_counter() - start
+
+    count = rounds * len(frames)
+    return {
+        "decode_fps": count / decode_time,
+        "encode_fps": count / encode_time,
+        "roundtrip_fps": count / (decode_time + encode_time),
+        "mb_per_s": rounds * total_bytes / (decode_time + encode_time) / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BotShepherd JSON 实现基准测试")
+    parser.add_argument("--frames", help="录制的帧文件（JSON Lines），默认使用内置样例")
+    parser.add_argument("--rounds", type=int, default=200, help="每个实现重复的轮数（默认: 200）")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else sample_frames()
+    codecs = json_codec.available_codecs()
+    print(f"帧数: {len(frames)}，轮数: {args.rounds}，可用实现: {', '.join(codecs)}")
+
+    # 先确认各实现解码结果一致
+    for name, codec in codecs.items():
+        for frame in frames:
+            if codec.loads(frame) != json.loads(frame):
+                print(f"❌ {name} 解码结果与标准库不一致: {frame[:200]}")
+                return
+
+    results = {name: bench(codec, frames, args.rounds) for name, codec in codecs.items()}
+    baseline = results[json_codec.CODEC_STDLIB]["roundtrip_fps"]
+
+    print(f"{'实现':<10}{'解码 帧/s':>14}{'编码 帧/s':>14}{'往返 帧/s':>14}{'MB/s':>10}{'加速比':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['decode_fps']:>14.0f}{r['encode_fps']:>14.0f}{r['roundtrip_fps']:>14.0f}"
+              f"{r['mb_per_s']:>10.1f}{r['roundtrip_fps'] / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+BotShepherd 本机传输基准测试
+比较 TCP 回环（压缩 / 不压缩）与 Unix 域套接字上 WebSocket 帧的往返延迟和吞吐
+
+每种传输各启动一个回显服务，客户端逐条发送样例帧并等待回显，
+得到的往返时间约等于代理中一跳（协议端 -> BotShepherd 或 BotShepherd -> 框架）的两倍。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.server.unix_socket import unix_uri
+
+
+def sample_frames() -> List[str]:
+    """群消息和带 20KB 文本的发送请求"""
+    now = int(time.time())
+    message = {
+        "self_id": 3145443954, "user_id": 2408736708, "time": now, "message_id": 1234567890,
+        "message_type": "group", "sender": {"user_id": 2408736708, "nickname": "测试用户", "card": "", "role": "member"},
+        "raw_message": "今日运势", "font": 14, "sub_type": "normal",
+        "message": [{"type": "text", "data": {"text": "今日运势"}}],
+        "message_format": "array", "post_type": "message", "group_id": 1053786482,
+    }
+    request = {"action": "send_group_msg", "params": {"group_id": 1053786482, "message": [
+        {"type": "text", "data": {"text": "今日运势：大吉\n" * 1500}}]}, "echo": "1700000000.123"}
+    return [json.dumps(message, ensure_ascii=False), json.dumps(request, ensure_ascii=False)]
+
+
+async def echo(ws):
+    async for frame in ws:
+        await ws.send(frame)
+
+
+async def measure(ws, frames: List[str], rounds: int) -> Dict[str, float]:
+    # 预热
+    for frame in frames:
+        await ws.send(frame)
+        await ws.recv()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            t0 = time.perf_counter()
+            await ws.send(frame)
+            await ws.recv()
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+        "fps": len(latencies) / elapsed,
+    }
+
+
+async def run(frames: List[str], rounds: int, port: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="bs-bench-"), "bench.sock")
+
+    # TCP 回环，默认压缩（与旧版连接一致）
+    async with websockets.serve(echo, "127.0.0.1", port, max_size=None):
+        async with websockets.connect(f"ws://127.0.0.1:{port}/OneBotv11", max_size=None) as ws:
+            results["tcp + deflate"] = await measure(ws, frames, rounds)
+
+    # TCP 回环，不压缩
+    async with websockets.serve(echo, "127.0.0.1", port, max_size=None, compression=None):
+        async with websockets.connect(f"ws://127.0.0.1:{port}/OneBotv11", max_size=None, compression=None) as ws:
+            results["tcp"] = await measure(ws, frames, rounds)
+
+    # Unix 域套接字，不压缩（ws+unix:// 端点的默认值）
+    async with websockets.unix_serve(echo, socket_path, max_size=None, compression=None):
+        async with websockets.unix_connect(socket_path, uri=unix_uri("/OneBotv11"), max_size=None, compression=None) as ws:
+            results["unix"] = await measure(ws, frames, rounds)
+    os.unlink(socket_path)
+    os.rmdir(os.path.dirname(socket_path))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BotShepherd 本机传输基准测试")
+    parser.add_argument("--rounds", type=int, default=2000, help="每种传输重复的轮数（默认: 2000）")
+    parser.add_argument("--port", type=int, default=17990, help="TCP 测试使用的端口（默认: 17990）")
+    args = parser.parse_args()
+
+    if not hasattr(websockets, "unix_serve") or sys.platform == "win32":
+        print("❌ 当前平台不支持 Unix 域套接字")
+        return
+
+    frames = sample_frames()
+    sizes = ", ".join(f"{len(frame.encode('utf-8'))}B" for frame in frames)
+    print(f"样例帧: {sizes}，轮数: {args.rounds}")
+
+    results = asyncio.run(run(frames, args.rounds, args.port))
+    baseline = results["tcp + deflate"]["p50_us"]
+
+    print(f"{'传输':<16}{'p50 μs':>10}{'p99 μs':>10}{'往返/s':>10}{'p50 对比':>12}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['p50_us']:>10.0f}{r['p99_us']:>10.0f}{r['fps']:>10.0f}{baseline / r['p50_us']:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
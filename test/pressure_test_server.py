@@ -2,16 +2,131 @@
 """
 BotShepherd 压力测试服务器
 模拟napcat客户端向BotShepherd发送消息进行压力测试
+
+指定 --target-port 时同时模拟一个框架，BotShepherd 的连接配置需要把它作为目标，
+按 message_id 统计从发出到框架收到的转发延迟；--embedded 在本进程内启动 BotShepherd，
+--compare-loops 分别用 asyncio 和 uvloop 运行内置 BotShepherd 并对比结果
 """
 
 import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import websockets
 import json
 import time
 import random
 import argparse
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils import event_loop
+
+
+# 测试结束后等待在途消息到达框架的最长时间（秒）
+DRAIN_TIMEOUT = 5
+
+
+class LatencyTarget:
+    """模拟框架，接收 BotShepherd 转发的事件，按 message_id 计算转发延迟"""
+
+    def __init__(self, port: int, sent_at: Dict[int, float]):
+        self.port = port
+        self.sent_at = sent_at
+        self.server = None
+        self.received = 0
+        self.latencies: List[float] = []
+
+    async def start(self):
+        self.server = await websockets.serve(self._handler, "127.0.0.1", self.port, max_size=None)
+        print(f"🎯 模拟框架已监听 ws://127.0.0.1:{self.port}")
+
+    async def _handler(self, ws):
+        async for frame in ws:
+            now = time.perf_counter()
+            data = json.loads(frame)
+            if data.get("post_type") not in ("message", "notice"):
+                continue
+            self.received += 1
+            sent = self.sent_at.pop(data.get("message_id"), None)
+            if sent is not None:
+                self.latencies.append(now - sent)
+
+    async def wait_drained(self, timeout: float = DRAIN_TIMEOUT):
+        """等待已发送的消息全部到达，被过滤的消息等到超时"""
+        deadline = time.time() + timeout
+        while self.sent_at and time.time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def report(self, sent: int, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        return {
+            "loop": event_loop.get_loop_name(),
+            "sent": sent,
+            "received": self.received,
+            "lost": len(self.sent_at),
+            "msgs_per_sec": self.received / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+
+async def start_embedded_proxy(client_url: str, target_port: int):
+    """在本进程内启动 BotShepherd，配置和数据库放在临时目录"""
+    workdir = tempfile.mkdtemp(prefix="bs-pressure-")
+    os.chdir(workdir)
+
+    from app.config.config_manager import ConfigManager
+    from app.database.database_manager import DatabaseManager
+    from app.server.proxy_server import ProxyServer
+    from app.utils.logger import BSLogger
+    from app.commands import initialize_builtin_commands
+
+    config_manager = ConfigManager()
+    await config_manager.initialize()
+    logging_config = config_manager.get_global_config()["logging"]
+    logging_config["level"] = "WARNING"
+    await config_manager.update_global_config({"logging": logging_config, "allow_private": True})
+    logger = BSLogger(config_manager.get_global_config())
+    config_manager.set_logger(logger)
+    await config_manager.save_connection_config("pressure", {
+        "name": "pressure", "description": "压力测试", "enabled": True,
+        "client_endpoint": client_url,
+        "target_endpoints": [f"ws://127.0.0.1:{target_port}/OneBotv11"],
+    })
+    database_manager = DatabaseManager(config_manager)
+    await database_manager.initialize()
+    initialize_builtin_commands(logger)
+
+    proxy_server = ProxyServer(config_manager, database_manager, logger)
+    task = asyncio.create_task(proxy_server.start())
+    await asyncio.sleep(0.5)
+    print(f"🐑 内置 BotShepherd 已启动，工作目录: {workdir}")
+
+    async def stop():
+        await proxy_server.stop()
+        task.cancel()
+        await database_manager.close()
+        os.chdir(Path(__file__).parent.parent)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return stop
 
 
 class PressureTestServer:
@@ -29,6 +144,12 @@ class PressureTestServer:
         self.websocket = None
         self.running = False
         self.message_count = 0
+        # 递增的 message_id，避免随机值重复被 BotShepherd 当作重发的消息丢弃
+        self._next_message_id = random.randint(100000, 999999) * 1000
+        # 开启延迟统计时记录每条消息的发送时间，由 LatencyTarget 取走
+        self.sent_at: Optional[Dict[int, float]] = None
+        self.target: Optional[LatencyTarget] = None
+        self.elapsed = 0.0
         
     async def connect(self):
         """连接到BotShepherd服务器"""
@@ -71,7 +192,8 @@ class PressureTestServer:
     def get_test_messages(self) -> List[Dict[str, Any]]:
         """获取测试消息模板"""
         current_time = int(time.time())
-        message_id = random.randint(100000, 999999)
+        message_id = self._next_message_id
+        self._next_message_id += 5
         
         messages = [
             # 今日运势指令
@@ -254,7 +376,9 @@ class PressureTestServer:
         
         self.running = True
         start_time = time.time()
-        interval = 1.0 / rate if rate > 0 else 1.0
+        # rate 为 0 时不限速，尽快发送
+        interval = 1.0 / rate if rate > 0 else 0
+        last_report = start_time
         
         try:
             while self.running and (time.time() - start_time) < duration:
@@ -263,11 +387,15 @@ class PressureTestServer:
                 # 随机选择一个消息发送
                 message = random.choice(messages)
                 
+                if self.sent_at is not None and "message_id" in message:
+                    self.sent_at[message["message_id"]] = time.perf_counter()
                 await self.websocket.send(json.dumps(message))
                 self.message_count += 1
                 
-                if self.message_count % 10 == 0:
-                    elapsed = time.time() - start_time
+                # 每秒最多输出一次进度
+                if time.time() - last_report >= 1:
+                    last_report = time.time()
+                    elapsed = last_report - start_time
                     current_rate = self.message_count / elapsed
                     print(f"📊 已发送 {self.message_count} 条消息, 当前速率: {current_rate:.2f} 消息/秒")
                 
@@ -277,11 +405,15 @@ class PressureTestServer:
             print(f"❌ 发送消息时出错: {e}")
         
         elapsed = time.time() - start_time
+        self.elapsed = elapsed
         avg_rate = self.message_count / elapsed if elapsed > 0 else 0
         print(f"✅ 压力测试完成! 总计发送 {self.message_count} 条消息, 平均速率: {avg_rate:.2f} 消息/秒")
     
-    async def run_test(self, rate: float = 1.0, duration: int = 60):
-        """运行完整的压力测试"""
+    async def run_test(self, rate: float = 1.0, duration: int = 60, target: Optional[LatencyTarget] = None):
+        """运行完整的压力测试，指定 target 时统计转发延迟"""
+        self.target = target
+        if target is not None:
+            self.sent_at = target.sent_at
         if not await self.connect():
             return
         
@@ -294,6 +426,9 @@ class PressureTestServer:
             
             # 开始压力测试
             await self.send_pressure_test(rate, duration)
+
+            if self.target is not None:
+                await self.target.wait_drained()
             
         except KeyboardInterrupt:
             print("\n⏹️ 用户中断测试")
@@ -306,23 +441,66 @@ class PressureTestServer:
                 print("🔌 连接已关闭")
 
 
-async def main():
-    """主函数"""
+def print_report(report: Dict[str, Any]):
+    print("-" * 50)
+    print(f"📈 事件循环: {report['loop']}")
+    print(f"   发送 {report['sent']} 条，框架收到 {report['received']} 条，未收到 {report['lost']} 条")
+    print(f"   吞吐: {report['msgs_per_sec']:.1f} 消息/秒")
+    print(f"   转发延迟: p50 {report['p50_ms']:.2f}ms, p99 {report['p99_ms']:.2f}ms, 最大 {report['max_ms']:.2f}ms")
+
+
+def compare_loops(args):
+    """分别用两种事件循环运行内置 BotShepherd，每次使用独立的子进程"""
+    results = []
+    for loop_name in event_loop.LOOP_NAMES:
+        command = [sys.executable, __file__, "--embedded", "--json", "--loop", loop_name,
+                   "--url", args.url, "--target-port", str(args.target_port),
+                   "--rate", str(args.rate), "--duration", str(args.duration),
+                   "--bot-qq", args.bot_qq, "--group", args.group, "--user", args.user]
+        print(f"▶️ 使用 {loop_name} 运行...")
+        output = subprocess.run(command, capture_output=True, text=True).stdout.strip().splitlines()
+        if not output or not output[-1].startswith("{"):
+            print(f"❌ {loop_name} 运行失败")
+            continue
+        report = json.loads(output[-1])
+        if report["loop"] != loop_name:
+            print(f"⚠️ {loop_name} 不可用（未安装或当前平台不支持），跳过")
+            continue
+        results.append(report)
+
+    print("-" * 50)
+    print(f"{'事件循环':<10}{'消息/秒':>10}{'p50 ms':>10}{'p99 ms':>10}{'最大 ms':>10}{'未收到':>8}")
+    for r in results:
+        print(f"{r['loop']:<10}{r['msgs_per_sec']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}{r['lost']:>8}")
+
+
+def parse_args():
     parser = argparse.ArgumentParser(description='BotShepherd 压力测试服务器')
     parser.add_argument('--url', default='ws://localhost:7766', help='BotShepherd服务器地址')
     parser.add_argument('--bot-qq', default='666666', help='机器人QQ号')
     parser.add_argument('--group', default='555555', help='测试群号')
     parser.add_argument('--user', default='444444', help='测试用户QQ号')
-    parser.add_argument('--rate', type=float, default=1.0, help='发送速率（消息/秒）')
+    parser.add_argument('--rate', type=float, default=1.0, help='发送速率（消息/秒），0 为不限速')
     parser.add_argument('--duration', type=int, default=60, help='测试持续时间（秒）')
-    
+    parser.add_argument('--target-port', type=int, default=None, help='模拟框架监听的端口，指定后统计吞吐和转发延迟')
+    parser.add_argument('--embedded', action='store_true', help='在本进程内启动 BotShepherd（临时目录，不影响现有配置）')
+    parser.add_argument('--loop', choices=event_loop.LOOP_NAMES, default=event_loop.LOOP_ASYNCIO, help='本进程使用的事件循环')
+    parser.add_argument('--compare-loops', action='store_true', help='分别用 asyncio 和 uvloop 运行内置 BotShepherd 并对比')
+    parser.add_argument('--json', action='store_true', help='最后一行输出 JSON 格式的结果')
     args = parser.parse_args()
-    
+    if (args.embedded or args.compare_loops) and args.target_port is None:
+        args.target_port = 7767
+    return args
+
+
+async def main(args):
+    """主函数"""
     print("🤖 BotShepherd 压力测试服务器")
     print(f"服务器地址: {args.url}")
     print(f"机器人QQ: {args.bot_qq}")
     print(f"测试群组: {args.group}")
     print(f"测试用户: {args.user}")
+    print(f"事件循环: {event_loop.get_loop_name()}")
     print("-" * 50)
     
     server = PressureTestServer(
@@ -331,9 +509,31 @@ async def main():
         test_group=args.group,
         test_user=args.user
     )
-    
-    await server.run_test(args.rate, args.duration)
+
+    target = None
+    if args.target_port is not None:
+        target = LatencyTarget(args.target_port, {})
+        await target.start()
+    stop_proxy = await start_embedded_proxy(args.url, args.target_port) if args.embedded else None
+
+    try:
+        await server.run_test(args.rate, args.duration, target)
+    finally:
+        if stop_proxy is not None:
+            await stop_proxy()
+        if target is not None:
+            await target.stop()
+
+    if target is not None:
+        report = target.report(server.message_count, server.elapsed)
+        print_report(report)
+        if args.json:
+            print(json.dumps(report))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.compare_loops:
+        compare_loops(args)
+    else:
+        event_loop.run(main(args), args.loop)